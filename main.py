@@ -36,8 +36,11 @@ from src.core.signal_generator import SignalGenerator
 from src.core.ml_engine import MLEngine
 from src.telegram.bot_handler import TelegramBotHandler
 from src.mt5.connection import MT5Connection
+from src.mt5.tick_pump import TickPump
+from src.mt5.gateway import LatencyHistogram
 from src.utils.logger import setup_logger
 from src.services.news_service import NewsService
+from src.utils.scheduler import JobScheduler
 
 logger = setup_logger(__name__)
 
@@ -54,8 +57,11 @@ class NixieTradingBot:
         self.ml_engine = None
         self.telegram_handler = None
         self.news_service = None
-        self.last_hourly_update = None
-        self.last_trade_check = None
+        self.latest_market_states = {}  # {symbol: market_state} from the most recent scan
+        self.scheduler = None
+        self.tick_pump = None
+        self.dispatch_tasks = set()  # In-flight signal dispatch stages
+        self.signal_to_order = LatencyHistogram()  # Signal generated -> orders accepted on user accounts
         
     def display_banner(self):
         """Display animated startup banner"""
@@ -127,6 +133,17 @@ class NixieTradingBot:
             print(Fore.GREEN + "  ✓ TP/SL monitoring")
             print(Fore.GREEN + "  ✓ Win rate tracking")
             
+            # Tick-driven trade monitoring: only symbols with active signals are polled
+            if self.config.TICK_PUMP_ENABLED:
+                self.tick_pump = TickPump(
+                    self.mt5_connection,
+                    min_interval=self.config.TICK_PUMP_MIN_INTERVAL,
+                    max_interval=self.config.TICK_PUMP_MAX_INTERVAL
+                )
+                self.tick_pump.add_watch_source('active_signals', self.signal_generator.triggers.symbols)
+                self.tick_pump.subscribe(self.on_tick)
+                print(Fore.GREEN + "  ✓ Tick-driven TP/SL monitoring")
+            
             # Initialize Telegram handler
             print(Fore.CYAN + "[TELEGRAM] Starting Telegram bot...")
             self.telegram_handler = TelegramBotHandler(self.config, self)
@@ -177,49 +194,59 @@ class NixieTradingBot:
     async def run(self):
         """Main bot loop"""
         self.running = True
-        self.last_hourly_update = datetime.now()
-        self.last_trade_check = datetime.now()
         
-        scan_interval = 300  # 5 minutes
-        hourly_interval = 3600  # 1 hour
-        trade_check_interval = 30  # 30 seconds
+        # Each job runs on its own cadence so a slow scan never delays trade monitoring
+        self.scheduler = JobScheduler()
+        self.scheduler.add_job(
+            'market_scan', self.scan_markets,
+            interval=self.config.SCAN_INTERVAL,
+            jitter=self.config.SCHEDULER_JITTER,
+            align=self.config.SCAN_ON_BAR_CLOSE,
+            offset=self.config.BAR_CLOSE_DELAY
+        )
+        if not self.tick_pump:
+            self.scheduler.add_job(
+                'trade_monitor', self.monitor_trades,
+                interval=self.config.CHECK_TRADES_INTERVAL
+            )
+        if self.config.ACCOUNT_WORKERS_ENABLED and self.config.POSITION_RECONCILE_INTERVAL > 0:
+            self.scheduler.add_job(
+                'position_reconcile', self.reconcile_positions,
+                interval=self.config.POSITION_RECONCILE_INTERVAL,
+                run_immediately=False
+            )
+        if self.config.HOURLY_UPDATE_ENABLED:
+            self.scheduler.add_job(
+                'hourly_update', self.send_hourly_update,
+                interval=self.config.HOURLY_UPDATE_INTERVAL,
+                jitter=self.config.SCHEDULER_JITTER,
+                run_immediately=False
+            )
         
+        scan_mode = "bar-close" if self.config.SCAN_ON_BAR_CLOSE else f"{self.config.SCAN_INTERVAL // 60}-min"
+        trade_mode = "tick-driven" if self.tick_pump else f"{self.config.CHECK_TRADES_INTERVAL}-sec"
         logger.info("Starting main trading loop")
-        print(Fore.YELLOW + "[LOOP] Entering main trading loop (5-min scan, 1-hour updates, 30-sec trade check)")
+        print(Fore.YELLOW + f"[LOOP] Entering main trading loop ({scan_mode} scan, "
+              f"{self.config.HOURLY_UPDATE_INTERVAL // 3600}-hour updates, "
+              f"{trade_mode} trade check)")
+        
+        # The tick pump runs continuously next to the scheduled jobs
+        pump_task = asyncio.create_task(self.tick_pump.run()) if self.tick_pump else None
         
         try:
-            while self.running:
-                loop_start = time.time()
-                
-                # Market scan every 5 minutes
-                await self.scan_markets()
-                
-                # Check active trades every 30 seconds
-                time_since_trade_check = (datetime.now() - self.last_trade_check).total_seconds()
-                if time_since_trade_check >= trade_check_interval:
-                    await self.monitor_trades()
-                    self.last_trade_check = datetime.now()
-                
-                # Hourly update check
-                time_since_update = (datetime.now() - self.last_hourly_update).total_seconds()
-                if time_since_update >= hourly_interval:
-                    await self.send_hourly_update()
-                    self.last_hourly_update = datetime.now()
-                
-                # Sleep for remaining time
-                elapsed = time.time() - loop_start
-                sleep_time = max(0, min(scan_interval, trade_check_interval) - elapsed)
-                
-                if sleep_time > 0:
-                    await asyncio.sleep(sleep_time)
-                
-        except KeyboardInterrupt:
+            await self.scheduler.run()
+            
+        except (KeyboardInterrupt, asyncio.CancelledError):
             logger.info("Bot stopped by user")
             print(Fore.YELLOW + "\n[SYSTEM] Shutdown signal received")
         except Exception as e:
             logger.error(f"Error in main loop: {e}", exc_info=True)
             print(Fore.RED + f"[ERROR] Main loop error: {e}")
         finally:
+            self.running = False
+            if pump_task:
+                self.tick_pump.stop()
+                await asyncio.gather(pump_task, return_exceptions=True)
             await self.shutdown()
     
     async def scan_markets(self):
@@ -229,34 +256,37 @@ class NixieTradingBot:
             
             symbols = self.config.TRADING_SYMBOLS
             
-            for symbol in symbols:
+            # Cooldown, kill zone and news blackout are checked before any MT5 call
+            gated = self.signal_generator.check_pre_gates(symbols)
+            if gated:
+                reasons = sorted(set(gated.values()))
+                logger.info(f"Pre-gates skipped {len(gated)}/{len(symbols)} symbols ({', '.join(reasons)})")
+            
+            # Analyze the remaining symbols concurrently, at most SCAN_CONCURRENCY at a time
+            scan_symbols = [symbol for symbol in symbols if symbol not in gated]
+            semaphore = asyncio.Semaphore(max(1, self.config.SCAN_CONCURRENCY))
+            market_states = await asyncio.gather(
+                *(self._analyze_symbol(symbol, semaphore) for symbol in scan_symbols)
+            )
+            
+            # Generate signals in symbol order, independent of completion order
+            for symbol, market_state in zip(scan_symbols, market_states):
+                if not market_state:
+                    continue
+                
                 try:
-                    # Analyze market
-                    market_state = await self.market_analyzer.analyze(symbol)
-                    
-                    if not market_state:
-                        continue
-                    
-                    # Check news blackout
-                    if self.news_service and self.news_service.is_news_blackout_period():
-                        logger.info(f"Signal generation paused: News blackout period")
-                        continue
+                    self.latest_market_states[symbol] = market_state
                     
                     # Generate signal if conditions met
                     signal = await self.signal_generator.generate_signal(symbol, market_state)
                     
                     if signal:
-                        # Send signal to subscribers
-                        await self.telegram_handler.broadcast_signal(signal)
-                        
-                        # Store signal for ML training
-                        await self.ml_engine.store_signal(signal)
+                        # Start watching the symbol's price right away
+                        if self.tick_pump:
+                            self.tick_pump.wake()
                         
-                        # Execute on user accounts if enabled
-                        if hasattr(self.telegram_handler, 'account_manager'):
-                            execution_results = await self.telegram_handler.execute_signal_for_users(signal)
-                            if execution_results:
-                                await self.telegram_handler.send_execution_confirmations(signal, execution_results)
+                        # Execution, broadcast and ML storage run in the background
+                        self.dispatch_signal(signal)
                         
                         logger.info(f"Signal generated for {symbol}: {signal['direction']}")
                         print(Fore.GREEN + f"[SIGNAL] Generated for {symbol} - {signal['direction']} {signal['entry_type']}")
@@ -272,6 +302,65 @@ class NixieTradingBot:
         except Exception as e:
             logger.error(f"Error in market scan: {e}", exc_info=True)
     
+    def dispatch_signal(self, signal):
+        """
+        Start the independent stages for a new signal without waiting for them
+        Order execution starts first; the subscriber broadcast runs alongside it, and ML storage
+        (which may trigger model training) waits until the orders are out.
+        """
+        generated_at = time.perf_counter()
+        execution = self._start_stage(self._execute_signal(signal, generated_at), 'execute', signal)
+        self._start_stage(self.telegram_handler.broadcast_signal(signal), 'broadcast', signal)
+        self._start_stage(self._store_signal_after(execution, signal), 'ml_store', signal)
+    
+    def _start_stage(self, coro, stage, signal):
+        task = asyncio.create_task(coro, name=f"signal:{signal['symbol']}:{stage}")
+        self.dispatch_tasks.add(task)
+        task.add_done_callback(self.dispatch_tasks.discard)
+        return task
+    
+    async def _execute_signal(self, signal, generated_at):
+        """Execute on user accounts if enabled, then confirm to the account owners"""
+        try:
+            if not hasattr(self.telegram_handler, 'account_manager'):
+                return
+            
+            execution_results = await self.telegram_handler.execute_signal_for_users(signal)
+            if not execution_results:
+                return
+            
+            latency_ms = (time.perf_counter() - generated_at) * 1000
+            self.signal_to_order.record(latency_ms)
+            logger.info(f"Signal-to-order latency for {signal['symbol']}: {latency_ms:.0f}ms "
+                        f"(p95 {self.signal_to_order.percentile(0.95):.0f}ms)")
+            
+            await self.telegram_handler.send_execution_confirmations(signal, execution_results)
+            
+        except Exception as e:
+            logger.error(f"Error executing signal for {signal['symbol']}: {e}", exc_info=True)
+    
+    async def _store_signal_after(self, execution, signal):
+        """Store the signal for ML training once execution has finished"""
+        await asyncio.gather(execution, return_exceptions=True)
+        await self.ml_engine.store_signal(signal)
+    
+    async def _analyze_symbol(self, symbol, semaphore):
+        """Analyze one symbol under the scan concurrency limit and timeout"""
+        async with semaphore:
+            try:
+                return await asyncio.wait_for(
+                    self.market_analyzer.analyze(symbol),
+                    timeout=self.config.SCAN_SYMBOL_TIMEOUT
+                )
+            except asyncio.TimeoutError:
+                logger.warning(f"Analysis of {symbol} timed out after {self.config.SCAN_SYMBOL_TIMEOUT}s")
+                print(Fore.YELLOW + f"[TIMEOUT] Scanning {symbol}")
+                return {}
+            except Exception as e:
+                logger.error(f"Error scanning {symbol}: {e}")
+                print(Fore.RED + f"[ERROR] Scanning {symbol}: {e}")
+                return {}
+    
     async def monitor_trades(self):
         """Monitor active trades for TP/SL hits"""
         try:
@@ -286,6 +375,29 @@ class NixieTradingBot:
         except Exception as e:
             logger.error(f"Error monitoring trades: {e}", exc_info=True)
     
+    async def on_tick(self, symbol, tick):
+        """Check a symbol's active trades whenever the tick pump sees its price move"""
+        notifications = await self.signal_generator.check_symbol(symbol, tick)
+        
+        # Delivery runs in its own task so the pump goes straight back to checking triggers
+        for notification in notifications:
+            logger.info(f"Trade closed: {notification['symbol']} {notification['outcome']} {notification['pips']:.1f} pips")
+            self._start_stage(self.telegram_handler.send_trade_closed_notification(notification),
+                              'closed_notification', notification)
+    
+    async def reconcile_positions(self):
+        """Sync tracked user tickets with their accounts' open positions and pending orders"""
+        try:
+            if not hasattr(self.telegram_handler, 'account_manager'):
+                return
+            
+            events = await self.telegram_handler.reconcile_user_positions()
+            if events:
+                logger.info(f"Position reconcile: {len(events)} change(s)")
+            
+        except Exception as e:
+            logger.error(f"Error reconciling positions: {e}", exc_info=True)
+    
     async def send_hourly_update(self):
         """Send hourly market update to subscribers"""
         try:
@@ -295,7 +407,12 @@ class NixieTradingBot:
             
             for symbol in self.config.TRADING_SYMBOLS:
                 try:
-                    market_state = await self.market_analyzer.analyze(symbol)
+                    # Reuse a fresh scan result; gated or stale symbols get a lightweight snapshot
+                    market_state = self.latest_market_states.get(symbol)
+                    if not market_state or self._is_stale(market_state):
+                        market_state = await self.market_analyzer.snapshot(symbol)
+                        if market_state:
+                            self.latest_market_states[symbol] = market_state
                     if market_state:
                         update = self._format_market_update(symbol, market_state)
                         updates.append(update)
@@ -327,6 +444,12 @@ class NixieTradingBot:
             except:
                 pass
         
+        if self.config.SCAN_ON_BAR_CLOSE:
+            scan_info = f"every {self.config.SCAN_INTERVAL // 60} minutes, on bar close"
+        else:
+            scan_info = f"{self.config.SCAN_INTERVAL // 60} minutes"
+        monitor_info = "event-driven (tick pump)" if self.tick_pump else f"{self.config.CHECK_TRADES_INTERVAL} seconds"
+        
         news_info = ""
         if self.news_service:
             news_info = """
@@ -346,8 +469,8 @@ class NixieTradingBot:
 
 <b>Configuration:</b>
 - Symbols: {len(self.config.TRADING_SYMBOLS)} pairs
-- Scan Interval: 5 minutes
-- Trade Monitoring: 30 seconds
+- Scan Interval: {scan_info}
+- Trade Monitoring: {monitor_info}
 - Update Interval: 1 hour
 - ML Engine: Enabled
 - Strategy: SMC Institutional Precision
@@ -368,6 +491,11 @@ All trading systems are operational. The bot will now monitor markets and send s
 Market updates will be sent hourly if no signals are generated.
 """
     
+    def _is_stale(self, market_state):
+        """Whether a stored market state predates the last scan interval"""
+        age = (datetime.now() - market_state['timestamp']).total_seconds()
+        return age > self.config.SCAN_INTERVAL * 2
+    
     def _format_market_update(self, symbol, market_state):
         """Format individual market update"""
         return {
@@ -408,6 +536,10 @@ Market updates will be sent hourly if no signals are generated.
         try:
             print(Fore.YELLOW + "\n[SYSTEM] Initiating graceful shutdown...")
             
+            # Let in-flight signal executions, broadcasts, ML writes and trade notifications finish
+            if self.dispatch_tasks:
+                await asyncio.wait(self.dispatch_tasks, timeout=30)
+            
             # Send shutdown notification
             if self.telegram_handler:
                 try:
@@ -433,13 +565,22 @@ The bot has been shut down. No further signals or updates will be sent until res
                 
                 await self.telegram_handler.shutdown()
             
+            # Stop tick-driven monitoring
+            if self.tick_pump:
+                self.tick_pump.stop()
+            
             # Stop news service
             if self.news_service:
                 self.news_service.stop()
             
+            # Stop analysis workers
+            if self.market_analyzer:
+                self.market_analyzer.close()
+            
             # Disconnect MT5
             if self.mt5_connection:
                 await self.mt5_connection.disconnect()
+                self.mt5_connection.gateway.shutdown()
             
             # Save ML model
             if self.ml_engine:
@@ -0,0 +1,308 @@
+"""
+SMC Primitives Check - Vectorized structure and order block detection against the original loops
+Replays stored bar files (data/bars/*.npy) through both versions and times them on 500 and 5,000 bars
+
+Usage: python scripts/check_smc_primitives.py [BAR_FILE_OR_DIR ...] [--bench]
+"""
+
+import argparse
+import glob
+import os
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config.settings import Config
+from src.core.enhanced_trend_analyzer import EnhancedTrendAnalyzer
+from src.core.market_analyzer import MarketAnalyzer
+from src.core.smc_primitives import analyze_structure, find_order_blocks
+
+WINDOW_SIZES = (25, 60, 200, 500)
+WINDOWS_PER_SIZE = 8
+OB_LOOKBACKS = (20, 30)
+BENCH_SIZES = (500, 5000)
+
+
+# ==================== REFERENCE (ORIGINAL ILOC LOOPS) ====================
+
+def reference_structure(df: pd.DataFrame) -> dict:
+    """MarketAnalyzer._analyze_structure before vectorization"""
+    highs = []
+    lows = []
+
+    for i in range(2, len(df) - 2):
+        if (df.iloc[i]['high'] > df.iloc[i-1]['high'] and
+            df.iloc[i]['high'] > df.iloc[i-2]['high'] and
+            df.iloc[i]['high'] > df.iloc[i+1]['high'] and
+            df.iloc[i]['high'] > df.iloc[i+2]['high']):
+            highs.append({'price': df.iloc[i]['high'], 'index': i})
+
+        if (df.iloc[i]['low'] < df.iloc[i-1]['low'] and
+            df.iloc[i]['low'] < df.iloc[i-2]['low'] and
+            df.iloc[i]['low'] < df.iloc[i+1]['low'] and
+            df.iloc[i]['low'] < df.iloc[i+2]['low']):
+            lows.append({'price': df.iloc[i]['low'], 'index': i})
+
+    bos_detected = False
+    bos_direction = None
+
+    if len(highs) >= 2 and len(lows) >= 2:
+        if df.iloc[-1]['close'] > highs[-2]['price']:
+            bos_detected = True
+            bos_direction = 'BULLISH'
+        elif df.iloc[-1]['close'] < lows[-2]['price']:
+            bos_detected = True
+            bos_direction = 'BEARISH'
+
+    return {
+        'swing_highs': highs[-5:] if len(highs) > 5 else highs,
+        'swing_lows': lows[-5:] if len(lows) > 5 else lows,
+        'bos_detected': bos_detected,
+        'bos_direction': bos_direction
+    }
+
+
+def reference_liquidity_zones(df: pd.DataFrame) -> list:
+    """MarketAnalyzer._identify_liquidity_zones before vectorization"""
+    liquidity_zones = []
+
+    if len(df) > 24:
+        liquidity_zones.append({'type': 'PDH', 'price': df.iloc[-24:-1]['high'].max(), 'strength': 'HIGH'})
+        liquidity_zones.append({'type': 'PDL', 'price': df.iloc[-24:-1]['low'].min(), 'strength': 'HIGH'})
+
+    structure = reference_structure(df)
+    for high in structure['swing_highs'][-3:]:
+        liquidity_zones.append({'type': 'SWING_HIGH', 'price': high['price'], 'strength': 'MEDIUM'})
+    for low in structure['swing_lows'][-3:]:
+        liquidity_zones.append({'type': 'SWING_LOW', 'price': low['price'], 'strength': 'MEDIUM'})
+
+    return liquidity_zones
+
+
+def reference_structure_trend(df: pd.DataFrame) -> dict:
+    """EnhancedTrendAnalyzer._structure_trend before vectorization"""
+    lookback = min(50, len(df))
+    recent_data = df.iloc[-lookback:]
+
+    highs = []
+    lows = []
+
+    for i in range(2, len(recent_data) - 2):
+        if (recent_data.iloc[i]['high'] > recent_data.iloc[i-1]['high'] and
+            recent_data.iloc[i]['high'] > recent_data.iloc[i-2]['high'] and
+            recent_data.iloc[i]['high'] > recent_data.iloc[i+1]['high'] and
+            recent_data.iloc[i]['high'] > recent_data.iloc[i+2]['high']):
+            highs.append(recent_data.iloc[i]['high'])
+
+        if (recent_data.iloc[i]['low'] < recent_data.iloc[i-1]['low'] and
+            recent_data.iloc[i]['low'] < recent_data.iloc[i-2]['low'] and
+            recent_data.iloc[i]['low'] < recent_data.iloc[i+1]['low'] and
+            recent_data.iloc[i]['low'] < recent_data.iloc[i+2]['low']):
+            lows.append(recent_data.iloc[i]['low'])
+
+    if len(highs) < 2 or len(lows) < 2:
+        return {'direction': 'NEUTRAL', 'strength': 50, 'pattern': 'insufficient_data', 'method': 'structure'}
+
+    recent_highs = highs[-3:]
+    recent_lows = lows[-3:]
+
+    hh = all(recent_highs[i] > recent_highs[i-1] for i in range(1, len(recent_highs)))
+    hl = all(recent_lows[i] > recent_lows[i-1] for i in range(1, len(recent_lows)))
+    lh = all(recent_highs[i] < recent_highs[i-1] for i in range(1, len(recent_highs)))
+    ll = all(recent_lows[i] < recent_lows[i-1] for i in range(1, len(recent_lows)))
+
+    if hh and hl:
+        direction, strength, pattern = 'STRONG_BULLISH', 85, 'HH_HL'
+    elif hh or hl:
+        direction, strength, pattern = 'BULLISH', 65, 'HH' if hh else 'HL'
+    elif lh and ll:
+        direction, strength, pattern = 'STRONG_BEARISH', 85, 'LH_LL'
+    elif lh or ll:
+        direction, strength, pattern = 'BEARISH', 65, 'LH' if lh else 'LL'
+    else:
+        direction, strength, pattern = 'NEUTRAL', 50, 'RANGING'
+
+    return {'direction': direction, 'strength': strength, 'pattern': pattern, 'method': 'structure'}
+
+
+def reference_order_blocks(df: pd.DataFrame, lookback: int) -> list:
+    """MarketAnalyzer._identify_order_blocks before vectorization"""
+    order_blocks = []
+
+    for i in range(lookback, len(df)):
+        displacement_size = abs(df.iloc[i]['close'] - df.iloc[i]['open'])
+        avg_candle_size = df.iloc[i-20:i]['close'].sub(df.iloc[i-20:i]['open']).abs().mean()
+
+        if df.iloc[i]['close'] > df.iloc[i]['open'] and displacement_size > 2 * avg_candle_size:
+            for j in range(i-1, max(0, i-5), -1):
+                if df.iloc[j]['close'] < df.iloc[j]['open']:
+                    order_blocks.append({
+                        'type': 'BULLISH',
+                        'upper': df.iloc[j]['high'],
+                        'lower': df.iloc[j]['low'],
+                        'index': j,
+                        'strength': displacement_size / avg_candle_size
+                    })
+                    break
+
+        elif df.iloc[i]['close'] < df.iloc[i]['open'] and displacement_size > 2 * avg_candle_size:
+            for j in range(i-1, max(0, i-5), -1):
+                if df.iloc[j]['close'] > df.iloc[j]['open']:
+                    order_blocks.append({
+                        'type': 'BEARISH',
+                        'upper': df.iloc[j]['high'],
+                        'lower': df.iloc[j]['low'],
+                        'index': j,
+                        'strength': displacement_size / avg_candle_size
+                    })
+                    break
+
+    return order_blocks[-10:]
+
+
+# ==================== CURRENT IMPLEMENTATION ====================
+
+def current_structure(df: pd.DataFrame) -> dict:
+    return analyze_structure(df['high'].to_numpy(), df['low'].to_numpy(), df['close'].to_numpy())
+
+
+def current_order_blocks(df: pd.DataFrame, lookback: int) -> list:
+    return find_order_blocks(df['open'].to_numpy(), df['high'].to_numpy(), df['low'].to_numpy(),
+                             df['close'].to_numpy(), lookback)
+
+
+# ==================== COMPARISON ====================
+
+def same(a, b) -> bool:
+    """Equal structure and values; floats may differ only by summation order (strength ratios)"""
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(same(a[key], b[key]) for key in a)
+    if isinstance(a, (list, tuple)) and isinstance(b, (list, tuple)):
+        return len(a) == len(b) and all(same(x, y) for x, y in zip(a, b))
+    if isinstance(a, (float, np.floating)) or isinstance(b, (float, np.floating)):
+        return bool(np.isclose(a, b, rtol=1e-9, atol=0))
+    return a == b
+
+
+def bar_files(paths: list) -> list:
+    """.npy bar files named by the arguments (files or directories), default the bar store"""
+    files = []
+    for path in paths or [Config.BAR_STORE_DIR]:
+        files.extend(sorted(glob.glob(os.path.join(path, '*.npy'))) if os.path.isdir(path) else [path])
+    return files
+
+
+def load_frame(path: str) -> pd.DataFrame:
+    bars = np.load(path, allow_pickle=False)
+    df = pd.DataFrame(bars)
+    df['time'] = pd.to_datetime(df['time'], unit='s')
+    return df
+
+
+def windows(df: pd.DataFrame):
+    """Windows of every size at evenly spaced offsets, always including the newest bars"""
+    for size in WINDOW_SIZES:
+        if size > len(df):
+            continue
+        ends = np.unique(np.linspace(size, len(df), WINDOWS_PER_SIZE).astype(int))
+        for end in ends:
+            yield df.iloc[end - size:end].reset_index(drop=True)
+
+
+def check_frame(df: pd.DataFrame, analyzer: MarketAnalyzer, trend_analyzer: EnhancedTrendAnalyzer) -> list:
+    """Names of the checks whose output differs on this window"""
+    failures = []
+    structure = current_structure(df)
+
+    if not same(reference_structure(df), structure):
+        failures.append('structure')
+    if not same(reference_liquidity_zones(df), analyzer._identify_liquidity_zones(df, structure)):
+        failures.append('liquidity_zones')
+    if not same(reference_structure_trend(df), trend_analyzer._structure_trend(df)):
+        failures.append('structure_trend')
+    for lookback in OB_LOOKBACKS:
+        if not same(reference_order_blocks(df, lookback), current_order_blocks(df, lookback)):
+            failures.append(f'order_blocks[{lookback}]')
+    return failures
+
+
+def run_checks(files: list) -> bool:
+    analyzer = MarketAnalyzer(None, Config)
+    trend_analyzer = EnhancedTrendAnalyzer()
+    total = failed = 0
+
+    for path in files:
+        df = load_frame(path)
+        for window in windows(df):
+            total += 1
+            failures = check_frame(window, analyzer, trend_analyzer)
+            if failures:
+                failed += 1
+                print(f"MISMATCH {os.path.basename(path)} [{window['time'].iloc[0]} .. "
+                      f"{window['time'].iloc[-1]}]: {', '.join(failures)}")
+        print(f"{os.path.basename(path)}: {len(df)} bars checked")
+
+    print(f"{total - failed}/{total} windows identical")
+    return failed == 0
+
+
+# ==================== BENCHMARK ====================
+
+def bench_frame(files: list, size: int):
+    """Newest `size` bars of the longest stored file, else simulated M15 bars"""
+    frames = [load_frame(path) for path in files]
+    frames = [df for df in frames if len(df) >= size]
+    if frames:
+        return frames[0].iloc[-size:].reset_index(drop=True), 'recorded'
+
+    from src.mt5.simulator import SimulatedTerminal
+    terminal = SimulatedTerminal(data_dir=None, history_days=size // 96 + 2, seed=0)
+    terminal.initialize()
+    bars = terminal.copy_rates_from_pos('EURUSD', 15, 0, size)
+    df = pd.DataFrame(bars)
+    df['time'] = pd.to_datetime(df['time'], unit='s')
+    return df, 'simulated'
+
+
+def best_ms(function, repeat: int = 3) -> float:
+    return min(timeit.repeat(function, number=1, repeat=repeat)) * 1000
+
+
+def run_bench(files: list):
+    print(f"{'bars':>6} {'source':>10} {'check':>14} {'before':>12} {'after':>10}")
+    for size in BENCH_SIZES:
+        df, source = bench_frame(files, size)
+        rows = [
+            ('structure', lambda: reference_structure(df), lambda: current_structure(df)),
+            ('order_blocks', lambda: reference_order_blocks(df, Config.OB_LOOKBACK),
+             lambda: current_order_blocks(df, Config.OB_LOOKBACK)),
+        ]
+        for name, before, after in rows:
+            print(f"{size:>6} {source:>10} {name:>14} {best_ms(before):>9.1f} ms {best_ms(after):>7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('paths', nargs='*', help=f"bar files or directories (default {Config.BAR_STORE_DIR})")
+    parser.add_argument('--bench', action='store_true', help="also time both versions on 500 and 5,000 bars")
+    args = parser.parse_args()
+
+    files = bar_files(args.paths)
+    if not files:
+        print("No stored bar files found - run the bot with BAR_STORE_ENABLED or pass .npy files")
+        ok = True
+    else:
+        ok = run_checks(files)
+
+    if args.bench:
+        run_bench(files)
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -8,6 +8,17 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
+def _resample_base_bars(timeframes: dict, bar_counts: dict, base_timeframe: str, margin: float) -> int:
+    """Base bars that cover the deepest history any resampled timeframe is analyzed over"""
+    base = int(base_timeframe)
+    needed = max(
+        bar_counts[name] * int(tf) // base
+        for name, tf in timeframes.items()
+        if tf.isdigit() and base <= int(tf) < 1440
+    )
+    return int(needed * margin)
+
+
 class Config:
     """Bot configuration"""
     
@@ -16,6 +27,52 @@ class Config:
     MT5_PASSWORD = os.getenv('MT5_PASSWORD', '')
     MT5_SERVER = os.getenv('MT5_SERVER', 'Exness-MT5Trial9')
     MT5_TIMEOUT = int(os.getenv('MT5_TIMEOUT', '60000'))
+    MT5_CALL_TIMEOUT = 30  # Seconds before a single terminal request through the gateway is abandoned
+    MT5_BACKEND = os.getenv('MT5_BACKEND', 'terminal')  # 'terminal' (MetaTrader5 module) or 'simulator'
+    
+    # Multi-user order fan-out
+    EXECUTION_CONCURRENCY = int(os.getenv('EXECUTION_CONCURRENCY', '8'))  # Accounts executed at once
+    EXECUTION_ACCOUNT_DEADLINE = 20  # Seconds an account's order may take once it holds its terminal
+    BALANCE_MAX_AGE = 60  # Seconds a balance read before the signal may size it (accounts without a logged-in worker)
+    
+    # Per-account terminal worker processes for multi-user execution
+    # Off by default: user trades then log the bot's own terminal into each account and shut it down
+    ACCOUNT_WORKERS_ENABLED = os.getenv('ACCOUNT_WORKERS_ENABLED', 'false').lower() == 'true'
+    MT5_TERMINAL_PATHS = [p for p in os.getenv('MT5_TERMINAL_PATHS', '').split(',') if p]  # One terminal64.exe per worker
+    ACCOUNT_WORKERS_MAX = int(os.getenv('ACCOUNT_WORKERS_MAX', '4'))  # Workers for the simulator backend (real terminals need one path each)
+    ACCOUNT_WORKER_HEALTH_INTERVAL = 60  # Seconds between session health checks
+    
+    # Simulated terminal (MT5_BACKEND=simulator)
+    SIM_DATA_DIR = os.getenv('SIM_DATA_DIR', 'data/sim')  # {symbol}_{minutes}.npy bar files to replay
+    SIM_START = os.getenv('SIM_START', '')  # 'YYYY-MM-DD HH:MM' UTC clock start (default: now)
+    SIM_SPEED = float(os.getenv('SIM_SPEED', '1.0'))  # Simulated seconds per wall-clock second
+    SIM_SEED = int(os.getenv('SIM_SEED', '0'))
+    SIM_BALANCE = 10000.0  # Starting balance of every simulated account
+    SIM_LATENCY_MS = float(os.getenv('SIM_LATENCY_MS', '0'))  # Base delay of each terminal call
+    SIM_LATENCY_JITTER_MS = float(os.getenv('SIM_LATENCY_JITTER_MS', '0'))
+    SIM_LOGIN_LATENCY_MS = float(os.getenv('SIM_LOGIN_LATENCY_MS', '0'))
+    SIM_SLIPPAGE_POINTS = float(os.getenv('SIM_SLIPPAGE_POINTS', '0'))  # Max adverse slippage of market fills
+    SIM_REJECT_RATE = float(os.getenv('SIM_REJECT_RATE', '0'))  # Fraction of orders rejected
+    
+    # Local bar store (delta fetching of OHLCV history)
+    BAR_STORE_ENABLED = os.getenv('BAR_STORE_ENABLED', 'true').lower() == 'true'
+    BAR_STORE_DIR = 'data/bars'
+    BAR_STORE_MAX_BARS = 2000  # Bars kept per (symbol, timeframe)
+    SYMBOL_SPECS_FILE = 'data/symbol_specs.json'  # Persisted contract specs from the terminal
+    
+    # Local resampling: intraday timeframes built from one base timeframe (one terminal request per symbol)
+    RESAMPLE_ENABLED = os.getenv('RESAMPLE_ENABLED', 'false').lower() == 'true'
+    RESAMPLE_BASE_TIMEFRAME = '5'
+    RESAMPLE_BARS_MARGIN = 1.3  # Extra base bars for partial bars at session breaks and the dropped first bar
+    # RESAMPLE_BASE_BARS is derived from TIMEFRAMES and ANALYSIS_BARS below
+    
+    # Seconds a market data result is shared with later callers (single-flight coalescing)
+    MARKET_DATA_FRESHNESS = {
+        'tick': 0.5,
+        'rates': 2.0,
+        'base_rates': 2.0,
+        'symbol_info': 5.0
+    }
     
     # Telegram Configuration
     TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN', '')
@@ -66,6 +123,17 @@ class Config:
         'LTF_PRECISION': '5'
     }
     
+    # Bars fetched per timeframe for analysis (HTF needs 200 for the EMA-200 trend)
+    ANALYSIS_BARS = {
+        'HTF': 200,
+        'MTF': 200,
+        'LTF_ENTRY': 500,
+        'LTF_PRECISION': 500
+    }
+    
+    # Base bars kept per symbol when resampling (12480 M5 bars: 200 H4 bars plus margin)
+    RESAMPLE_BASE_BARS = _resample_base_bars(TIMEFRAMES, ANALYSIS_BARS, RESAMPLE_BASE_TIMEFRAME, RESAMPLE_BARS_MARGIN)
+    
     # Kill Zones (UTC time)
     LONDON_SESSION = {'start': '08:00', 'end': '12:00'}
     NY_SESSION = {'start': '13:00', 'end': '17:00'}
@@ -103,10 +171,28 @@ class Config:
     
     # Notification Settings
     HOURLY_UPDATE_ENABLED = True
+    HOURLY_UPDATE_INTERVAL = 3600
     SIGNAL_COOLDOWN = 300
     
     # Trade Monitoring
     CHECK_TRADES_INTERVAL = 30
+    BAR_RANGE_MONITORING = True  # Also check bar highs/lows since the last poll for TP/SL touches
+    TRADE_MONITOR_TIMEFRAME = '1'  # Bars used for bar-range monitoring
+    TICK_PUMP_ENABLED = os.getenv('TICK_PUMP_ENABLED', 'true').lower() == 'true'  # Event-driven monitoring instead of the fixed poll
+    TICK_PUMP_MIN_INTERVAL = 0.5  # Seconds between polls of a symbol whose quote is moving
+    TICK_PUMP_MAX_INTERVAL = 5.0  # Poll interval a quiet symbol backs off to
+    POSITION_RECONCILE_INTERVAL = 30  # Seconds between position/order syncs of executed tickets (0 = off; needs account workers)
+    
+    # Scheduler
+    SCAN_INTERVAL = 300
+    SCAN_ON_BAR_CLOSE = os.getenv('SCAN_ON_BAR_CLOSE', 'false').lower() == 'true'
+    BAR_CLOSE_DELAY = 5  # Seconds after an aligned bar close before scanning
+    SCHEDULER_JITTER = 2.0  # Max random delay (seconds) added to each trigger
+    
+    # Market Scan
+    SCAN_CONCURRENCY = int(os.getenv('SCAN_CONCURRENCY', '8'))  # Symbols analyzed at once
+    SCAN_SYMBOL_TIMEOUT = 30  # Seconds before a single symbol's analysis is abandoned
+    ANALYSIS_WORKERS = int(os.getenv('ANALYSIS_WORKERS', '0'))  # Process-pool workers for SMC analysis (0 = in-process)
     
     @classmethod
     def validate(cls):
@@ -126,7 +212,7 @@ class Config:
     
     @classmethod
     def get_symbol_info(cls, symbol):
-        """Get symbol-specific information for Exness"""
+        """Get symbol-specific information for Exness (fallback when terminal specs are unavailable)"""
         symbol_configs = {
             'XAUUSDm': {
                 'point_value': 0.01,
@@ -5,8 +5,10 @@ Improved accuracy using multiple indicators and confirmations
 
 import pandas as pd
 import numpy as np
-from typing import Dict, Tuple
+from typing import Dict, Tuple, Union
 from src.utils.logger import setup_logger
+from src.core.smc_primitives import find_swing_points
+from src.core.feature_frame import FeatureFrame
 
 logger = setup_logger(__name__)
 
@@ -17,9 +19,11 @@ class EnhancedTrendAnalyzer:
     def __init__(self):
         pass
     
-    def identify_trend(self, df: pd.DataFrame) -> Dict:
+    def identify_trend(self, data: Union[pd.DataFrame, FeatureFrame]) -> Dict:
         """
         Identify trend using multiple methods for accuracy
+        Accepts a raw frame or a shared FeatureFrame; when the FeatureFrame carries an
+        IndicatorStore snapshot, EMA and ADX values are read from it instead of recomputed.
         Returns: {
             'trend': 'STRONG_BULLISH'/'BULLISH'/'NEUTRAL'/'BEARISH'/'STRONG_BEARISH',
             'trend_strength': 0-100,
@@ -29,20 +33,23 @@ class EnhancedTrendAnalyzer:
         }
         """
         try:
+            features = FeatureFrame.wrap(data)
+            df = features.df
+            
             if len(df) < 200:
                 return self._get_neutral_trend()
             
             # Method 1: EMA alignment
-            ema_trend = self._ema_trend(df)
+            ema_trend = self._ema_trend(features)
             
             # Method 2: Higher highs / Lower lows
             structure_trend = self._structure_trend(df)
             
             # Method 3: ADX (Trend Strength)
-            adx_data = self._calculate_adx(df)
+            adx_data = self._calculate_adx(features)
             
             # Method 4: Moving Average Slope
-            ma_slope = self._ma_slope_trend(df)
+            ma_slope = self._ma_slope_trend(features)
             
             # Method 5: Price Action Trend
             price_action = self._price_action_trend(df)
@@ -66,20 +73,22 @@ class EnhancedTrendAnalyzer:
             logger.error(f"Error in trend identification: {e}")
             return self._get_neutral_trend()
     
-    def _ema_trend(self, df: pd.DataFrame) -> Dict:
+    def _ema_trend(self, features: FeatureFrame) -> Dict:
         """Trend based on EMA alignment"""
         try:
-            # Calculate EMAs
-            df['ema_20'] = df['close'].ewm(span=20, adjust=False).mean()
-            df['ema_50'] = df['close'].ewm(span=50, adjust=False).mean()
-            df['ema_100'] = df['close'].ewm(span=100, adjust=False).mean()
-            df['ema_200'] = df['close'].ewm(span=200, adjust=False).mean()
-            
-            current_price = df.iloc[-1]['close']
-            ema_20 = df.iloc[-1]['ema_20']
-            ema_50 = df.iloc[-1]['ema_50']
-            ema_100 = df.iloc[-1]['ema_100']
-            ema_200 = df.iloc[-1]['ema_200']
+            indicators = features.indicators
+            if indicators:
+                current_price = indicators['close']
+                ema_20 = indicators['ema_20']
+                ema_50 = indicators['ema_50']
+                ema_100 = indicators['ema_100']
+                ema_200 = indicators['ema_200']
+            else:
+                current_price = features.df['close'].iloc[-1]
+                ema_20 = features.ema(20).iloc[-1]
+                ema_50 = features.ema(50).iloc[-1]
+                ema_100 = features.ema(100).iloc[-1]
+                ema_200 = features.ema(200).iloc[-1]
             
             # Count bullish alignments
             bullish_score = 0
@@ -125,26 +134,13 @@ class EnhancedTrendAnalyzer:
         try:
             # Look back 50 candles
             lookback = min(50, len(df))
-            recent_data = df.iloc[-lookback:]
+            high_prices = df['high'].to_numpy()[-lookback:]
+            low_prices = df['low'].to_numpy()[-lookback:]
             
             # Find swing highs and lows
-            highs = []
-            lows = []
-            
-            for i in range(2, len(recent_data) - 2):
-                # Swing high
-                if (recent_data.iloc[i]['high'] > recent_data.iloc[i-1]['high'] and
-                    recent_data.iloc[i]['high'] > recent_data.iloc[i-2]['high'] and
-                    recent_data.iloc[i]['high'] > recent_data.iloc[i+1]['high'] and
-                    recent_data.iloc[i]['high'] > recent_data.iloc[i+2]['high']):
-                    highs.append(recent_data.iloc[i]['high'])
-                
-                # Swing low
-                if (recent_data.iloc[i]['low'] < recent_data.iloc[i-1]['low'] and
-                    recent_data.iloc[i]['low'] < recent_data.iloc[i-2]['low'] and
-                    recent_data.iloc[i]['low'] < recent_data.iloc[i+1]['low'] and
-                    recent_data.iloc[i]['low'] < recent_data.iloc[i+2]['low']):
-                    lows.append(recent_data.iloc[i]['low'])
+            high_idx, low_idx = find_swing_points(high_prices, low_prices)
+            highs = high_prices[high_idx].tolist()
+            lows = low_prices[low_idx].tolist()
             
             if len(highs) < 2 or len(lows) < 2:
                 return {'direction': 'NEUTRAL', 'strength': 50, 'pattern': 'insufficient_data', 'method': 'structure'}
@@ -192,34 +188,19 @@ class EnhancedTrendAnalyzer:
             logger.error(f"Error in structure trend: {e}")
             return {'direction': 'NEUTRAL', 'strength': 50, 'pattern': 'error', 'method': 'structure'}
     
-    def _calculate_adx(self, df: pd.DataFrame, period: int = 14) -> Dict:
+    def _calculate_adx(self, features: FeatureFrame, period: int = 14) -> Dict:
         """Calculate ADX for trend strength"""
         try:
-            # Calculate True Range
-            df['high_low'] = df['high'] - df['low']
-            df['high_close'] = np.abs(df['high'] - df['close'].shift())
-            df['low_close'] = np.abs(df['low'] - df['close'].shift())
-            df['tr'] = df[['high_low', 'high_close', 'low_close']].max(axis=1)
-            
-            # Calculate Directional Movement
-            df['up_move'] = df['high'] - df['high'].shift()
-            df['down_move'] = df['low'].shift() - df['low']
-            
-            df['plus_dm'] = np.where((df['up_move'] > df['down_move']) & (df['up_move'] > 0), df['up_move'], 0)
-            df['minus_dm'] = np.where((df['down_move'] > df['up_move']) & (df['down_move'] > 0), df['down_move'], 0)
-            
-            # Smooth the values
-            df['atr'] = df['tr'].rolling(window=period).mean()
-            df['plus_di'] = 100 * (df['plus_dm'].rolling(window=period).mean() / df['atr'])
-            df['minus_di'] = 100 * (df['minus_dm'].rolling(window=period).mean() / df['atr'])
-            
-            # Calculate ADX
-            df['dx'] = 100 * np.abs(df['plus_di'] - df['minus_di']) / (df['plus_di'] + df['minus_di'])
-            df['adx'] = df['dx'].rolling(window=period).mean()
-            
-            adx_value = df.iloc[-1]['adx']
-            plus_di = df.iloc[-1]['plus_di']
-            minus_di = df.iloc[-1]['minus_di']
+            indicators = features.indicators
+            if indicators and indicators['period'] == period:
+                adx_value = indicators['adx']
+                plus_di = indicators['plus_di']
+                minus_di = indicators['minus_di']
+            else:
+                adx_frame = features.adx(period)
+                adx_value = adx_frame['adx'].iloc[-1]
+                plus_di = adx_frame['plus_di'].iloc[-1]
+                minus_di = adx_frame['minus_di'].iloc[-1]
             
             # Determine trend
             if adx_value > 25:
@@ -245,13 +226,13 @@ class EnhancedTrendAnalyzer:
             logger.error(f"Error calculating ADX: {e}")
             return {'direction': 'NEUTRAL', 'strength': 50, 'adx': 0, 'method': 'adx'}
     
-    def _ma_slope_trend(self, df: pd.DataFrame) -> Dict:
+    def _ma_slope_trend(self, features: FeatureFrame) -> Dict:
         """Trend based on moving average slope"""
         try:
-            df['ma_50'] = df['close'].rolling(window=50).mean()
+            df = features.df
             
             # Calculate slope
-            recent_ma = df['ma_50'].iloc[-10:].values
+            recent_ma = features.sma(50).iloc[-10:].values
             if len(recent_ma) < 10:
                 return {'direction': 'NEUTRAL', 'strength': 50, 'slope': 0, 'method': 'ma_slope'}
             
@@ -0,0 +1,148 @@
+"""
+Feature Frame - Shared derived series for one OHLCV frame
+Computes each indicator series lazily, at most once, without touching the source data
+"""
+
+from typing import Callable, Dict, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+
+
+class FeatureFrame:
+    """Read-only OHLCV frame with lazily computed, memoized derived series"""
+
+    def __init__(self, df: pd.DataFrame, indicators: Optional[Dict] = None):
+        self.df = df
+        self.indicators = indicators  # IndicatorStore snapshot for the same frame, if any
+        self._cache: Dict[Tuple, object] = {}
+
+    @classmethod
+    def wrap(cls, data: Union[pd.DataFrame, 'FeatureFrame']) -> 'FeatureFrame':
+        """Return `data` unchanged if it is already a FeatureFrame, else wrap it"""
+        return data if isinstance(data, FeatureFrame) else cls(data)
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def _cached(self, key: Tuple, compute: Callable):
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    def values(self, column: str) -> np.ndarray:
+        """Raw column as a NumPy array"""
+        return self._cached(('values', column), lambda: self.df[column].to_numpy())
+
+    def ema(self, span: int) -> pd.Series:
+        """Exponential moving average of close (adjust=False)"""
+        return self._cached(
+            ('ema', span),
+            lambda: self.df['close'].ewm(span=span, adjust=False).mean()
+        )
+
+    def sma(self, window: int, column: str = 'close') -> pd.Series:
+        """Simple moving average"""
+        return self._cached(
+            ('sma', window, column),
+            lambda: self.df[column].rolling(window=window).mean()
+        )
+
+    def returns(self) -> pd.Series:
+        """Close-to-close percentage returns (first bar dropped)"""
+        return self._cached(('returns',), lambda: self.df['close'].pct_change().dropna())
+
+    def true_range(self) -> pd.Series:
+        """True range: max of high-low, |high-prev close|, |low-prev close|"""
+        def compute():
+            prev_close = self.df['close'].shift()
+            ranges = pd.concat([
+                self.df['high'] - self.df['low'],
+                (self.df['high'] - prev_close).abs(),
+                (self.df['low'] - prev_close).abs()
+            ], axis=1)
+            return ranges.max(axis=1)
+
+        return self._cached(('true_range',), compute)
+
+    def atr(self, period: int = 14) -> pd.Series:
+        """Rolling mean of true range"""
+        return self._cached(
+            ('atr', period),
+            lambda: self.true_range().rolling(window=period).mean()
+        )
+
+    def adx(self, period: int = 14) -> pd.DataFrame:
+        """+DI, -DI, DX and ADX series"""
+        def compute():
+            up_move = self.df['high'] - self.df['high'].shift()
+            down_move = self.df['low'].shift() - self.df['low']
+
+            plus_dm = pd.Series(
+                np.where((up_move > down_move) & (up_move > 0), up_move, 0),
+                index=self.df.index
+            )
+            minus_dm = pd.Series(
+                np.where((down_move > up_move) & (down_move > 0), down_move, 0),
+                index=self.df.index
+            )
+
+            atr = self.atr(period)
+            plus_di = 100 * (plus_dm.rolling(window=period).mean() / atr)
+            minus_di = 100 * (minus_dm.rolling(window=period).mean() / atr)
+            dx = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
+
+            return pd.DataFrame({
+                'plus_di': plus_di,
+                'minus_di': minus_di,
+                'dx': dx,
+                'adx': dx.rolling(window=period).mean()
+            })
+
+        return self._cached(('adx', period), compute)
+
+    def trend_dm_sums(self, period: int = 14) -> pd.DataFrame:
+        """Rolling sums of directional movement as used for trend strength"""
+        def compute():
+            high_diff = self.df['high'].diff()
+            low_diff = self.df['low'].diff().abs()
+            return pd.DataFrame({
+                'plus_dm': high_diff.where(high_diff > low_diff, 0).rolling(period).sum(),
+                'minus_dm': low_diff.where(low_diff > high_diff, 0).rolling(period).sum()
+            })
+
+        return self._cached(('trend_dm_sums', period), compute)
+
+
+class FeatureCache:
+    """One FeatureFrame per (symbol, timeframe), reused while the last bar is unchanged"""
+
+    def __init__(self):
+        self._frames: Dict[Tuple[str, str], Tuple[tuple, FeatureFrame]] = {}
+
+    @staticmethod
+    def _signature(df: pd.DataFrame) -> tuple:
+        """Last bar time plus its OHLCV values, so a still-forming bar that moved is not reused"""
+        last = df.iloc[-1]
+        return (len(df), last['time'], last['open'], last['high'], last['low'],
+                last['close'], last.get('tick_volume'))
+
+    def get(self, symbol: str, timeframe: str, df: pd.DataFrame,
+            indicators: Optional[Dict] = None) -> FeatureFrame:
+        """FeatureFrame for this frame, built at most once per (symbol, timeframe, last bar)"""
+        key = (symbol, timeframe)
+        signature = self._signature(df)
+        cached = self._frames.get(key)
+
+        if cached and cached[0] == signature:
+            features = cached[1]
+            if indicators is not None:
+                features.indicators = indicators
+            return features
+
+        features = FeatureFrame(df, indicators)
+        self._frames[key] = (signature, features)
+        return features
+
+    def clear(self):
+        """Drop all cached frames"""
+        self._frames.clear()
@@ -0,0 +1,205 @@
+"""
+Streaming Indicator Store
+Keeps recursive EMA/ATR/RSI/ADX state per (symbol, timeframe) and advances it bar by bar
+"""
+
+from collections import deque
+from typing import Dict, Optional, Tuple
+import numpy as np
+import pandas as pd
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+EMA_SPANS = (20, 50, 100, 200)
+
+
+def _div(numerator: float, denominator: float) -> float:
+    """Divide with pandas semantics (x/0 -> inf, 0/0 -> nan)"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return float(np.float64(numerator) / np.float64(denominator))
+
+
+class _RollingWindow:
+    """Fixed-length window over the most recent values"""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.values = deque(maxlen=period)
+
+    def push(self, value: float):
+        self.values.append(value)
+
+    def _with(self, value: float) -> list:
+        """Window contents if `value` were appended next"""
+        values = list(self.values)
+        if len(values) == self.period:
+            values = values[1:]
+        values.append(value)
+        return values
+
+    def sum_with(self, value: float) -> float:
+        """Rolling sum including `value` (NaN until the window is full)"""
+        values = self._with(value)
+        return sum(values) if len(values) == self.period else float('nan')
+
+    def mean_with(self, value: float) -> float:
+        """Rolling mean including `value` (NaN until the window is full)"""
+        return self.sum_with(value) / self.period
+
+
+class StreamingIndicators:
+    """Recursive indicator state for one (symbol, timeframe) series"""
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.last_time = None
+        self.bars = 0
+        self._prev = None  # (high, low, close) of the last committed bar
+        self._emas = {span: None for span in EMA_SPANS}
+
+        self._tr = _RollingWindow(period)
+        self._gain = _RollingWindow(period)
+        self._loss = _RollingWindow(period)
+        self._trend_plus = _RollingWindow(period)
+        self._trend_minus = _RollingWindow(period)
+        self._adx_plus = _RollingWindow(period)
+        self._adx_minus = _RollingWindow(period)
+        self._dx = _RollingWindow(period)
+
+    def _step(self, high: float, low: float, close: float) -> Tuple[Dict, Dict]:
+        """Compute per-bar inputs and indicator values for a bar following the committed state"""
+        if self._prev is None:
+            true_range = high - low
+            gain = loss = 0.0
+            trend_plus = trend_minus = 0.0
+            plus_dm = minus_dm = 0.0
+        else:
+            prev_high, prev_low, prev_close = self._prev
+            true_range = max(high - low, abs(high - prev_close), abs(low - prev_close))
+
+            delta = close - prev_close
+            gain = delta if delta > 0 else 0.0
+            loss = -delta if delta < 0 else 0.0
+
+            # Directional movement as used by MarketAnalyzer._calculate_trend_strength
+            high_diff = high - prev_high
+            low_diff = abs(low - prev_low)
+            trend_plus = high_diff if high_diff > low_diff else 0.0
+            trend_minus = low_diff if low_diff > high_diff else 0.0
+
+            # Directional movement as used by EnhancedTrendAnalyzer._calculate_adx
+            up_move = high - prev_high
+            down_move = prev_low - low
+            plus_dm = up_move if (up_move > down_move and up_move > 0) else 0.0
+            minus_dm = down_move if (down_move > up_move and down_move > 0) else 0.0
+
+        atr = self._tr.mean_with(true_range)
+        plus_di = 100 * _div(self._adx_plus.mean_with(plus_dm), atr)
+        minus_di = 100 * _div(self._adx_minus.mean_with(minus_dm), atr)
+        dx = 100 * _div(abs(plus_di - minus_di), plus_di + minus_di)
+
+        emas = {}
+        for span, ema in self._emas.items():
+            alpha = 2 / (span + 1)
+            emas[span] = close if ema is None else (1 - alpha) * ema + alpha * close
+
+        inputs = {
+            'tr': true_range, 'gain': gain, 'loss': loss,
+            'trend_plus': trend_plus, 'trend_minus': trend_minus,
+            'plus_dm': plus_dm, 'minus_dm': minus_dm, 'dx': dx,
+            'emas': emas
+        }
+
+        values = {
+            'close': close,
+            'atr': atr,
+            'rsi': 100 - 100 / (1 + _div(self._gain.mean_with(gain), self._loss.mean_with(loss))),
+            'trend_plus_dm': self._trend_plus.sum_with(trend_plus),
+            'trend_minus_dm': self._trend_minus.sum_with(trend_minus),
+            'plus_di': plus_di,
+            'minus_di': minus_di,
+            'adx': self._dx.mean_with(dx)
+        }
+        for span, ema in emas.items():
+            values[f'ema_{span}'] = ema
+
+        return inputs, values
+
+    def push(self, time, high: float, low: float, close: float):
+        """Commit a closed bar - O(1)"""
+        inputs, _ = self._step(high, low, close)
+
+        self._tr.push(inputs['tr'])
+        self._gain.push(inputs['gain'])
+        self._loss.push(inputs['loss'])
+        self._trend_plus.push(inputs['trend_plus'])
+        self._trend_minus.push(inputs['trend_minus'])
+        self._adx_plus.push(inputs['plus_dm'])
+        self._adx_minus.push(inputs['minus_dm'])
+        self._dx.push(inputs['dx'])
+        self._emas = inputs['emas']
+
+        self._prev = (high, low, close)
+        self.last_time = time
+        self.bars += 1
+
+    def snapshot(self, high: float, low: float, close: float) -> Dict:
+        """Indicator values with the still-forming bar applied, without committing it"""
+        _, values = self._step(high, low, close)
+        values['period'] = self.period
+        values['bars'] = self.bars + 1
+        return values
+
+
+class IndicatorStore:
+    """Incremental indicator state keyed by (symbol, timeframe)"""
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self._states: Dict[Tuple[str, str], StreamingIndicators] = {}
+
+    def update(self, symbol: str, timeframe: str, df: pd.DataFrame) -> Optional[Dict]:
+        """
+        Advance the (symbol, timeframe) state with newly closed bars and return latest values
+        The last row of `df` is treated as the forming bar: it is applied to the
+        snapshot but only committed once a newer bar appears.
+        Seeds from the full frame on first use or when the history no longer overlaps.
+        """
+        try:
+            if df is None or len(df) < 2:
+                return None
+
+            key = (symbol, timeframe)
+            times = df['time'].to_numpy()
+            highs = df['high'].to_numpy(dtype=float)
+            lows = df['low'].to_numpy(dtype=float)
+            closes = df['close'].to_numpy(dtype=float)
+
+            state = self._states.get(key)
+            if (state is None or state.last_time is None or
+                    times[0] > state.last_time or state.last_time >= times[-1]):
+                state = StreamingIndicators(self.period)
+                self._states[key] = state
+                start = 0
+            else:
+                start = int(np.searchsorted(times, state.last_time, side='right'))
+
+            # Commit closed bars only (everything except the forming bar)
+            for i in range(start, len(times) - 1):
+                state.push(times[i], highs[i], lows[i], closes[i])
+
+            return state.snapshot(highs[-1], lows[-1], closes[-1])
+
+        except Exception as e:
+            logger.error(f"Error updating indicators for {symbol} {timeframe}: {e}")
+            self._states.pop((symbol, timeframe), None)
+            return None
+
+    def reset(self, symbol: Optional[str] = None):
+        """Drop stored state for one symbol or for all symbols"""
+        if symbol is None:
+            self._states.clear()
+        else:
+            for key in [k for k in self._states if k[0] == symbol]:
+                del self._states[key]
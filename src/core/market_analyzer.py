@@ -3,16 +3,34 @@ Market Analysis Engine - SMC Strategy Implementation
 Implements Smart Money Concepts from the trading document
 """
 
-import pandas as pd
+import asyncio
 import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, time
-from typing import Dict, Optional, List, Tuple
+from typing import Dict, Optional, List, Tuple, Union
 from src.utils.logger import setup_logger
 from src.core.fundamental_analyzer import FundamentalAnalyzer
 from src.core.enhanced_trend_analyzer import EnhancedTrendAnalyzer
+from src.core.smc_primitives import (analyze_structure, find_fvgs, find_order_blocks, find_swing_points,
+                                     update_fvgs, update_order_blocks)
+from src.core.indicator_store import IndicatorStore
+from src.core.feature_frame import FeatureFrame, FeatureCache
 
 logger = setup_logger(__name__)
 
+# Analyzer used inside process-pool workers (one per worker process)
+_worker_analyzer = None
+
+
+def _analyze_timeframes_in_worker(frames: Dict[str, pd.DataFrame]) -> Dict[str, Dict]:
+    """Process-pool entry point: closed-bar analysis of shipped bar frames"""
+    global _worker_analyzer
+    if _worker_analyzer is None:
+        from src.config.settings import Config
+        _worker_analyzer = MarketAnalyzer(None, Config)
+    return _worker_analyzer._closed_bar_states(frames)
+
 
 class MarketAnalyzer:
     """Analyzes market using SMC principles"""
@@ -22,15 +40,25 @@ class MarketAnalyzer:
         self.config = config
         self.fundamental_analyzer = FundamentalAnalyzer(config)
         self.trend_analyzer = EnhancedTrendAnalyzer()  
+        self.indicators = IndicatorStore()
+        self.features = FeatureCache()
+        
+        # Closed-bar analysis per timeframe (swing points, LTF gaps and order blocks), reused
+        # until a new bar closes: {(symbol, TIMEFRAMES name): (closed_bar_key, state)}
+        self._closed_bar_cache = {}
+        
+        # Optional process pool for the CPU-bound SMC work (0 workers = in-process)
+        self.analysis_workers = getattr(config, 'ANALYSIS_WORKERS', 0)
+        self._pool = None
         
     async def analyze(self, symbol: str) -> Dict:
         """Complete market analysis for a symbol"""
         try:
             # Get multi-timeframe data
-            htf_data = await self.mt5.get_rates(symbol, self.config.TIMEFRAMES['HTF'], 200)
-            mtf_data = await self.mt5.get_rates(symbol, self.config.TIMEFRAMES['MTF'], 200)
-            ltf_data = await self.mt5.get_rates(symbol, self.config.TIMEFRAMES['LTF_ENTRY'], 500)
-            m1_data = await self.mt5.get_rates(symbol, self.config.TIMEFRAMES['LTF_PRECISION'], 500)
+            htf_data = await self.mt5.get_rates(symbol, self.config.TIMEFRAMES['HTF'], self.config.ANALYSIS_BARS['HTF'])
+            mtf_data = await self.mt5.get_rates(symbol, self.config.TIMEFRAMES['MTF'], self.config.ANALYSIS_BARS['MTF'])
+            ltf_data = await self.mt5.get_rates(symbol, self.config.TIMEFRAMES['LTF_ENTRY'], self.config.ANALYSIS_BARS['LTF_ENTRY'])
+            m1_data = await self.mt5.get_rates(symbol, self.config.TIMEFRAMES['LTF_PRECISION'], self.config.ANALYSIS_BARS['LTF_PRECISION'])
             
             if any(df is None for df in [htf_data, mtf_data, ltf_data, m1_data]):
                 return {}
@@ -42,35 +70,52 @@ class MarketAnalyzer:
             if not tick or not symbol_info:
                 return {}
             
+            # Streaming indicator state (only newly closed bars are processed)
+            htf_indicators = self.indicators.update(symbol, self.config.TIMEFRAMES['HTF'], htf_data)
+            ltf_indicators = self.indicators.update(symbol, self.config.TIMEFRAMES['LTF_ENTRY'], ltf_data)
+            
+            # Shared derived series - computed once and read by both analyzers
+            htf_features = self.features.get(symbol, self.config.TIMEFRAMES['HTF'], htf_data, htf_indicators)
+            ltf_features = self.features.get(symbol, self.config.TIMEFRAMES['LTF_ENTRY'], ltf_data, ltf_indicators)
+            
+            # Structure, trend, FVG and order block analysis - in the process pool if enabled
+            timeframe_analysis = await self._analyze_timeframes_async(symbol, {
+                'HTF': htf_data,
+                'MTF': mtf_data,
+                'LTF_ENTRY': ltf_data
+            }, htf_features)
+            
             # HTF Analysis - Directional Bias WITH ENHANCED TREND DETECTION
-            htf_structure = self._analyze_structure(htf_data)
-            enhanced_trend_analysis = self.trend_analyzer.identify_trend(htf_data)  
+            htf_analysis = timeframe_analysis['HTF']
+            htf_structure = htf_analysis['structure']
+            enhanced_trend_analysis = htf_analysis['trend']
             htf_trend = enhanced_trend_analysis['trend']  # Use enhanced trend
-            liquidity_levels = self._identify_liquidity_zones(htf_data)
+            liquidity_levels = htf_analysis['liquidity_levels']
             
             # NEW: Fundamental Analysis
             fundamental_analysis = await self.fundamental_analyzer.analyze(symbol, {
                 'current_price': tick['bid'],
-                'volatility': self._calculate_volatility(ltf_data),
+                'volatility': self._calculate_volatility(ltf_features),
                 'bias': 'NEUTRAL'  # Will be updated below
             })
             
             # MTF Analysis - Intermediate confirmation
-            mtf_structure = self._analyze_structure(mtf_data)
+            mtf_structure = timeframe_analysis['MTF']
             
             # LTF Analysis - Entry setup
-            ltf_structure = self._analyze_structure(ltf_data)
-            fvgs = self._identify_fvg(ltf_data)
-            order_blocks = self._identify_order_blocks(ltf_data)
+            ltf_analysis = timeframe_analysis['LTF_ENTRY']
+            ltf_structure = ltf_analysis['structure']
+            fvgs = ltf_analysis['fvgs']
+            order_blocks = ltf_analysis['order_blocks']
             
             # M1 Precision Analysis
             m1_displacement = self._check_displacement(m1_data)
             liquidity_sweep = self._check_liquidity_sweep(m1_data, liquidity_levels)
             
             # Calculate technical indicators
-            volatility = self._calculate_volatility(ltf_data)
-            atr = self._calculate_atr(ltf_data)
-            rsi = self._calculate_rsi(ltf_data)
+            volatility = self._calculate_volatility(ltf_features)
+            atr = self._calculate_atr(ltf_features)
+            rsi = self._calculate_rsi(ltf_features)
             volume_profile = self._analyze_volume(ltf_data)
             
             # Market state
@@ -110,7 +155,7 @@ class MarketAnalyzer:
                 'bias': self._determine_bias_with_fundamentals(
                     htf_trend, htf_structure, liquidity_levels, fundamental_analysis  # UPDATED
                     ),
-                'in_kill_zone': self._check_kill_zone(),
+                'in_kill_zone': self.in_kill_zone(),
                 
                  # NEW: Fundamental Analysis
                  'fundamental_analysis': fundamental_analysis,
@@ -120,7 +165,7 @@ class MarketAnalyzer:
                  'session': fundamental_analysis['session_impact'],
                 
                 # Additional metrics
-                'trend_strength': self._calculate_trend_strength(htf_data),
+                'trend_strength': htf_analysis['trend_strength'],
                 'volume_ratio': self._calculate_volume_ratio(ltf_data)
             }
             
@@ -130,66 +175,189 @@ class MarketAnalyzer:
             logger.error(f"Error analyzing {symbol}: {e}", exc_info=True)
             return {}
     
-    def _analyze_structure(self, df: pd.DataFrame) -> Dict:
-        """Analyze market structure for BOS and ChoCH"""
+    async def snapshot(self, symbol: str) -> Dict:
+        """
+        Lightweight market state for symbols skipped by the scan pre-gates
+        Fetches only the tick, HTF bars and LTF bars (for volatility, as in analyze());
+        the HTF analysis is shared with analyze()
+        """
         try:
-            highs = []
-            lows = []
-            
-            # Identify swing highs and lows
-            for i in range(2, len(df) - 2):
-                # Swing high
-                if (df.iloc[i]['high'] > df.iloc[i-1]['high'] and 
-                    df.iloc[i]['high'] > df.iloc[i-2]['high'] and
-                    df.iloc[i]['high'] > df.iloc[i+1]['high'] and 
-                    df.iloc[i]['high'] > df.iloc[i+2]['high']):
-                    highs.append({'price': df.iloc[i]['high'], 'index': i})
-                
-                # Swing low
-                if (df.iloc[i]['low'] < df.iloc[i-1]['low'] and 
-                    df.iloc[i]['low'] < df.iloc[i-2]['low'] and
-                    df.iloc[i]['low'] < df.iloc[i+1]['low'] and 
-                    df.iloc[i]['low'] < df.iloc[i+2]['low']):
-                    lows.append({'price': df.iloc[i]['low'], 'index': i})
-            
-            # Determine BOS
-            bos_detected = False
-            bos_direction = None
-            
-            if len(highs) >= 2 and len(lows) >= 2:
-                # Bullish BOS
-                if df.iloc[-1]['close'] > highs[-2]['price']:
-                    bos_detected = True
-                    bos_direction = 'BULLISH'
-                
-                # Bearish BOS
-                elif df.iloc[-1]['close'] < lows[-2]['price']:
-                    bos_detected = True
-                    bos_direction = 'BEARISH'
+            htf_data = await self.mt5.get_rates(symbol, self.config.TIMEFRAMES['HTF'], self.config.ANALYSIS_BARS['HTF'])
+            ltf_data = await self.mt5.get_rates(symbol, self.config.TIMEFRAMES['LTF_ENTRY'], self.config.ANALYSIS_BARS['LTF_ENTRY'])
+            tick = await self.mt5.get_tick(symbol)
+            
+            if htf_data is None or ltf_data is None or not tick:
+                return {}
+            
+            htf_indicators = self.indicators.update(symbol, self.config.TIMEFRAMES['HTF'], htf_data)
+            htf_features = self.features.get(symbol, self.config.TIMEFRAMES['HTF'], htf_data, htf_indicators)
+            ltf_indicators = self.indicators.update(symbol, self.config.TIMEFRAMES['LTF_ENTRY'], ltf_data)
+            ltf_features = self.features.get(symbol, self.config.TIMEFRAMES['LTF_ENTRY'], ltf_data, ltf_indicators)
+            
+            htf_analysis = (await self._analyze_timeframes_async(symbol, {'HTF': htf_data}, htf_features))['HTF']
+            htf_structure = htf_analysis['structure']
+            htf_trend = htf_analysis['trend']['trend']
+            liquidity_levels = htf_analysis['liquidity_levels']
+            volatility = self._calculate_volatility(ltf_features)
             
+            fundamental_analysis = await self.fundamental_analyzer.analyze(symbol, {
+                'current_price': tick['bid'],
+                'volatility': volatility,
+                'bias': 'NEUTRAL'
+            })
+            
+            return {
+                'symbol': symbol,
+                'timestamp': datetime.now(),
+                'current_price': tick['bid'],
+                'htf_trend': htf_trend,
+                'htf_structure': htf_structure,
+                'liquidity_levels': liquidity_levels,
+                'trend_strength': htf_analysis['trend_strength'],
+                'volatility': volatility,
+                'bias': self._determine_bias_with_fundamentals(
+                    htf_trend, htf_structure, liquidity_levels, fundamental_analysis
+                ),
+                'in_kill_zone': self.in_kill_zone(),
+                'is_snapshot': True
+            }
+            
+        except Exception as e:
+            logger.error(f"Error taking snapshot of {symbol}: {e}", exc_info=True)
+            return {}
+    
+    @staticmethod
+    def _closed_bar_key(df: pd.DataFrame) -> tuple:
+        """Bar count and last closed bar time - changes only when a bar closes"""
+        return (len(df), df['time'].iloc[-2] if len(df) > 1 else None)
+    
+    async def _analyze_timeframes_async(self, symbol: str, frames: Dict[str, pd.DataFrame],
+                                        htf_features: Optional[FeatureFrame] = None) -> Dict[str, Dict]:
+        """
+        HTF/MTF/LTF analysis keyed by TIMEFRAMES name
+        The closed-bar part is computed only for timeframes where a bar closed since the last call
+        (in the process pool when ANALYSIS_WORKERS > 0); the parts that read the forming bar -
+        its swing, BOS, FVG mitigation, order block displacement, EMA/ADX trend - run every call.
+        """
+        states = {}
+        pending = {}
+        for name, df in frames.items():
+            cached = self._closed_bar_cache.get((symbol, name))
+            if cached is not None and cached[0] == self._closed_bar_key(df):
+                states[name] = cached[1]
+            else:
+                pending[name] = df
+        
+        if pending:
+            computed = await self._run_in_pool(pending)
+            if computed is None:
+                computed = self._closed_bar_states(pending)
+            
+            for name, state in computed.items():
+                self._closed_bar_cache[(symbol, name)] = (self._closed_bar_key(pending[name]), state)
+            states.update(computed)
+        
+        return {
+            name: self._finish_timeframe(name, df, states[name], htf_features)
+            for name, df in frames.items()
+        }
+    
+    def _closed_bar_states(self, frames: Dict[str, pd.DataFrame]) -> Dict[str, Dict]:
+        """
+        Analysis of every frame's closed bars (all but the last row) - pure, safe to run in a worker
+        LTF gaps and order blocks are kept in full so the forming bar can be applied to them later
+        """
+        states = {}
+        for name, df in frames.items():
+            closed = df.iloc[:-1]
+            highs = closed['high'].to_numpy()
+            lows = closed['low'].to_numpy()
+            state = {'swings': find_swing_points(highs, lows)}
+            
+            if name == 'LTF_ENTRY':
+                opens = closed['open'].to_numpy()
+                closes = closed['close'].to_numpy()
+                state['fvgs'] = find_fvgs(highs, lows, closes, self.config.FVG_MIN_SIZE, limit=None)
+                state['order_blocks'] = find_order_blocks(opens, highs, lows, closes,
+                                                          self.config.OB_LOOKBACK, limit=None)
+            states[name] = state
+        return states
+    
+    def _finish_timeframe(self, name: str, df: pd.DataFrame, state: Dict,
+                          htf_features: Optional[FeatureFrame] = None) -> Dict:
+        """A timeframe's analysis from its closed-bar state plus the forming bar"""
+        structure = self._analyze_structure(df, state['swings'])
+        
+        if name == 'HTF':
+            features = htf_features or FeatureFrame(df)
             return {
-                'swing_highs': highs[-5:] if len(highs) > 5 else highs,
-                'swing_lows': lows[-5:] if len(lows) > 5 else lows,
-                'bos_detected': bos_detected,
-                'bos_direction': bos_direction
+                'structure': structure,
+                'trend': self.trend_analyzer.identify_trend(features),
+                'liquidity_levels': self._identify_liquidity_zones(df, structure),
+                'trend_strength': self._calculate_trend_strength(features)
             }
+        
+        if name == 'LTF_ENTRY':
+            return {
+                'structure': structure,
+                'fvgs': self._identify_fvg(df, state['fvgs']),
+                'order_blocks': self._identify_order_blocks(df, state['order_blocks'])
+            }
+        
+        return structure
+    
+    async def _run_in_pool(self, frames: Dict[str, pd.DataFrame]) -> Optional[Dict[str, Dict]]:
+        """Run closed-bar analysis in the process pool; None means fall back to in-process"""
+        if self.analysis_workers <= 0:
+            return None
+        
+        try:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.analysis_workers)
+                logger.info(f"Analysis process pool started with {self.analysis_workers} workers")
+            
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._pool, _analyze_timeframes_in_worker, frames)
+            
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Broken or unavailable pool - analyze in-process and rebuild the pool next time
+            logger.error(f"Analysis pool failed, falling back to in-process analysis: {e}")
+            self.close()
+            return None
+    
+    def close(self):
+        """Shut down the analysis process pool, if one was started"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+    
+    def _analyze_structure(self, df: pd.DataFrame,
+                           closed_swings: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> Dict:
+        """Analyze market structure for BOS and ChoCH"""
+        try:
+            return analyze_structure(
+                df['high'].to_numpy(),
+                df['low'].to_numpy(),
+                df['close'].to_numpy(),
+                closed_swings
+            )
             
         except Exception as e:
             logger.error(f"Error analyzing structure: {e}")
             return {}
     
-    def _identify_trend(self, df: pd.DataFrame) -> str:
+    def _identify_trend(self, data: Union[pd.DataFrame, FeatureFrame]) -> str:
         """Identify overall trend using EMAs"""
         try:
-            # Calculate EMAs
-            df['ema_20'] = df['close'].ewm(span=20, adjust=False).mean()
-            df['ema_50'] = df['close'].ewm(span=50, adjust=False).mean()
-            df['ema_200'] = df['close'].ewm(span=200, adjust=False).mean()
+            features = FeatureFrame.wrap(data)
             
-            current_price = df.iloc[-1]['close']
-            ema_20 = df.iloc[-1]['ema_20']
-            ema_50 = df.iloc[-1]['ema_50']
-            ema_200 = df.iloc[-1]['ema_200']
+            # EMAs (shared, never written back to the frame)
+            current_price = features.df['close'].iloc[-1]
+            ema_20 = features.ema(20).iloc[-1]
+            ema_50 = features.ema(50).iloc[-1]
+            ema_200 = features.ema(200).iloc[-1]
             
             # Strong uptrend
             if (current_price > ema_20 > ema_50 > ema_200):
@@ -210,7 +378,7 @@ class MarketAnalyzer:
             logger.error(f"Error identifying trend: {e}")
             return 'NEUTRAL'
     
-    def _identify_liquidity_zones(self, df: pd.DataFrame) -> List[Dict]:
+    def _identify_liquidity_zones(self, df: pd.DataFrame, structure: Optional[Dict] = None) -> List[Dict]:
         """Identify key liquidity zones (PDH/PDL, session highs/lows)"""
         try:
             liquidity_zones = []
@@ -232,8 +400,9 @@ class MarketAnalyzer:
                     'strength': 'HIGH'
                 })
             
-            # Recent swing highs/lows
-            structure = self._analyze_structure(df)
+            # Recent swing highs/lows (reuse the caller's structure when available)
+            if structure is None:
+                structure = self._analyze_structure(df)
             
             if structure.get('swing_highs'):
                 for high in structure['swing_highs'][-3:]:
@@ -257,102 +426,49 @@ class MarketAnalyzer:
             logger.error(f"Error identifying liquidity zones: {e}")
             return []
     
-    def _identify_fvg(self, df: pd.DataFrame) -> List[Dict]:
-        """Identify Fair Value Gaps"""
+    def _identify_fvg(self, df: pd.DataFrame, closed_fvgs: Optional[List[Dict]] = None) -> List[Dict]:
+        """Identify unmitigated Fair Value Gaps (from the closed bars' open gaps when given)"""
         try:
-            fvgs = []
-            
-            for i in range(2, len(df)):
-                # Bullish FVG
-                if df.iloc[i]['low'] > df.iloc[i-2]['high']:
-                    gap_size = df.iloc[i]['low'] - df.iloc[i-2]['high']
-                    
-                    if gap_size >= self.config.FVG_MIN_SIZE * df.iloc[i]['close'] * 0.0001:
-                        fvgs.append({
-                            'type': 'BULLISH',
-                            'upper': df.iloc[i]['low'],
-                            'lower': df.iloc[i-2]['high'],
-                            'size': gap_size,
-                            'index': i,
-                            'mitigated': False
-                        })
-                
-                # Bearish FVG
-                elif df.iloc[i]['high'] < df.iloc[i-2]['low']:
-                    gap_size = df.iloc[i-2]['low'] - df.iloc[i]['high']
-                    
-                    if gap_size >= self.config.FVG_MIN_SIZE * df.iloc[i]['close'] * 0.0001:
-                        fvgs.append({
-                            'type': 'BEARISH',
-                            'upper': df.iloc[i-2]['low'],
-                            'lower': df.iloc[i]['high'],
-                            'size': gap_size,
-                            'index': i,
-                            'mitigated': False
-                        })
-            
-            # Check if FVGs have been mitigated
-            for fvg in fvgs:
-                for j in range(fvg['index'] + 1, len(df)):
-                    if fvg['type'] == 'BULLISH':
-                        if df.iloc[j]['low'] <= fvg['upper']:
-                            fvg['mitigated'] = True
-                            break
-                    else:
-                        if df.iloc[j]['high'] >= fvg['lower']:
-                            fvg['mitigated'] = True
-                            break
-            
-            # Return only unmitigated FVGs
-            return [fvg for fvg in fvgs if not fvg['mitigated']][-5:]
+            if closed_fvgs is not None:
+                return update_fvgs(
+                    closed_fvgs,
+                    df['high'].to_numpy(),
+                    df['low'].to_numpy(),
+                    df['close'].to_numpy(),
+                    self.config.FVG_MIN_SIZE
+                )
+            
+            return find_fvgs(
+                df['high'].to_numpy(),
+                df['low'].to_numpy(),
+                df['close'].to_numpy(),
+                self.config.FVG_MIN_SIZE
+            )
             
         except Exception as e:
             logger.error(f"Error identifying FVGs: {e}")
             return []
     
-    def _identify_order_blocks(self, df: pd.DataFrame) -> List[Dict]:
-        """Identify Order Blocks"""
+    def _identify_order_blocks(self, df: pd.DataFrame, closed_blocks: Optional[List[Dict]] = None) -> List[Dict]:
+        """Identify Order Blocks (from the closed bars' order blocks when given)"""
         try:
-            order_blocks = []
-            
-            for i in range(self.config.OB_LOOKBACK, len(df)):
-                # Look for displacement
-                displacement_size = abs(df.iloc[i]['close'] - df.iloc[i]['open'])
-                avg_candle_size = df.iloc[i-20:i]['close'].sub(df.iloc[i-20:i]['open']).abs().mean()
-                
-                # Bullish Order Block
-                if (df.iloc[i]['close'] > df.iloc[i]['open'] and 
-                    displacement_size > 2 * avg_candle_size):
-                    
-                    # Last bearish candle before displacement
-                    for j in range(i-1, max(0, i-5), -1):
-                        if df.iloc[j]['close'] < df.iloc[j]['open']:
-                            order_blocks.append({
-                                'type': 'BULLISH',
-                                'upper': df.iloc[j]['high'],
-                                'lower': df.iloc[j]['low'],
-                                'index': j,
-                                'strength': displacement_size / avg_candle_size
-                            })
-                            break
-                
-                # Bearish Order Block
-                elif (df.iloc[i]['close'] < df.iloc[i]['open'] and 
-                      displacement_size > 2 * avg_candle_size):
-                    
-                    # Last bullish candle before displacement
-                    for j in range(i-1, max(0, i-5), -1):
-                        if df.iloc[j]['close'] > df.iloc[j]['open']:
-                            order_blocks.append({
-                                'type': 'BEARISH',
-                                'upper': df.iloc[j]['high'],
-                                'lower': df.iloc[j]['low'],
-                                'index': j,
-                                'strength': displacement_size / avg_candle_size
-                            })
-                            break
-            
-            return order_blocks[-10:]
+            if closed_blocks is not None:
+                return update_order_blocks(
+                    closed_blocks,
+                    df['open'].to_numpy(),
+                    df['high'].to_numpy(),
+                    df['low'].to_numpy(),
+                    df['close'].to_numpy(),
+                    self.config.OB_LOOKBACK
+                )
+            
+            return find_order_blocks(
+                df['open'].to_numpy(),
+                df['high'].to_numpy(),
+                df['low'].to_numpy(),
+                df['close'].to_numpy(),
+                self.config.OB_LOOKBACK
+            )
             
         except Exception as e:
             logger.error(f"Error identifying order blocks: {e}")
@@ -421,13 +537,14 @@ class MarketAnalyzer:
             logger.error(f"Error checking liquidity sweep: {e}")
             return {'detected': False}
     
-    def _calculate_volatility(self, df: pd.DataFrame) -> str:
+    def _calculate_volatility(self, data: Union[pd.DataFrame, FeatureFrame]) -> str:
         """Calculate current volatility state"""
         try:
-            if len(df) < 20:
+            features = FeatureFrame.wrap(data)
+            if len(features) < 20:
                 return 'MEDIUM'
             
-            returns = df['close'].pct_change().dropna()
+            returns = features.returns()
             current_vol = returns.iloc[-20:].std()
             avg_vol = returns.std()
             
@@ -442,27 +559,29 @@ class MarketAnalyzer:
             logger.error(f"Error calculating volatility: {e}")
             return 'MEDIUM'
     
-    def _calculate_atr(self, df: pd.DataFrame, period: int = 14) -> float:
+    def _calculate_atr(self, data: Union[pd.DataFrame, FeatureFrame], period: int = 14) -> float:
         """Calculate Average True Range"""
         try:
-            high_low = df['high'] - df['low']
-            high_close = np.abs(df['high'] - df['close'].shift())
-            low_close = np.abs(df['low'] - df['close'].shift())
+            features = FeatureFrame.wrap(data)
+            indicators = features.indicators
+            if indicators and indicators['period'] == period:
+                return float(indicators['atr'])
             
-            ranges = pd.concat([high_low, high_close, low_close], axis=1)
-            true_range = np.max(ranges, axis=1)
-            
-            atr = true_range.rolling(period).mean().iloc[-1]
-            return float(atr)
+            return float(features.atr(period).iloc[-1])
             
         except Exception as e:
             logger.error(f"Error calculating ATR: {e}")
             return 0.0
     
-    def _calculate_rsi(self, df: pd.DataFrame, period: int = 14) -> float:
+    def _calculate_rsi(self, data: Union[pd.DataFrame, FeatureFrame], period: int = 14) -> float:
         """Calculate RSI"""
         try:
-            delta = df['close'].diff()
+            features = FeatureFrame.wrap(data)
+            indicators = features.indicators
+            if indicators and indicators['period'] == period:
+                return float(indicators['rsi'])
+            
+            delta = features.df['close'].diff()
             gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
             loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
             
@@ -544,7 +663,7 @@ class MarketAnalyzer:
             return 'NEUTRAL'
         
     
-    def _check_kill_zone(self) -> bool:
+    def in_kill_zone(self) -> bool:
         """Check if current time is in kill zone"""
         try:
             current_time = datetime.utcnow().time()
@@ -561,24 +680,28 @@ class MarketAnalyzer:
             logger.error(f"Error checking kill zone: {e}")
             return False
     
-    def _calculate_trend_strength(self, df: pd.DataFrame) -> float:
+    def _calculate_trend_strength(self, data: Union[pd.DataFrame, FeatureFrame]) -> float:
         """Calculate trend strength (0-100)"""
         try:
-            if len(df) < 50:
+            features = FeatureFrame.wrap(data)
+            if len(features) < 50:
                 return 50.0
             
             # Use ADX-like calculation
-            df['high_diff'] = df['high'].diff()
-            df['low_diff'] = df['low'].diff().abs()
-            
-            plus_dm = df['high_diff'].where(df['high_diff'] > df['low_diff'], 0).rolling(14).sum()
-            minus_dm = df['low_diff'].where(df['low_diff'] > df['high_diff'], 0).rolling(14).sum()
+            indicators = features.indicators
+            if indicators and indicators['period'] == 14:
+                plus_dm_sum = indicators['trend_plus_dm']
+                minus_dm_sum = indicators['trend_minus_dm']
+            else:
+                dm_sums = features.trend_dm_sums(14)
+                plus_dm_sum = dm_sums['plus_dm'].iloc[-1]
+                minus_dm_sum = dm_sums['minus_dm'].iloc[-1]
             
-            atr = self._calculate_atr(df, 14)
+            atr = self._calculate_atr(features, 14)
             
             if atr > 0:
-                plus_di = 100 * (plus_dm.iloc[-1] / atr)
-                minus_di = 100 * (minus_dm.iloc[-1] / atr)
+                plus_di = 100 * (plus_dm_sum / atr)
+                minus_di = 100 * (minus_dm_sum / atr)
                 
                 dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di) if (plus_di + minus_di) > 0 else 0
                 
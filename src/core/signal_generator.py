@@ -7,16 +7,28 @@ Enhanced Signal Generation System with:
 - Accurate win rate tracking
 """
 
+import asyncio
+import time
 from datetime import datetime, timedelta
 from typing import Dict, Optional, List
 import numpy as np
+import pandas as pd
 import hashlib
 import csv
 import os
 from src.utils.logger import setup_logger
+from src.core.trigger_index import TriggerIndex, ABOVE, BELOW
 
 logger = setup_logger(__name__)
 
+# Price side and crossing direction that reach each pending entry type
+ENTRY_TRIGGERS = {
+    'BUY_LIMIT': ('ask', BELOW),
+    'BUY_STOP': ('ask', ABOVE),
+    'SELL_LIMIT': ('bid', ABOVE),
+    'SELL_STOP': ('bid', BELOW)
+}
+
 
 class SignalGenerator:
     """Enhanced signal generator with full trade lifecycle management"""
@@ -25,10 +37,20 @@ class SignalGenerator:
         self.analyzer = market_analyzer
         self.ml_engine = ml_engine
         self.config = config
+        self.news_service = None  # Attached by the bot when news monitoring is enabled
         self.last_signal_time = {}
         
         # Signal tracking to prevent duplicates
         self.active_signals = {}  # {signal_hash: signal_data}
+        self.triggers = TriggerIndex()  # TP/SL/entry levels of active signals
+        self._last_checked_ticks = {}  # {symbol: (tick time, bid, ask)} of the last evaluation
+        
+        # Bar-range monitoring: {symbol: (newest bar time, monotonic check time)} of the last check,
+        # and the earliest bar open that may trigger each signal (the bar after the one forming
+        # when it was created; signals whose bar could not be read are anchored at their first check)
+        self._bar_cursors = {}
+        self._signal_anchors = {}  # {signal_id: earliest monitor bar open time}
+        self._unanchored = {}  # {symbol: [signal_id]}
         self.signal_history = set()  # Set of signal hashes
         
         # CSV file paths
@@ -173,6 +195,8 @@ class SignalGenerator:
             # Add to active signals tracking
             self.active_signals[signal_hash] = signal
             self.signal_history.add(signal_hash)
+            self._index_signal(signal_hash, signal)
+            await self._anchor_signal(signal_hash, symbol)
             
             # Save to CSV immediately
             self._save_signal_to_csv(signal)
@@ -312,87 +336,265 @@ class SignalGenerator:
         """Check all active signals for TP/SL hits and return notifications"""
         notifications = []
         
-        for signal_id, signal in list(self.active_signals.items()):
-            try:
-                # Get current price
-                tick = await self.analyzer.mt5.get_tick(signal['symbol'])
-                
-                if not tick:
-                    continue
-                
-                current_price = tick['bid'] if signal['direction'] == 'SELL' else tick['ask']
-                
-                # Check for TP/SL hit
-                outcome = None
-                exit_price = current_price
-                reason = ""
-                
-                if signal['direction'] == 'BUY':
-                    # Check TP hit
-                    if current_price >= signal['take_profit']:
-                        outcome = 'WIN'
-                        exit_price = signal['take_profit']
-                        pips = signal['tp_pips']
-                        reason = self._generate_tp_reason(signal, 'BUY')
-                    
-                    # Check SL hit
-                    elif current_price <= signal['stop_loss']:
-                        outcome = 'LOSS'
-                        exit_price = signal['stop_loss']
-                        pips = -signal['sl_pips']
-                        reason = self._generate_sl_reason(signal, 'BUY')
-                
-                else:  # SELL
-                    # Check TP hit
-                    if current_price <= signal['take_profit']:
-                        outcome = 'WIN'
-                        exit_price = signal['take_profit']
-                        pips = signal['tp_pips']
-                        reason = self._generate_tp_reason(signal, 'SELL')
-                    
-                    # Check SL hit
-                    elif current_price >= signal['stop_loss']:
-                        outcome = 'LOSS'
-                        exit_price = signal['stop_loss']
-                        pips = -signal['sl_pips']
-                        reason = self._generate_sl_reason(signal, 'SELL')
-                
-                # If trade closed, create notification
-                if outcome:
-                    duration = self._calculate_duration(signal['timestamp'], datetime.now())
-                    
-                    notification = {
-                        'signal_id': signal_id,
-                        'symbol': signal['symbol'],
-                        'direction': signal['direction'],
-                        'outcome': outcome,
-                        'pips': pips,
-                        'duration': duration,
-                        'reason': reason,
-                        'entry_price': signal['entry_price'],
-                        'exit_price': exit_price,
-                        'setup_type': signal['setup_type']
-                    }
-                    
+        # One tick per symbol with registered triggers, shared by all of that symbol's signals
+        symbols = self.triggers.symbols()
+        ticks = await asyncio.gather(
+            *(self.analyzer.mt5.get_tick(symbol) for symbol in symbols),
+            return_exceptions=True
+        )
+        
+        # Forget symbols that no longer have active signals
+        for symbol in [s for s in self._last_checked_ticks if s not in symbols]:
+            del self._last_checked_ticks[symbol]
+        for symbol in [s for s in self._bar_cursors if s not in symbols]:
+            del self._bar_cursors[symbol]
+        
+        for symbol, tick in zip(symbols, ticks):
+            if not tick or isinstance(tick, Exception):
+                continue
+            notifications.extend(await self.check_symbol(symbol, tick))
+        
+        return notifications
+    
+    async def check_symbol(self, symbol: str, tick: Dict) -> List[Dict]:
+        """Check one symbol's active signals against a new tick and return notifications"""
+        notifications = []
+        
+        # Skip symbols whose quote has not changed since the last check
+        tick_key = (tick['time'], tick['bid'], tick['ask'])
+        if self._last_checked_ticks.get(symbol) == tick_key:
+            return notifications
+        self._last_checked_ticks[symbol] = tick_key
+        
+        # Only the triggers this quote crossed are visited
+        crossed = self.triggers.crossed(symbol, tick['bid'], tick['ask'])
+        
+        # Plus anything the bars since the last check traded through (wicks between polls)
+        bars = await self._bars_since_last_check(symbol) if self.config.BAR_RANGE_MONITORING else None
+        spread = tick['ask'] - tick['bid']
+        if bars is not None and len(bars) > 0:
+            low, high = bars['low'].min(), bars['high'].max()
+            crossed += self.triggers.crossed_range(symbol, low, high, low + spread, high + spread)
+        
+        hits = {}
+        for signal_id, kind in crossed:
+            hits.setdefault(signal_id, set()).add(kind)
+        
+        for signal_id, kinds in hits.items():
+            signal = self.active_signals.get(signal_id)
+            if signal is None:
+                self._unindex_signal(signal_id)
+                continue
+            
+            # Range hits only count for bars that opened after the signal was created
+            if 'ENTRY' in kinds and self._entry_reached(signal_id, signal, tick, bars, spread):
+                self._mark_entry_triggered(signal_id, signal)
+            
+            hit = None
+            if 'TP' in kinds or 'SL' in kinds:
+                hit = self._resolve_first_hit(signal_id, signal, tick, bars, spread)
+            if hit:
+                notification = await self._close_signal(signal_id, signal, hit)
+                if notification:
                     notifications.append(notification)
-                    
-                    # Update CSV files
-                    self._update_signal_in_csv(signal_id, outcome, pips, duration, reason)
-                    self._save_closed_trade_to_csv(signal, exit_price, outcome, pips, reason)
-                    
-                    # Remove from active signals
-                    del self.active_signals[signal_id]
-                    
-                    # Store in ML engine
-                    await self.ml_engine.update_signal_outcome(signal_id, outcome, pips)
-                    
-                    logger.info(f"TRADE CLOSED: {signal['symbol']} {outcome} {pips:.1f} pips in {duration}")
-                
-            except Exception as e:
-                logger.error(f"Error checking signal {signal_id}: {e}")
+        
+        # Forget the symbol once its last signal has closed
+        if symbol not in self.triggers.symbols():
+            self._last_checked_ticks.pop(symbol, None)
+            self._bar_cursors.pop(symbol, None)
         
         return notifications
     
+    async def _bars_since_last_check(self, symbol: str):
+        """Monitor-timeframe bars (bid prices) from the newest bar seen at the last check onwards"""
+        try:
+            cursor = self._bar_cursors.get(symbol)
+            now = time.monotonic()
+            
+            # Bars that can have opened since the last check, plus the one that was forming
+            bar_seconds = int(self.config.TRADE_MONITOR_TIMEFRAME) * 60
+            count = int((now - cursor[1]) // bar_seconds) + 2 if cursor else 1
+            
+            bars = await self.analyzer.mt5.get_rates(
+                symbol, self.config.TRADE_MONITOR_TIMEFRAME, min(count, 500)
+            )
+            if bars is None or len(bars) == 0:
+                return None
+            
+            newest = bars['time'].iloc[-1]
+            self._bar_cursors[symbol] = (newest, now)
+            
+            # Signals whose creation bar was not read start after the bar forming now
+            for signal_id in self._unanchored.pop(symbol, []):
+                if signal_id in self.active_signals:
+                    self._signal_anchors[signal_id] = newest + pd.Timedelta(seconds=bar_seconds)
+            
+            if cursor:
+                bars = bars[bars['time'] >= cursor[0]]
+            return bars
+            
+        except Exception as e:
+            logger.error(f"Error getting monitor bars for {symbol}: {e}")
+            return None
+    
+    async def _anchor_signal(self, signal_id: str, symbol: str):
+        """
+        Judge a new signal's bar ranges only from the monitor bar after the one forming now
+        Read from the bar times themselves, so no clock offset between bot and server is involved
+        """
+        if not self.config.BAR_RANGE_MONITORING:
+            return
+        
+        try:
+            bars = await self.analyzer.mt5.get_rates(symbol, self.config.TRADE_MONITOR_TIMEFRAME, 1)
+            if bars is None or len(bars) == 0:
+                return
+            
+            bar_seconds = int(self.config.TRADE_MONITOR_TIMEFRAME) * 60
+            self._signal_anchors[signal_id] = bars['time'].iloc[-1] + pd.Timedelta(seconds=bar_seconds)
+            self._unanchored[symbol].remove(signal_id)
+            if not self._unanchored[symbol]:
+                del self._unanchored[symbol]
+            
+        except Exception as e:
+            logger.error(f"Error anchoring signal {signal_id} to the {symbol} bars: {e}")
+    
+    def _signal_bars(self, signal_id: str, bars):
+        """The monitor bars that opened after the signal was created (None if it is not anchored yet)"""
+        anchor = self._signal_anchors.get(signal_id)
+        if bars is None or anchor is None:
+            return None
+        return bars[bars['time'] >= anchor]
+    
+    def _entry_reached(self, signal_id: str, signal: Dict, tick: Dict, bars, spread: float) -> bool:
+        """Whether the current quote or a bar since the signal's creation reached its entry level"""
+        price_side, direction = ENTRY_TRIGGERS[signal['entry_type']]
+        level = signal['entry_price']
+        
+        quote = tick[price_side]
+        if (quote >= level) if direction == ABOVE else (quote <= level):
+            return True
+        
+        signal_bars = self._signal_bars(signal_id, bars)
+        if signal_bars is None or len(signal_bars) == 0:
+            return False
+        offset = spread if price_side == 'ask' else 0.0
+        if direction == ABOVE:
+            return signal_bars['high'].max() + offset >= level
+        return signal_bars['low'].min() + offset <= level
+    
+    def _resolve_first_hit(self, signal_id: str, signal: Dict, tick: Dict,
+                           bars, spread: float) -> Optional[str]:
+        """
+        Which of TP/SL price reached first: bars are walked in time order, and a bar that
+        touches both levels counts as SL (its intrabar path is unknown); the current
+        quote decides if no bar touched either level, TP first as before
+        """
+        buy = signal['direction'] == 'BUY'
+        tp, sl = signal['take_profit'], signal['stop_loss']
+        
+        signal_bars = self._signal_bars(signal_id, bars)
+        if signal_bars is not None:
+            offset = spread if buy else 0.0  # BUY signals are monitored on the ask
+            for low, high in signal_bars[['low', 'high']].itertuples(index=False):
+                low, high = low + offset, high + offset
+                tp_touched = high >= tp if buy else low <= tp
+                sl_touched = low <= sl if buy else high >= sl
+                if sl_touched:
+                    return 'SL'
+                if tp_touched:
+                    return 'TP'
+        
+        price = tick['ask'] if buy else tick['bid']
+        if (price >= tp) if buy else (price <= tp):
+            return 'TP'
+        if (price <= sl) if buy else (price >= sl):
+            return 'SL'
+        return None
+    
+    def _index_signal(self, signal_id: str, signal: Dict):
+        """
+        Register a signal's TP, SL and pending-entry levels in the trigger index
+        BUY signals are monitored on the ask and SELL signals on the bid
+        """
+        symbol = signal['symbol']
+        if signal['direction'] == 'BUY':
+            self.triggers.add((signal_id, 'TP'), symbol, 'ask', ABOVE, signal['take_profit'])
+            self.triggers.add((signal_id, 'SL'), symbol, 'ask', BELOW, signal['stop_loss'])
+        else:
+            self.triggers.add((signal_id, 'TP'), symbol, 'bid', BELOW, signal['take_profit'])
+            self.triggers.add((signal_id, 'SL'), symbol, 'bid', ABOVE, signal['stop_loss'])
+        
+        if signal['entry_type'] in ENTRY_TRIGGERS:
+            price_side, direction = ENTRY_TRIGGERS[signal['entry_type']]
+            self.triggers.add((signal_id, 'ENTRY'), symbol, price_side, direction, signal['entry_price'])
+        
+        # Evaluate the symbol on the next check even if its quote has not moved
+        self._last_checked_ticks.pop(symbol, None)
+        self._unanchored.setdefault(symbol, []).append(signal_id)
+    
+    def _unindex_signal(self, signal_id: str):
+        """Remove all of a signal's triggers"""
+        for kind in ('TP', 'SL', 'ENTRY'):
+            self.triggers.remove((signal_id, kind))
+        self._signal_anchors.pop(signal_id, None)
+    
+    def _mark_entry_triggered(self, signal_id: str, signal: Dict):
+        """Record that price reached a pending signal's entry level"""
+        self.triggers.remove((signal_id, 'ENTRY'))
+        signal['entry_triggered_at'] = datetime.now()
+        logger.info(f"Entry level reached: {signal['symbol']} {signal['entry_type']} @ {signal['entry_price']:.5f} (ID: {signal_id})")
+    
+    async def _close_signal(self, signal_id: str, signal: Dict, hit: str) -> Optional[Dict]:
+        """Close an active signal on a TP or SL hit and return its notification"""
+        try:
+            direction = signal['direction']
+            
+            if hit == 'TP':
+                outcome = 'WIN'
+                exit_price = signal['take_profit']
+                pips = signal['tp_pips']
+                reason = self._generate_tp_reason(signal, direction)
+            else:
+                outcome = 'LOSS'
+                exit_price = signal['stop_loss']
+                pips = -signal['sl_pips']
+                reason = self._generate_sl_reason(signal, direction)
+            
+            duration = self._calculate_duration(signal['timestamp'], datetime.now())
+            
+            notification = {
+                'signal_id': signal_id,
+                'symbol': signal['symbol'],
+                'direction': direction,
+                'outcome': outcome,
+                'pips': pips,
+                'duration': duration,
+                'reason': reason,
+                'entry_price': signal['entry_price'],
+                'exit_price': exit_price,
+                'setup_type': signal['setup_type']
+            }
+            
+            # Update CSV files
+            self._update_signal_in_csv(signal_id, outcome, pips, duration, reason)
+            self._save_closed_trade_to_csv(signal, exit_price, outcome, pips, reason)
+            
+            # Remove from active signals
+            del self.active_signals[signal_id]
+            self._unindex_signal(signal_id)
+            
+            # Store in ML engine
+            await self.ml_engine.update_signal_outcome(signal_id, outcome, pips)
+            
+            logger.info(f"TRADE CLOSED: {signal['symbol']} {outcome} {pips:.1f} pips in {duration}")
+            
+            return notification
+            
+        except Exception as e:
+            logger.error(f"Error checking signal {signal_id}: {e}")
+            return None
+    
     def _generate_tp_reason(self, signal: Dict, direction: str) -> str:
         """Generate reason for TP hit"""
         reasons = []
@@ -481,6 +683,25 @@ class SignalGenerator:
             logger.error(f"Error calculating win rate: {e}")
             return {'wins': 0, 'losses': 0, 'total': 0, 'win_rate': 0, 'profit_factor': 0}
     
+    def check_pre_gates(self, symbols: List[str]) -> Dict[str, str]:
+        """
+        Cheap conditions that rule out a signal before any market data is fetched
+        Returns {symbol: reason} for every symbol that should skip full analysis
+        """
+        try:
+            # Session-wide gates are evaluated once for the whole scan
+            if self.news_service and self.news_service.is_news_blackout_period():
+                return {symbol: 'news blackout' for symbol in symbols}
+            
+            if not self.analyzer.in_kill_zone():
+                return {symbol: 'outside kill zone' for symbol in symbols}
+            
+            return {symbol: 'cooldown' for symbol in symbols if not self._check_cooldown(symbol)}
+            
+        except Exception as e:
+            logger.error(f"Error checking pre-gates: {e}")
+            return {}
+    
     # Keep all previous methods (_check_cooldown, _validate_setup, etc.)
     def _check_cooldown(self, symbol: str) -> bool:
         """Check if enough time has passed since last signal"""
@@ -615,8 +836,7 @@ class SignalGenerator:
         """Calculate entry, SL, and TP levels"""
         try:
             current_price = market_state['current_price']
-            symbol_info = self.config.get_symbol_info(market_state['symbol'])
-            point = symbol_info['point_value']
+            point = self.analyzer.mt5.symbols.pip_size(market_state['symbol'])
             
             fvgs = market_state.get('fvgs', [])
             order_blocks = market_state.get('order_blocks', [])
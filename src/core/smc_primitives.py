@@ -0,0 +1,232 @@
+"""
+SMC Primitives - Array-based building blocks for Smart Money Concepts
+Pure NumPy implementations shared by the market and trend analyzers
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import Dict, List, Optional, Tuple
+
+
+def find_swing_points(highs: np.ndarray, lows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Locate swing highs and swing lows in a single vectorized pass
+    A swing high is strictly above the two bars on either side, a swing low strictly below
+    Returns: (swing_high_indices, swing_low_indices)
+    """
+    highs = np.asarray(highs, dtype=float)
+    lows = np.asarray(lows, dtype=float)
+
+    if len(highs) < 5:
+        empty = np.empty(0, dtype=np.intp)
+        return empty, empty
+
+    center_high = highs[2:-2]
+    swing_high = (
+        (center_high > highs[1:-3]) & (center_high > highs[:-4]) &
+        (center_high > highs[3:-1]) & (center_high > highs[4:])
+    )
+
+    center_low = lows[2:-2]
+    swing_low = (
+        (center_low < lows[1:-3]) & (center_low < lows[:-4]) &
+        (center_low < lows[3:-1]) & (center_low < lows[4:])
+    )
+
+    return np.flatnonzero(swing_high) + 2, np.flatnonzero(swing_low) + 2
+
+
+def analyze_structure(highs: np.ndarray, lows: np.ndarray, closes: np.ndarray,
+                      closed_swings: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> Dict:
+    """
+    Swing points and break of structure from raw high/low/close arrays
+    `closed_swings` are the swing points of all but the last bar; only the one swing that the
+    last bar can complete is then looked for, in the final five bars
+    """
+    if closed_swings is None:
+        high_idx, low_idx = find_swing_points(highs, lows)
+    else:
+        offset = max(len(highs) - 5, 0)
+        tail_high, tail_low = find_swing_points(highs[-5:], lows[-5:])
+        high_idx = np.concatenate([closed_swings[0], tail_high + offset])
+        low_idx = np.concatenate([closed_swings[1], tail_low + offset])
+
+    # Determine BOS
+    bos_detected = False
+    bos_direction = None
+
+    if len(high_idx) >= 2 and len(low_idx) >= 2:
+        last_close = closes[-1]
+
+        # Bullish BOS
+        if last_close > highs[high_idx[-2]]:
+            bos_detected = True
+            bos_direction = 'BULLISH'
+
+        # Bearish BOS
+        elif last_close < lows[low_idx[-2]]:
+            bos_detected = True
+            bos_direction = 'BEARISH'
+
+    return {
+        'swing_highs': [{'price': highs[i], 'index': int(i)} for i in high_idx[-5:]],
+        'swing_lows': [{'price': lows[i], 'index': int(i)} for i in low_idx[-5:]],
+        'bos_detected': bos_detected,
+        'bos_direction': bos_direction
+    }
+
+
+def find_fvgs(highs: np.ndarray, lows: np.ndarray, closes: np.ndarray,
+              min_size: float, limit: Optional[int] = 5) -> List[Dict]:
+    """
+    Identify Fair Value Gaps and drop the ones price has already traded back into
+    Mitigation is resolved in one pass with reverse running min/max arrays
+    Returns the newest `limit` open gaps (all of them when None)
+    """
+    highs = np.asarray(highs, dtype=float)
+    lows = np.asarray(lows, dtype=float)
+    closes = np.asarray(closes, dtype=float)
+    n = len(highs)
+
+    if n < 3:
+        return []
+
+    # Candle i against candle i-2
+    low_now, high_now, close_now = lows[2:], highs[2:], closes[2:]
+    high_prev, low_prev = highs[:-2], lows[:-2]
+    threshold = min_size * close_now * 0.0001
+
+    bullish_gap = low_now > high_prev
+    bearish_gap = ~bullish_gap & (high_now < low_prev)
+    bullish_size = low_now - high_prev
+    bearish_size = low_prev - high_now
+
+    # Lowest low / highest high of every bar after i (inf when nothing follows)
+    future_low = np.append(np.minimum.accumulate(lows[::-1])[::-1][1:], np.inf)
+    future_high = np.append(np.maximum.accumulate(highs[::-1])[::-1][1:], -np.inf)
+
+    bullish_open = (bullish_gap & (bullish_size >= threshold) &
+                    (future_low[2:] > low_now))
+    bearish_open = (bearish_gap & (bearish_size >= threshold) &
+                    (future_high[2:] < high_now))
+
+    gaps = np.flatnonzero(bullish_open | bearish_open)
+    if limit is not None:
+        gaps = gaps[-limit:]
+
+    fvgs = []
+    for k in gaps:
+        if bullish_open[k]:
+            fvgs.append({
+                'type': 'BULLISH',
+                'upper': low_now[k],
+                'lower': high_prev[k],
+                'size': bullish_size[k],
+                'index': int(k) + 2,
+                'mitigated': False
+            })
+        else:
+            fvgs.append({
+                'type': 'BEARISH',
+                'upper': low_prev[k],
+                'lower': high_now[k],
+                'size': bearish_size[k],
+                'index': int(k) + 2,
+                'mitigated': False
+            })
+
+    return fvgs
+
+
+def update_fvgs(closed_fvgs: List[Dict], highs: np.ndarray, lows: np.ndarray, closes: np.ndarray,
+                min_size: float, limit: int = 5) -> List[Dict]:
+    """
+    find_fvgs for a frame from the open gaps of all but its last bar (`limit=None`)
+    Drops the gaps the last bar trades into and adds the gap it completes, if any
+    """
+    last = len(highs) - 1
+    fvgs = [
+        dict(fvg) for fvg in closed_fvgs
+        if (lows[-1] > fvg['upper'] if fvg['type'] == 'BULLISH' else highs[-1] < fvg['lower'])
+    ]
+
+    if last >= 2:
+        for fvg in find_fvgs(highs[-3:], lows[-3:], closes[-3:], min_size, limit=None):
+            fvgs.append(dict(fvg, index=last))
+
+    return fvgs[-limit:]
+
+
+def find_order_blocks(opens: np.ndarray, highs: np.ndarray, lows: np.ndarray,
+                      closes: np.ndarray, lookback: int, window: int = 20,
+                      max_distance: int = 4, limit: Optional[int] = 10) -> List[Dict]:
+    """
+    Identify Order Blocks: the last opposite-colored candle before a displacement
+    A displacement candle has a body larger than twice the mean body of the previous `window` bars
+    Returns the newest `limit` order blocks (all of them when None)
+    """
+    opens = np.asarray(opens, dtype=float)
+    closes = np.asarray(closes, dtype=float)
+    n = len(closes)
+    start = max(lookback, window)
+
+    if n <= start:
+        return []
+
+    body = np.abs(closes - opens)
+    bullish = closes > opens
+    bearish = closes < opens
+
+    # Mean body of bars [i-window, i) for every i >= window
+    baseline = sliding_window_view(body, window).mean(axis=1)[:-1]
+
+    # Most recent bearish / bullish candle at or before each bar (-1 if none)
+    positions = np.arange(n)
+    last_bearish = np.maximum.accumulate(np.where(bearish, positions, -1))
+    last_bullish = np.maximum.accumulate(np.where(bullish, positions, -1))
+
+    candidates = np.arange(start, n)
+    avg_body = baseline[candidates - window]
+    displaced = body[candidates] > 2 * avg_body
+    nearest = candidates - max_distance
+
+    bull_ob = last_bearish[candidates - 1]
+    bear_ob = last_bullish[candidates - 1]
+    bull_valid = bullish[candidates] & displaced & (bull_ob >= nearest)
+    bear_valid = bearish[candidates] & displaced & (bear_ob >= nearest)
+
+    displacements = np.flatnonzero(bull_valid | bear_valid)
+    if limit is not None:
+        displacements = displacements[-limit:]
+
+    order_blocks = []
+    for k in displacements:
+        j = int(bull_ob[k] if bull_valid[k] else bear_ob[k])
+        order_blocks.append({
+            'type': 'BULLISH' if bull_valid[k] else 'BEARISH',
+            'upper': highs[j],
+            'lower': lows[j],
+            'index': j,
+            'strength': body[candidates[k]] / avg_body[k]
+        })
+
+    return order_blocks
+
+
+def update_order_blocks(closed_blocks: List[Dict], opens: np.ndarray, highs: np.ndarray,
+                        lows: np.ndarray, closes: np.ndarray, lookback: int, window: int = 20,
+                        max_distance: int = 4, limit: int = 10) -> List[Dict]:
+    """
+    find_order_blocks for a frame from the order blocks of all but its last bar (`limit=None`)
+    Only the last bar is tested as a displacement, against the `window` bars before it
+    """
+    n = len(closes)
+    order_blocks = list(closed_blocks)
+
+    if n - 1 >= max(lookback, window):
+        start = n - window - 1
+        for block in find_order_blocks(opens[start:], highs[start:], lows[start:], closes[start:],
+                                       window, window, max_distance, limit=None):
+            order_blocks.append(dict(block, index=block['index'] + start))
+
+    return order_blocks[-limit:]
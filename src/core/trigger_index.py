@@ -0,0 +1,109 @@
+"""
+Trigger Index - Sorted price levels per symbol
+Finds every take-profit, stop-loss or entry level crossed by a quote with a binary search
+"""
+
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, Hashable, List, Optional, Tuple
+
+ABOVE = 'ABOVE'  # Fires when price >= level
+BELOW = 'BELOW'  # Fires when price <= level
+
+
+class _LevelBook:
+    """Levels for one (symbol, price side, crossing direction), sorted ascending"""
+
+    def __init__(self):
+        self.levels: List[Tuple[float, int]] = []  # (level, sequence) keeps insertion order on ties
+        self.ids: Dict[Tuple[float, int], Hashable] = {}
+
+    def add(self, level: float, seq: int, trigger_id: Hashable):
+        key = (level, seq)
+        insort(self.levels, key)
+        self.ids[key] = trigger_id
+
+    def remove(self, level: float, seq: int):
+        key = (level, seq)
+        i = bisect_left(self.levels, key)
+        if i < len(self.levels) and self.levels[i] == key:
+            del self.levels[i]
+        self.ids.pop(key, None)
+
+    def crossed_above(self, price: float) -> List[Hashable]:
+        """Triggers with level <= price"""
+        end = bisect_right(self.levels, (price, float('inf')))
+        return [self.ids[key] for key in self.levels[:end]]
+
+    def crossed_below(self, price: float) -> List[Hashable]:
+        """Triggers with level >= price"""
+        start = bisect_left(self.levels, (price, -1))
+        return [self.ids[key] for key in self.levels[start:]]
+
+
+class TriggerIndex:
+    """
+    Per-symbol index of price triggers
+    Each trigger watches the bid or the ask and fires when price crosses its level
+    in the given direction; lookups cost O(log n + triggers hit)
+    """
+
+    def __init__(self):
+        self._books: Dict[Tuple[str, str, str], _LevelBook] = {}
+        self._triggers: Dict[Hashable, Tuple[Tuple[str, str, str], float, int]] = {}
+        self._seq = 0
+
+    def add(self, trigger_id: Hashable, symbol: str, price_side: str, direction: str, level: float):
+        """Register (or move) a trigger; price_side is 'bid' or 'ask', direction ABOVE or BELOW"""
+        if trigger_id in self._triggers:
+            self.remove(trigger_id)
+
+        book_key = (symbol, price_side, direction)
+        book = self._books.get(book_key)
+        if book is None:
+            book = self._books[book_key] = _LevelBook()
+
+        self._seq += 1
+        book.add(level, self._seq, trigger_id)
+        self._triggers[trigger_id] = (book_key, level, self._seq)
+
+    def remove(self, trigger_id: Hashable) -> bool:
+        """Drop a trigger; returns False if it was not registered"""
+        entry = self._triggers.pop(trigger_id, None)
+        if entry is None:
+            return False
+
+        book_key, level, seq = entry
+        book = self._books[book_key]
+        book.remove(level, seq)
+        if not book.levels:
+            del self._books[book_key]
+        return True
+
+    def level(self, trigger_id: Hashable) -> Optional[float]:
+        entry = self._triggers.get(trigger_id)
+        return entry[1] if entry else None
+
+    def crossed(self, symbol: str, bid: float, ask: float) -> List[Hashable]:
+        """Every trigger on `symbol` whose level the quote has reached"""
+        return self.crossed_range(symbol, bid, bid, ask, ask)
+
+    def crossed_range(self, symbol: str, bid_low: float, bid_high: float,
+                      ask_low: float, ask_high: float) -> List[Hashable]:
+        """Every trigger on `symbol` reached anywhere within a traded price range"""
+        fired = []
+        for price_side, low, high in (('bid', bid_low, bid_high), ('ask', ask_low, ask_high)):
+            above = self._books.get((symbol, price_side, ABOVE))
+            if above is not None:
+                fired.extend(above.crossed_above(high))
+
+            below = self._books.get((symbol, price_side, BELOW))
+            if below is not None:
+                fired.extend(below.crossed_below(low))
+        return fired
+
+    def symbols(self) -> List[str]:
+        """Symbols with at least one registered trigger"""
+        return list(dict.fromkeys(key[0] for key in self._books))
+
+    def __len__(self) -> int:
+        return len(self._triggers)
@@ -1,4 +1,14 @@
 """MetaTrader 5 integration"""
+from .gateway import MT5Gateway, get_gateway, set_gateway
+from .symbol_registry import SymbolRegistry, get_symbol_registry
 from .connection import MT5Connection
+from .tick_pump import TickPump
+from .resampler import BarResampler
+from .simulator import SimulatedTerminal
+from .account_workers import AccountWorkerPool
+from .position_reconciler import PositionReconciler
 
-__all__ = ['MT5Connection']
\ No newline at end of file
+__all__ = ['MT5Connection', 'MT5Gateway', 'get_gateway', 'set_gateway',
+           'SymbolRegistry', 'get_symbol_registry', 'TickPump',
+           'BarResampler', 'SimulatedTerminal',
+           'AccountWorkerPool', 'PositionReconciler']
\ No newline at end of file
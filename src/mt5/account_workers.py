@@ -0,0 +1,370 @@
+"""
+Account Workers - One MT5 terminal process per user account
+Keeps each account's terminal logged in inside its own worker process and forwards calls over a pipe
+"""
+
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+from src.mt5.gateway import LatencyHistogram
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class _Record(dict):
+    """Field dict of an MT5 result record, rebuilt as an attribute object in the bot process"""
+
+
+def _to_plain(value: Any) -> Any:
+    """MT5 named tuples become picklable _Records (recursively); everything else is unchanged"""
+    if hasattr(value, '_asdict'):
+        return _Record({key: _to_plain(item) for key, item in value._asdict().items()})
+    if isinstance(value, tuple):
+        return tuple(_to_plain(item) for item in value)
+    return value
+
+
+def _from_plain(value: Any) -> Any:
+    if isinstance(value, _Record):
+        return SimpleNamespace(**{key: _from_plain(item) for key, item in value.items()})
+    if isinstance(value, tuple):
+        return tuple(_from_plain(item) for item in value)
+    return value
+
+
+def _terminal_module(use_simulator: bool):
+    """The MetaTrader5 module, or the simulated terminal when MT5_BACKEND=simulator"""
+    if use_simulator:
+        from src.config.settings import Config
+        from src.mt5.simulator import SimulatedTerminal
+        return SimulatedTerminal.from_config(Config)
+
+    import MetaTrader5
+    return MetaTrader5
+
+
+def _worker_main(conn, use_simulator: bool):
+    """Worker process: run (request_id, name, args, kwargs) requests until told to stop"""
+    terminal = _terminal_module(use_simulator)
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+
+        request_id, name, args, kwargs = message
+        started = time.perf_counter()
+        try:
+            reply = ('ok', _to_plain(getattr(terminal, name)(*args, **kwargs)))
+        except Exception as e:
+            reply = ('error', f"{type(e).__name__}: {e}")
+        conn.send((request_id,) + reply + ((time.perf_counter() - started) * 1000,))
+
+    try:
+        terminal.shutdown()
+    except Exception:
+        pass
+
+
+class AccountWorker:
+    """
+    A worker process bound to one terminal installation
+    Exposes the MT5Gateway calling convention (`call`, `backend`) so order code runs unchanged
+    """
+
+    def __init__(self, slot: int, terminal_path: Optional[str], use_simulator: bool = False,
+                 default_timeout: float = 30.0):
+        self.slot = slot
+        self.terminal_path = terminal_path
+        self.use_simulator = use_simulator
+        self.default_timeout = default_timeout
+        self.lock = asyncio.Lock()  # Held for a whole login/order sequence
+
+        self.process = None
+        self._conn = None
+        self._io = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'mt5-account-{slot}')
+        self._request_id = 0
+        self._backend = None
+
+        self.initialized = False
+        self.account_id: Optional[str] = None
+        self.credentials: Optional[Dict] = None
+        self.last_used = 0.0
+        self.restarts = 0
+
+    @property
+    def backend(self):
+        """MT5 constants (ORDER_TYPE_*, TRADE_RETCODE_*, ...) for building requests"""
+        if self._backend is None:
+            if self.use_simulator:
+                from src.mt5.simulator import SimulatedTerminal
+                self._backend = SimulatedTerminal
+            else:
+                import MetaTrader5
+                self._backend = MetaTrader5
+        return self._backend
+
+    def alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+    def start(self):
+        """Spawn the worker process (spawn works the same on Windows, where MT5 runs)"""
+        context = multiprocessing.get_context('spawn')
+        parent_conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main, args=(child_conn, self.use_simulator),
+            name=f'mt5-account-{self.slot}', daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+        self._conn = parent_conn
+        self.initialized = False
+        self.account_id = None
+        logger.info(f"Started MT5 account worker {self.slot} (pid {self.process.pid})")
+
+    def kill(self):
+        """Stop the process without waiting for queued requests"""
+        if self.process is not None:
+            try:
+                self._conn.send(None)
+            except Exception:
+                pass
+            self.process.join(timeout=2)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join(timeout=2)
+        self.process = None
+        self._conn = None
+        self.initialized = False
+        self.account_id = None
+
+    def restart(self):
+        self.kill()
+        self.restarts += 1
+        self.start()
+
+    def _roundtrip(self, message: tuple, timeout: float) -> tuple:
+        self._conn.send(message)
+        if not self._conn.poll(timeout):
+            raise TimeoutError
+        return self._conn.recv()
+
+    async def call(self, name: str, *args, call_timeout: Optional[float] = None, **kwargs) -> Any:
+        """Run terminal.<name>(*args, **kwargs) in the worker process"""
+        if not self.alive():
+            raise ConnectionError(f"Account worker {self.slot} is not running")
+
+        self._request_id += 1
+        timeout = self.default_timeout if call_timeout is None else call_timeout
+        loop = asyncio.get_running_loop()
+
+        try:
+            _, status, payload, _ = await loop.run_in_executor(
+                self._io, self._roundtrip, (self._request_id, name, args, kwargs), timeout
+            )
+        except TimeoutError:
+            # The reply would arrive out of order - the process cannot be reused
+            logger.warning(f"Account worker {self.slot}: {name} timed out after {timeout}s, restarting")
+            await loop.run_in_executor(None, self.restart)
+            raise asyncio.TimeoutError
+        except (EOFError, OSError) as e:
+            raise ConnectionError(f"Account worker {self.slot} died: {e}")
+
+        if status == 'error':
+            raise RuntimeError(payload)
+        return _from_plain(payload)
+
+    def shutdown(self):
+        self.kill()
+        self._io.shutdown(wait=False)
+
+
+class AccountWorkerPool:
+    """
+    Warm MT5 sessions for user accounts, one worker process per terminal installation
+    An account keeps its worker (and login) between trades; when every worker is taken the
+    least recently used one is switched to the new account.
+    Real terminals need one installation path per worker: workers initialized without a path
+    would all attach to the same default terminal (the bot's own) and switch its account on login.
+    """
+
+    def __init__(self, terminal_paths: List[str], max_workers: int = 4, use_simulator: bool = False,
+                 call_timeout: float = 30.0, login_timeout: float = 90.0, health_interval: float = 60.0):
+        if not terminal_paths and not use_simulator:
+            raise ValueError("account workers need MT5_TERMINAL_PATHS (one terminal installation per worker)")
+
+        self.terminal_paths = terminal_paths
+        self.capacity = len(terminal_paths) if terminal_paths else max_workers
+        self.use_simulator = use_simulator
+        self.call_timeout = call_timeout
+        self.login_timeout = login_timeout
+        self.health_interval = health_interval
+
+        self.workers: List[AccountWorker] = []
+        self._bindings: Dict[str, AccountWorker] = {}  # {account_id: worker}
+        self._health_task = None
+
+        self.login_latency: Dict[str, LatencyHistogram] = {}
+        self.stats = {'logins': 0, 'login_failures': 0, 'reconnects': 0, 'evictions': 0, 'health_checks': 0}
+
+    @classmethod
+    def from_config(cls, config) -> 'AccountWorkerPool':
+        return cls(
+            config.MT5_TERMINAL_PATHS,
+            max_workers=config.ACCOUNT_WORKERS_MAX,
+            use_simulator=config.MT5_BACKEND == 'simulator',
+            call_timeout=config.MT5_CALL_TIMEOUT,
+            health_interval=config.ACCOUNT_WORKER_HEALTH_INTERVAL
+        )
+
+    def _worker_for(self, account_id: str) -> AccountWorker:
+        """The account's worker, a new or idle one, or the least recently used one"""
+        worker = self._bindings.get(account_id)
+        if worker is not None:
+            return worker
+
+        worker = next((w for w in self.workers if w.account_id is None and w not in self._bindings.values()), None)
+        if worker is None and len(self.workers) < self.capacity:
+            slot = len(self.workers)
+            path = self.terminal_paths[slot] if self.terminal_paths else None
+            worker = AccountWorker(slot, path, self.use_simulator, self.call_timeout)
+            self.workers.append(worker)
+        if worker is None:
+            worker = min(self.workers, key=lambda w: (w.lock.locked(), w.last_used))
+            self.stats['evictions'] += 1
+
+        for bound_id in [a for a, w in self._bindings.items() if w is worker]:
+            del self._bindings[bound_id]
+        self._bindings[account_id] = worker
+        return worker
+
+    async def _login(self, worker: AccountWorker, account_id: str, credentials: Dict):
+        """Start/initialize the worker if needed and log it into the account"""
+        loop = asyncio.get_running_loop()
+        if not worker.alive():
+            await loop.run_in_executor(None, worker.start)
+
+        if not worker.initialized:
+            args = (worker.terminal_path,) if worker.terminal_path else ()
+            if not await worker.call('initialize', *args, call_timeout=self.login_timeout):
+                error = await worker.call('last_error')
+                raise ConnectionError(f"MT5 initialization failed on worker {worker.slot}: {error}")
+            worker.initialized = True
+
+        started = time.perf_counter()
+        authorized = await worker.call(
+            'login',
+            login=credentials['login'],
+            password=credentials['password'],
+            server=credentials['server'],
+            timeout=60000,
+            call_timeout=self.login_timeout
+        )
+        latency_ms = (time.perf_counter() - started) * 1000
+        histogram = self.login_latency.setdefault(account_id, LatencyHistogram())
+        histogram.record(latency_ms)
+        self.stats['logins'] += 1
+
+        if not authorized:
+            histogram.errors += 1
+            self.stats['login_failures'] += 1
+            worker.account_id = None
+            error = await worker.call('last_error')
+            raise ConnectionError(f"MT5 login failed for {credentials['login']}: {error}")
+
+        worker.account_id = account_id
+        worker.credentials = credentials
+        logger.info(f"Worker {worker.slot} logged into account {credentials['login']} in {latency_ms:.0f}ms")
+
+    def logged_in(self, account_id: str) -> bool:
+        """Whether the account's worker is up and logged in, so a session needs no login"""
+        worker = self._bindings.get(account_id)
+        return worker is not None and worker.alive() and worker.account_id == account_id
+
+    @asynccontextmanager
+    async def session(self, account_id: str, credentials: Dict):
+        """Exclusive use of a worker logged into the account (logging in only if it is not already)"""
+        self._ensure_health_loop()
+        worker = self._worker_for(account_id)
+
+        async with worker.lock:
+            if not worker.alive() or worker.account_id != account_id:
+                await self._login(worker, account_id, credentials)
+            try:
+                yield worker
+            finally:
+                worker.last_used = time.monotonic()
+
+    def _ensure_health_loop(self):
+        if self._health_task is None and self.health_interval > 0:
+            self._health_task = asyncio.create_task(self._health_loop())
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_interval)
+            try:
+                await self.health_check()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Account worker health check failed: {e}", exc_info=True)
+
+    async def health_check(self):
+        """Ping every idle logged-in worker; restart dead processes and re-login lost sessions"""
+        self.stats['health_checks'] += 1
+
+        for worker in list(self.workers):
+            if worker.lock.locked() or worker.credentials is None:
+                continue
+
+            async with worker.lock:
+                account_id = next((a for a, w in self._bindings.items() if w is worker), None)
+                if account_id is None:
+                    continue
+
+                try:
+                    if worker.alive() and await worker.call('account_info', call_timeout=10) is not None:
+                        continue
+                except Exception as e:
+                    logger.warning(f"Account worker {worker.slot} failed its health check: {e}")
+
+                logger.warning(f"Reconnecting account worker {worker.slot} (account {account_id})")
+                self.stats['reconnects'] += 1
+                try:
+                    if worker.alive():
+                        worker.account_id = None
+                    else:
+                        await asyncio.get_running_loop().run_in_executor(None, worker.restart)
+                    await self._login(worker, account_id, worker.credentials)
+                except Exception as e:
+                    logger.error(f"Reconnect of worker {worker.slot} failed: {e}")
+
+    def get_stats(self) -> Dict:
+        """Pool counters, per-worker state and login latency per account"""
+        return {
+            **self.stats,
+            'workers': [
+                {'slot': w.slot, 'alive': w.alive(), 'account_id': w.account_id, 'restarts': w.restarts}
+                for w in self.workers
+            ],
+            'login_latency': {account_id: h.to_dict() for account_id, h in self.login_latency.items()}
+        }
+
+    def close(self):
+        """Stop the health loop and every worker process"""
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+        for worker in self.workers:
+            worker.shutdown()
+        self.workers.clear()
+        self._bindings.clear()
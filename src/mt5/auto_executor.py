@@ -3,7 +3,6 @@ MT5 Auto-Execution Module
 Automatically executes signals in MetaTrader 5 (with enable/disable feature)
 """
 
-import MetaTrader5 as mt5
 from typing import Dict, Optional
 from datetime import datetime
 from src.utils.logger import setup_logger
@@ -16,6 +15,7 @@ class MT5AutoExecutor:
     
     def __init__(self, mt5_connection, config):
         self.mt5 = mt5_connection
+        self.gateway = mt5_connection.gateway
         self.config = config
         self.enabled = False  # Default: OFF for safety
         self.active_positions = {}  # {signal_id: ticket}
@@ -52,7 +52,7 @@ class MT5AutoExecutor:
             take_profit = signal['take_profit']
             
             # Calculate lot size based on risk
-            account_balance = self.mt5.get_account_balance()
+            account_balance = await self.mt5.get_account_balance()
             lot_size = await self.mt5.calculate_lot_size(
                 symbol,
                 self.config.MAX_RISK_PERCENT,
@@ -91,15 +91,17 @@ class MT5AutoExecutor:
                                    lot_size: float, sl: float, tp: float) -> Optional[int]:
         """Place market order"""
         try:
+            mt5 = self.gateway.backend
+            
             # Get symbol info
-            symbol_info = mt5.symbol_info(symbol)
-            if not symbol_info:
+            tick = await self.gateway.call('symbol_info_tick', symbol)
+            if not tick:
                 logger.error(f"Symbol {symbol} not found")
                 return None
             
             # Prepare order
             order_type = mt5.ORDER_TYPE_BUY if direction == 'BUY' else mt5.ORDER_TYPE_SELL
-            price = symbol_info.ask if direction == 'BUY' else symbol_info.bid
+            price = tick.ask if direction == 'BUY' else tick.bid
             
             request = {
                 "action": mt5.TRADE_ACTION_DEAL,
@@ -117,7 +119,7 @@ class MT5AutoExecutor:
             }
             
             # Send order
-            result = mt5.order_send(request)
+            result = await self.gateway.call('order_send', request)
             
             if result.retcode != mt5.TRADE_RETCODE_DONE:
                 logger.error(f"Order failed: {result.retcode} - {result.comment}")
@@ -134,7 +136,9 @@ class MT5AutoExecutor:
                                   lot_size: float, sl: float, tp: float) -> Optional[int]:
         """Place limit order"""
         try:
-            symbol_info = mt5.symbol_info(symbol)
+            mt5 = self.gateway.backend
+            
+            symbol_info = self.mt5.symbols.get(symbol) or await self.mt5.symbols.refresh(symbol)
             if not symbol_info:
                 logger.error(f"Symbol {symbol} not found")
                 return None
@@ -156,7 +160,7 @@ class MT5AutoExecutor:
                 "type_filling": mt5.ORDER_FILLING_RETURN,
             }
             
-            result = mt5.order_send(request)
+            result = await self.gateway.call('order_send', request)
             
             if result.retcode != mt5.TRADE_RETCODE_DONE:
                 logger.error(f"Limit order failed: {result.retcode} - {result.comment}")
@@ -173,7 +177,9 @@ class MT5AutoExecutor:
                                  lot_size: float, sl: float, tp: float) -> Optional[int]:
         """Place stop order"""
         try:
-            symbol_info = mt5.symbol_info(symbol)
+            mt5 = self.gateway.backend
+            
+            symbol_info = self.mt5.symbols.get(symbol) or await self.mt5.symbols.refresh(symbol)
             if not symbol_info:
                 logger.error(f"Symbol {symbol} not found")
                 return None
@@ -195,7 +201,7 @@ class MT5AutoExecutor:
                 "type_filling": mt5.ORDER_FILLING_RETURN,
             }
             
-            result = mt5.order_send(request)
+            result = await self.gateway.call('order_send', request)
             
             if result.retcode != mt5.TRADE_RETCODE_DONE:
                 logger.error(f"Stop order failed: {result.retcode} - {result.comment}")
@@ -214,10 +220,11 @@ class MT5AutoExecutor:
             return False
         
         try:
+            mt5 = self.gateway.backend
             ticket = self.active_positions[signal_id]
             
             # Get position info
-            position = mt5.positions_get(ticket=ticket)
+            position = await self.gateway.call('positions_get', ticket=ticket)
             
             if not position:
                 logger.warning(f"Position {ticket} not found (may already be closed)")
@@ -228,7 +235,8 @@ class MT5AutoExecutor:
             
             # Prepare close request
             order_type = mt5.ORDER_TYPE_SELL if position.type == mt5.ORDER_TYPE_BUY else mt5.ORDER_TYPE_BUY
-            price = mt5.symbol_info_tick(position.symbol).bid if position.type == mt5.ORDER_TYPE_BUY else mt5.symbol_info_tick(position.symbol).ask
+            tick = await self.gateway.call('symbol_info_tick', position.symbol)
+            price = tick.bid if position.type == mt5.ORDER_TYPE_BUY else tick.ask
             
             request = {
                 "action": mt5.TRADE_ACTION_DEAL,
@@ -244,12 +252,16 @@ class MT5AutoExecutor:
                 "type_filling": mt5.ORDER_FILLING_IOC,
             }
             
-            result = mt5.order_send(request)
+            result = await self.gateway.call('order_send', request)
             
             if result.retcode == mt5.TRADE_RETCODE_DONE:
                 logger.info(f"Position {ticket} closed successfully")
                 del self.active_positions[signal_id]
                 return True
+            elif result.retcode == mt5.TRADE_RETCODE_POSITION_CLOSED:
+                logger.warning(f"Position {ticket} was already closed")
+                del self.active_positions[signal_id]
+                return True
             else:
                 logger.error(f"Failed to close position {ticket}: {result.comment}")
                 return False
@@ -0,0 +1,161 @@
+"""
+Bar Store - Persistent per-(symbol, timeframe) OHLCV history
+Keeps MT5 rate arrays on disk and in memory, fetching only the bars newer than the last stored one
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+import numpy as np
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Bars requested for a delta fetch on top of the ones expected since the last sync
+DELTA_MARGIN = 2
+
+
+class BarStore:
+    """
+    Structured NumPy arrays of MT5 rates, persisted as one .npy file per (symbol, timeframe)
+    Files are rewritten only when a bar closes or the history is replaced (a moving forming bar
+    is refetched anyway), on a writer thread so disk I/O never blocks the event loop.
+    """
+
+    def __init__(self, directory: str = 'data/bars', max_bars: int = 2000):
+        self.directory = directory
+        self.max_bars = max_bars
+        self._bars: Dict[Tuple[str, str], np.ndarray] = {}
+        self._synced_at: Dict[Tuple[str, str], float] = {}  # Monotonic time of the last fetch
+        self.stats = {'full_fetches': 0, 'delta_fetches': 0, 'bars_fetched': 0, 'disk_loads': 0, 'saves': 0}
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='bar-store')  # Keeps writes ordered
+
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, symbol: str, timeframe: str) -> str:
+        return os.path.join(self.directory, f"{symbol}_{timeframe}.npy")
+
+    def _load(self, symbol: str, timeframe: str) -> Optional[np.ndarray]:
+        """Bars from memory, or from disk on first use"""
+        key = (symbol, timeframe)
+        if key in self._bars:
+            return self._bars[key]
+
+        path = self._path(symbol, timeframe)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            bars = np.load(path, allow_pickle=False)
+            self._bars[key] = bars
+            # The file was written at or before its last fetch - an older time only widens the first delta
+            self._synced_at[key] = time.monotonic() - max(0.0, time.time() - os.path.getmtime(path))
+            self.stats['disk_loads'] += 1
+            return bars
+        except Exception as e:
+            logger.warning(f"Discarding unreadable bar file {path}: {e}")
+            return None
+
+    def _save(self, symbol: str, timeframe: str, bars: np.ndarray):
+        """Write atomically so a crash never leaves a truncated file"""
+        path = self._path(symbol, timeframe)
+        tmp_path = path + '.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.save(f, bars, allow_pickle=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.error(f"Error saving bars to {path}: {e}")
+
+    @staticmethod
+    def _needs_save(stored: Optional[np.ndarray], bars: np.ndarray) -> bool:
+        """Whether the history differs from the stored one by more than the forming bar's values"""
+        return (stored is None or stored.dtype != bars.dtype or len(stored) != len(bars)
+                or stored['time'][0] != bars['time'][0] or stored['time'][-1] != bars['time'][-1])
+
+    def _expected_new_bars(self, key: Tuple[str, str], timeframe: str) -> int:
+        """Bars that can have opened since the last fetch, from the local clock"""
+        synced_at = self._synced_at.get(key)
+        if synced_at is None:
+            return DELTA_MARGIN
+        elapsed = time.monotonic() - synced_at
+        return int(elapsed // (int(timeframe) * 60)) + DELTA_MARGIN
+
+    async def get(self, symbol: str, timeframe: str, count: int,
+                  fetch: Callable[[int], Awaitable[Optional[np.ndarray]]]) -> Optional[np.ndarray]:
+        """
+        Last `count` bars for (symbol, timeframe) as a view into the stored array
+        `fetch(n)` must return the newest n bars (copy_rates_from_pos(symbol, tf, 0, n)).
+        Only the bars since the last stored one are requested; the fetch is widened until it
+        overlaps the stored history, falling back to a full fetch of `count` bars.
+        """
+        key = (symbol, timeframe)
+        stored = self._load(symbol, timeframe)
+        bars = None
+
+        if stored is not None and len(stored) >= count:
+            n = min(self._expected_new_bars(key, timeframe), count)
+
+            while True:
+                fresh = await fetch(n)
+                if fresh is None or len(fresh) == 0:
+                    return None
+
+                if fresh.dtype != stored.dtype:
+                    break
+
+                if fresh['time'][0] <= stored['time'][-1]:
+                    # Overlap found - replace the stored tail (including the formerly forming bar)
+                    keep = stored[stored['time'] < fresh['time'][0]]
+                    bars = np.concatenate([keep, fresh])[-max(self.max_bars, count):]
+                    self.stats['delta_fetches'] += 1
+                    self.stats['bars_fetched'] += len(fresh)
+                    break
+
+                if n >= count:
+                    # Gap longer than `count` bars - the fresh window replaces the history
+                    bars = fresh
+                    self.stats['full_fetches'] += 1
+                    self.stats['bars_fetched'] += len(fresh)
+                    break
+
+                n = min(n * 4, count)
+
+        if bars is None:
+            bars = await fetch(count)
+            if bars is None or len(bars) == 0:
+                return None
+            self.stats['full_fetches'] += 1
+            self.stats['bars_fetched'] += len(bars)
+
+        self._bars[key] = bars
+        self._synced_at[key] = time.monotonic()
+        if self._needs_save(stored, bars):
+            self.stats['saves'] += 1
+            self._writer.submit(self._save, symbol, timeframe, bars)
+
+        return bars[-count:]
+
+    def get_stats(self) -> Dict:
+        """Fetch counters and the number of series held in memory"""
+        return {**self.stats, 'series': len(self._bars)}
+
+    def flush(self):
+        """Block until every queued write has finished"""
+        self._writer.submit(lambda: None).result()
+
+    def clear(self, symbol: Optional[str] = None):
+        """Forget stored bars (memory and disk) for one symbol or for all symbols"""
+        for key in [k for k in list(self._bars) if symbol is None or k[0] == symbol]:
+            self._bars.pop(key, None)
+            self._synced_at.pop(key, None)
+            # Queued behind any pending write of the same file
+            self._writer.submit(self._remove, self._path(*key))
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
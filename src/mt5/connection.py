@@ -2,11 +2,15 @@
 MetaTrader 5 Connection Handler for Exness Broker
 """
 
-import MetaTrader5 as mt5
 import asyncio
+import time
 from datetime import datetime
 import pandas as pd
 from typing import Optional, Dict, List
+from src.mt5.gateway import MT5Gateway, get_gateway
+from src.mt5.bar_store import BarStore
+from src.mt5.resampler import BarResampler
+from src.mt5.symbol_registry import SymbolRegistry, get_symbol_registry
 from src.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -15,38 +19,98 @@ logger = setup_logger(__name__)
 class MT5Connection:
     """Handles MT5 connection and data retrieval"""
     
-    def __init__(self, config):
+    def __init__(self, config, gateway: Optional[MT5Gateway] = None):
         self.config = config
+        self.gateway = gateway or get_gateway()  # All terminal calls go through the gateway thread
+        self.symbols = get_symbol_registry() if gateway is None else SymbolRegistry(gateway, config.SYMBOL_SPECS_FILE)
         self.connected = False
         self.account_info = None
         
+        # Local bar history - only bars newer than the stored ones are fetched
+        self.bar_store = None
+        if getattr(config, 'BAR_STORE_ENABLED', False):
+            self.bar_store = BarStore(config.BAR_STORE_DIR, config.BAR_STORE_MAX_BARS)
+        
+        # Higher timeframes resampled locally from the base timeframe
+        self.resampler = BarResampler() if getattr(config, 'RESAMPLE_ENABLED', False) else None
+        
+        # Single-flight coalescing of market data requests
+        self._inflight = {}  # {request_key: asyncio.Task}
+        self._recent = {}  # {request_key: (monotonic_time, result)}
+        self.request_stats = {}  # {kind: {'hits', 'coalesced', 'misses'}}
+        
+    async def _coalesce(self, key: tuple, fetch):
+        """
+        Share one terminal request between concurrent callers of the same key
+        A successful result is reused for MARKET_DATA_FRESHNESS[kind] seconds; results are
+        shared between callers and must be treated as read-only
+        """
+        kind = key[0]
+        stats = self.request_stats.setdefault(kind, {'hits': 0, 'coalesced': 0, 'misses': 0})
+        
+        recent = self._recent.get(key)
+        if recent is not None and time.monotonic() - recent[0] <= self.config.MARKET_DATA_FRESHNESS.get(kind, 0):
+            stats['hits'] += 1
+            return recent[1]
+        
+        task = self._inflight.get(key)
+        if task is not None:
+            stats['coalesced'] += 1
+        else:
+            stats['misses'] += 1
+            task = asyncio.ensure_future(fetch())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish_request(key, t))
+        
+        # Shielded so one caller timing out does not cancel the request for the others
+        return await asyncio.shield(task)
+    
+    def _finish_request(self, key: tuple, task: asyncio.Task):
+        """Drop the in-flight entry and remember a successful result"""
+        self._inflight.pop(key, None)
+        if not task.cancelled() and task.exception() is None and task.result() is not None:
+            self._recent[key] = (time.monotonic(), task.result())
+    
+    def get_request_stats(self) -> Dict:
+        """Cache hits, coalesced waits and terminal calls per request kind"""
+        stats = {kind: dict(counts) for kind, counts in self.request_stats.items()}
+        for counts in stats.values():
+            served = counts['hits'] + counts['coalesced'] + counts['misses']
+            counts['saved_ratio'] = (counts['hits'] + counts['coalesced']) / served if served else 0.0
+        return stats
+        
     async def connect(self) -> bool:
         """Connect to MT5 terminal"""
         try:
+            gateway = self.gateway
+            login_timeout = self.config.MT5_TIMEOUT / 1000 + gateway.default_timeout
+            
             # Initialize MT5
-            if not mt5.initialize():
-                logger.error(f"MT5 initialization failed: {mt5.last_error()}")
+            if not await gateway.call('initialize', call_timeout=login_timeout):
+                logger.error(f"MT5 initialization failed: {await gateway.call('last_error')}")
                 return False
             
             # Login to account
-            authorized = mt5.login(
+            authorized = await gateway.call(
+                'login',
                 login=self.config.MT5_LOGIN,
                 password=self.config.MT5_PASSWORD,
                 server=self.config.MT5_SERVER,
-                timeout=self.config.MT5_TIMEOUT
+                timeout=self.config.MT5_TIMEOUT,
+                call_timeout=login_timeout
             )
             
             if not authorized:
-                logger.error(f"MT5 login failed: {mt5.last_error()}")
-                mt5.shutdown()
+                logger.error(f"MT5 login failed: {await gateway.call('last_error')}")
+                await gateway.call('shutdown')
                 return False
             
             # Get account info
-            self.account_info = mt5.account_info()
+            self.account_info = await gateway.call('account_info')
             
             if self.account_info is None:
                 logger.error("Failed to get account info")
-                mt5.shutdown()
+                await gateway.call('shutdown')
                 return False
             
             self.connected = True
@@ -54,6 +118,9 @@ class MT5Connection:
                        f"Balance: {self.account_info.balance}, "
                        f"Server: {self.account_info.server}")
             
+            # Static contract specs for the whole universe (read from disk when persisted)
+            await self.symbols.load(self.config.TRADING_SYMBOLS)
+            
             return True
             
         except Exception as e:
@@ -64,19 +131,72 @@ class MT5Connection:
         """Disconnect from MT5"""
         try:
             if self.connected:
-                mt5.shutdown()
+                await self.gateway.call('shutdown')
                 self.connected = False
                 logger.info("Disconnected from MT5")
+            
+            if self.bar_store is not None:
+                self.bar_store.flush()
         except Exception as e:
             logger.error(f"Error disconnecting MT5: {e}")
     
     async def get_rates(self, symbol: str, timeframe: str, count: int = 500) -> Optional[pd.DataFrame]:
         """Get historical rates for symbol"""
+        return await self._coalesce(
+            ('rates', symbol, timeframe, count),
+            lambda: self._fetch_rates(symbol, timeframe, count)
+        )
+    
+    def _is_resampled(self, timeframe: str) -> bool:
+        """Intraday multiples of the base timeframe are built locally when resampling is on"""
+        if self.resampler is None or not timeframe.isdigit():
+            return False
+        base = int(self.config.RESAMPLE_BASE_TIMEFRAME)
+        minutes = int(timeframe)
+        return base <= minutes < 1440 and minutes % base == 0
+    
+    async def _fetch_rates(self, symbol: str, timeframe: str, count: int) -> Optional[pd.DataFrame]:
+        """Fetch rates from the terminal (or the bar store), or resample them from the base timeframe"""
         try:
             if not self.connected:
                 logger.error("MT5 not connected")
                 return None
             
+            if self._is_resampled(timeframe):
+                # Every timeframe of the symbol shares one base request
+                base = await self._coalesce(
+                    ('base_rates', symbol),
+                    lambda: self._fetch_raw_rates(symbol, self.config.RESAMPLE_BASE_TIMEFRAME,
+                                                  self.config.RESAMPLE_BASE_BARS)
+                )
+                if base is None:
+                    return None
+                
+                if timeframe == self.config.RESAMPLE_BASE_TIMEFRAME:
+                    rates = base[-count:]
+                else:
+                    rates = self.resampler.update(symbol, int(timeframe), base)[-count:]
+            else:
+                rates = await self._fetch_raw_rates(symbol, timeframe, count)
+            
+            if rates is None or len(rates) == 0:
+                return None
+            
+            # Convert to DataFrame
+            df = pd.DataFrame(rates)
+            df['time'] = pd.to_datetime(df['time'], unit='s')
+            
+            return df
+            
+        except Exception as e:
+            logger.error(f"Error getting rates for {symbol}: {e}", exc_info=True)
+            return None
+    
+    async def _fetch_raw_rates(self, symbol: str, timeframe: str, count: int):
+        """MT5 rates array from the terminal (or the bar store)"""
+        try:
+            mt5 = self.gateway.backend
+            
             # Convert timeframe string to MT5 constant
             tf_map = {
                 '1': mt5.TIMEFRAME_M1,
@@ -91,17 +211,19 @@ class MT5Connection:
             timeframe_mt5 = tf_map.get(timeframe, mt5.TIMEFRAME_M5)
             
             # Get rates
-            rates = mt5.copy_rates_from_pos(symbol, timeframe_mt5, 0, count)
+            if self.bar_store is not None and timeframe in tf_map:
+                rates = await self.bar_store.get(
+                    symbol, timeframe, count,
+                    lambda n: self.gateway.call('copy_rates_from_pos', symbol, timeframe_mt5, 0, n)
+                )
+            else:
+                rates = await self.gateway.call('copy_rates_from_pos', symbol, timeframe_mt5, 0, count)
             
             if rates is None or len(rates) == 0:
-                logger.error(f"Failed to get rates for {symbol}: {mt5.last_error()}")
+                logger.error(f"Failed to get rates for {symbol}: {await self.gateway.call('last_error')}")
                 return None
             
-            # Convert to DataFrame
-            df = pd.DataFrame(rates)
-            df['time'] = pd.to_datetime(df['time'], unit='s')
-            
-            return df
+            return rates
             
         except Exception as e:
             logger.error(f"Error getting rates for {symbol}: {e}", exc_info=True)
@@ -109,28 +231,22 @@ class MT5Connection:
     
     async def get_symbol_info(self, symbol: str) -> Optional[Dict]:
         """Get symbol information"""
+        return await self._coalesce(('symbol_info', symbol), lambda: self._fetch_symbol_info(symbol))
+    
+    async def _fetch_symbol_info(self, symbol: str) -> Optional[Dict]:
+        """Fetch symbol information from the terminal"""
         try:
             if not self.connected:
                 return None
             
-            symbol_info = mt5.symbol_info(symbol)
+            # Static fields come from the registry; only the quote fields are refreshed
+            symbol_info = await self.symbols.refresh(symbol)
             
             if symbol_info is None:
                 logger.error(f"Failed to get info for {symbol}")
                 return None
             
-            return {
-                'name': symbol_info.name,
-                'point': symbol_info.point,
-                'digits': symbol_info.digits,
-                'spread': symbol_info.spread,
-                'trade_contract_size': symbol_info.trade_contract_size,
-                'volume_min': symbol_info.volume_min,
-                'volume_max': symbol_info.volume_max,
-                'volume_step': symbol_info.volume_step,
-                'bid': symbol_info.bid,
-                'ask': symbol_info.ask
-            }
+            return dict(symbol_info)
             
         except Exception as e:
             logger.error(f"Error getting symbol info for {symbol}: {e}")
@@ -138,11 +254,15 @@ class MT5Connection:
     
     async def get_tick(self, symbol: str) -> Optional[Dict]:
         """Get latest tick for symbol"""
+        return await self._coalesce(('tick', symbol), lambda: self._fetch_tick(symbol))
+    
+    async def _fetch_tick(self, symbol: str) -> Optional[Dict]:
+        """Fetch the latest tick from the terminal"""
         try:
             if not self.connected:
                 return None
             
-            tick = mt5.symbol_info_tick(symbol)
+            tick = await self.gateway.call('symbol_info_tick', symbol)
             
             if tick is None:
                 return None
@@ -163,34 +283,17 @@ class MT5Connection:
                                  stop_loss_pips: float, account_balance: float) -> float:
         """Calculate lot size based on risk parameters"""
         try:
-            symbol_info = await self.get_symbol_info(symbol)
-            
-            if not symbol_info:
+            if self.symbols.get(symbol) is None and not await self.get_symbol_info(symbol):
                 return 0.01  # Default minimum
             
             # Risk amount in account currency
             risk_amount = account_balance * (risk_percent / 100)
             
-            # Get point value
-            point = symbol_info['point']
-            contract_size = symbol_info['trade_contract_size']
-            
-            # Calculate pip value
-            if 'JPY' in symbol:
-                pip_value = (point * 100) * contract_size
-            else:
-                pip_value = point * contract_size
-            
-            # Calculate lot size
-            lot_size = risk_amount / (stop_loss_pips * pip_value)
-            
-            # Round to volume step
-            volume_step = symbol_info['volume_step']
-            lot_size = round(lot_size / volume_step) * volume_step
+            # Pip value from tick value/size, rounded to volume step and clamped to limits
+            lot_size = self.symbols.lot_size(symbol, risk_amount, stop_loss_pips)
             
-            # Ensure within limits
-            lot_size = max(symbol_info['volume_min'], 
-                          min(lot_size, symbol_info['volume_max']))
+            if lot_size is None:
+                return 0.01
             
             logger.info(f"Calculated lot size for {symbol}: {lot_size} "
                        f"(Risk: {risk_percent}%, SL: {stop_loss_pips} pips)")
@@ -201,26 +304,26 @@ class MT5Connection:
             logger.error(f"Error calculating lot size: {e}", exc_info=True)
             return 0.01
     
-    def get_account_balance(self) -> float:
+    async def get_account_balance(self) -> float:
         """Get current account balance"""
         try:
             if not self.connected:
                 return 0.0
             
-            account_info = mt5.account_info()
+            account_info = await self.gateway.call('account_info')
             return account_info.balance if account_info else 0.0
             
         except Exception as e:
             logger.error(f"Error getting account balance: {e}")
             return 0.0
     
-    def get_account_equity(self) -> float:
+    async def get_account_equity(self) -> float:
         """Get current account equity"""
         try:
             if not self.connected:
                 return 0.0
             
-            account_info = mt5.account_info()
+            account_info = await self.gateway.call('account_info')
             return account_info.equity if account_info else 0.0
             
         except Exception as e:
@@ -234,7 +337,7 @@ class MT5Connection:
                 return False
             
             # Try to get account info
-            account_info = mt5.account_info()
+            account_info = await self.gateway.call('account_info')
             
             if account_info is None:
                 self.connected = False
@@ -0,0 +1,177 @@
+"""
+MT5 Gateway - Single owner of the MetaTrader 5 terminal
+Runs every terminal call on one worker thread behind an asyncio-friendly request queue
+"""
+
+import asyncio
+import contextvars
+import time
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# Set while the current task holds the gateway exclusively
+_exclusive_owner = contextvars.ContextVar('mt5_gateway_exclusive', default=None)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram for one request type"""
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.cancelled = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, latency_ms: float):
+        self.counts[bisect_left(LATENCY_BUCKETS_MS, latency_ms)] += 1
+        self.calls += 1
+        self.total_ms += latency_ms
+        self.max_ms = max(self.max_ms, latency_ms)
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound of the bucket holding the given fraction of calls"""
+        if self.calls == 0:
+            return 0.0
+
+        target = fraction * self.calls
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= target and i < len(LATENCY_BUCKETS_MS):
+                return min(float(LATENCY_BUCKETS_MS[i]), self.max_ms)
+        return self.max_ms
+
+    def to_dict(self) -> Dict:
+        labels = [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'timeouts': self.timeouts,
+            'cancelled': self.cancelled,
+            'avg_ms': self.total_ms / self.calls if self.calls > 0 else 0.0,
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'max_ms': self.max_ms,
+            'histogram': dict(zip(labels, self.counts))
+        }
+
+
+class MT5Gateway:
+    """Serializes all MetaTrader 5 access onto a single worker thread"""
+
+    def __init__(self, backend=None, default_timeout: float = 30.0):
+        self._backend = backend  # MetaTrader5 module or a compatible fake terminal
+        self.default_timeout = default_timeout
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='mt5-gateway')
+        self._lock = asyncio.Lock()
+        self._stats: Dict[str, LatencyHistogram] = {}
+
+    @property
+    def backend(self):
+        """The terminal API; imports MetaTrader5 on first use unless a backend was injected"""
+        if self._backend is None:
+            import MetaTrader5
+            self._backend = MetaTrader5
+        return self._backend
+
+    def _histogram(self, name: str) -> LatencyHistogram:
+        if name not in self._stats:
+            self._stats[name] = LatencyHistogram()
+        return self._stats[name]
+
+    async def call(self, name: str, *args, call_timeout: Optional[float] = None, **kwargs) -> Any:
+        """
+        Run backend.<name>(*args, **kwargs) on the gateway thread
+        Raises asyncio.TimeoutError after `call_timeout` seconds (default_timeout if None);
+        a request still waiting in the queue when it times out or is cancelled never runs
+        """
+        backend = self.backend
+        func = getattr(backend, name)
+        timeout = self.default_timeout if call_timeout is None else call_timeout
+        histogram = self._histogram(name)
+        started = time.perf_counter()
+
+        try:
+            if _exclusive_owner.get() is not None:
+                return await self._submit(func, args, kwargs, timeout)
+
+            async with self._lock:
+                return await self._submit(func, args, kwargs, timeout)
+
+        except asyncio.TimeoutError:
+            histogram.timeouts += 1
+            logger.warning(f"MT5 call {name} timed out after {timeout}s")
+            raise
+        except asyncio.CancelledError:
+            histogram.cancelled += 1
+            raise
+        except Exception:
+            histogram.errors += 1
+            raise
+        finally:
+            histogram.record((time.perf_counter() - started) * 1000)
+
+    async def _submit(self, func, args: tuple, kwargs: Dict, timeout: float) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, lambda: func(*args, **kwargs))
+        return await asyncio.wait_for(future, timeout=timeout)
+
+    @asynccontextmanager
+    async def exclusive(self):
+        """
+        Hold the terminal for a multi-step sequence (initialize, login, order, shutdown)
+        Calls made by the holding task run immediately; all other callers wait
+        """
+        if _exclusive_owner.get() is not None:
+            yield self
+            return
+
+        async with self._lock:
+            token = _exclusive_owner.set(self)
+            try:
+                yield self
+            finally:
+                _exclusive_owner.reset(token)
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """Latency histogram and error counts per request type"""
+        return {name: histogram.to_dict() for name, histogram in self._stats.items()}
+
+    def shutdown(self):
+        """Stop the gateway thread once queued requests have drained"""
+        self._executor.shutdown(wait=False)
+
+
+_default_gateway: Optional[MT5Gateway] = None
+
+
+def get_gateway() -> MT5Gateway:
+    """Process-wide gateway shared by every MT5 module"""
+    global _default_gateway
+    if _default_gateway is None:
+        from src.config.settings import Config
+        backend = None
+        if Config.MT5_BACKEND == 'simulator':
+            from src.mt5.simulator import SimulatedTerminal
+            backend = SimulatedTerminal.from_config(Config)
+            logger.info("Using the simulated MT5 terminal")
+        _default_gateway = MT5Gateway(backend=backend, default_timeout=Config.MT5_CALL_TIMEOUT)
+    return _default_gateway
+
+
+def set_gateway(gateway: MT5Gateway):
+    """Replace the shared gateway, e.g. with one wrapping a fake terminal"""
+    global _default_gateway
+    _default_gateway = gateway
@@ -3,10 +3,16 @@ Multi-User MT5 Auto-Executor
 Executes trades on each user's own MT5 accounts
 """
 
-import MetaTrader5 as mt5
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Tuple
 from datetime import datetime
 import asyncio
+import time
+from contextlib import asynccontextmanager
+import numpy as np
+from src.mt5.gateway import MT5Gateway, LatencyHistogram, get_gateway
+from src.mt5.account_workers import AccountWorkerPool
+from src.mt5.position_reconciler import PositionReconciler, OPEN, PENDING
+from src.mt5.symbol_registry import SymbolRegistry, get_symbol_registry
 from src.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -15,12 +21,36 @@ logger = setup_logger(__name__)
 class MultiUserMT5Executor:
     """Handles trade execution across multiple user accounts"""
     
-    def __init__(self, account_manager, config):
+    def __init__(self, account_manager, config, gateway: Optional[MT5Gateway] = None):
         self.account_manager = account_manager
         self.config = config
+        self.gateway = gateway or get_gateway()
+        self.symbols = get_symbol_registry() if gateway is None else SymbolRegistry(gateway, config.SYMBOL_SPECS_FILE)
         self.active_connections = {}  # {account_id: connection_info}
+        
+        # Warm per-account terminal sessions in worker processes (else login/trade/shutdown on the gateway)
+        self.workers = None
+        if getattr(config, 'ACCOUNT_WORKERS_ENABLED', False):
+            try:
+                self.workers = AccountWorkerPool.from_config(config)
+            except ValueError as e:
+                logger.error(f"Account workers disabled: {e}")
+        if self.workers is None:
+            logger.warning("User trades run on the bot's own MT5 terminal: every execution logs it into the "
+                           "user account and shuts it down. Set ACCOUNT_WORKERS_ENABLED and MT5_TERMINAL_PATHS "
+                           "to keep the market-data session up")
         self.user_positions = {}  # {user_id: {signal_id: [tickets]}}
         
+        # Tracked tickets are checked against each account's positions/orders once per cycle
+        self.reconciler = PositionReconciler()
+        
+        # Time from the start of a signal's fan-out until each account's order is accepted
+        self.fill_latency = LatencyHistogram()
+        self.deadline_misses = 0
+        
+        # Last known balance per account, used to size a signal for all accounts in one step
+        self.account_balances = {}  # {account_id: (balance, monotonic time read)}
+        
     async def execute_signal_for_all_users(self, signal: Dict) -> Dict:
         """
         Execute signal on all enabled user accounts
@@ -35,14 +65,28 @@ class MultiUserMT5Executor:
             logger.info("No enabled accounts for execution")
             return results
         
-        # Execute on each user's accounts
+        # Fan out to every account at once, at most EXECUTION_CONCURRENCY orders in flight
+        jobs = [(user_id, account) for user_id, accounts in all_enabled.items() for account in accounts]
+        lot_sizes = await self._size_orders(signal, jobs)
+        semaphore = asyncio.Semaphore(max(1, self.config.EXECUTION_CONCURRENCY))
+        submitted_at = time.perf_counter()
+        outcomes = await asyncio.gather(
+            *(self._execute_with_deadline(user_id, account, signal, semaphore, submitted_at,
+                                          lot_sizes.get(account['account_id']))
+              for user_id, account in jobs),
+            return_exceptions=True
+        )
+        outcomes = iter(outcomes)
+        
+        # Collect results per user, in account order
         for user_id, accounts in all_enabled.items():
             user_results = {}
             
             for account in accounts:
                 try:
-                    # Execute trade
-                    ticket = await self._execute_on_account(user_id, account, signal)
+                    ticket = next(outcomes)
+                    if isinstance(ticket, Exception):
+                        raise ticket
                     
                     if ticket:
                         user_results[account['account_id']] = ticket
@@ -53,11 +97,17 @@ class MultiUserMT5Executor:
                         if signal['signal_id'] not in self.user_positions[user_id]:
                             self.user_positions[user_id][signal['signal_id']] = []
                         
-                        self.user_positions[user_id][signal['signal_id']].append({
+                        position = {
                             'account_id': account['account_id'],
                             'ticket': ticket,
-                            'account_nickname': account['nickname']
-                        })
+                            'account_nickname': account['nickname'],
+                            'user_id': user_id,
+                            'signal_id': signal['signal_id'],
+                            'state': OPEN if signal['entry_type'] == 'MARKET' else PENDING
+                        }
+                        self.user_positions[user_id][signal['signal_id']].append(position)
+                        if self.workers is not None:
+                            self.reconciler.track(account['account_id'], position)
                         
                         # Increment trade count
                         self.account_manager.increment_trade_count(user_id, account['account_id'])
@@ -73,31 +123,204 @@ class MultiUserMT5Executor:
         
         return results
     
-    async def _execute_on_account(self, user_id: str, account: Dict, signal: Dict) -> Optional[int]:
-        """Execute trade on a specific user account"""
+    async def _size_orders(self, signal: Dict, jobs: List[Tuple[str, Dict]]) -> Dict[str, float]:
+        """
+        Lot sizes for every account with a recent balance, from one contract lookup and one array
+        operation; the remaining accounts are sized from their balance once logged in
+        Balances of accounts with a logged-in worker are read first, all at once.
+        """
         try:
-            # Get account credentials
-            credentials = self.account_manager.get_account_credentials(
-                user_id, 
-                account['account_id']
-            )
+            symbol = signal['symbol']
+            await self._refresh_balances(jobs)
+            now = time.monotonic()
+            
+            accounts = [account for _, account in jobs]
+            account_ids, balances = [], []
+            for account in accounts:
+                known = self.account_balances.get(account['account_id'])
+                if known and now - known[1] <= self.config.BALANCE_MAX_AGE:
+                    account_ids.append(account['account_id'])
+                    balances.append(known[0])
+            
+            if not account_ids:
+                return {}
+            
+            if self.symbols.get(symbol) is None and not await self.symbols.refresh(symbol):
+                return {}
             
+            risk_amounts = np.asarray(balances) * (self.config.MAX_RISK_PERCENT / 100)
+            lots = self.symbols.lot_sizes(symbol, risk_amounts, signal['sl_pips'])
+            if lots is None:
+                return {}
+            
+            logger.info(f"Sized {symbol} for {len(account_ids)}/{len(accounts)} accounts in one step")
+            return dict(zip(account_ids, lots.tolist()))
+            
+        except Exception as e:
+            logger.error(f"Error sizing orders for {signal['symbol']}: {e}")
+            return {}
+    
+    async def _refresh_balances(self, jobs: List[Tuple[str, Dict]]):
+        """Read the balance of every account whose worker is already logged in, concurrently"""
+        if self.workers is None:
+            return
+        
+        warm = [(user_id, account) for user_id, account in jobs if self.workers.logged_in(account['account_id'])]
+        if not warm:
+            return
+        
+        semaphore = asyncio.Semaphore(max(1, self.config.EXECUTION_CONCURRENCY))
+        results = await asyncio.gather(
+            *(self._read_balance(user_id, account['account_id'], semaphore) for user_id, account in warm),
+            return_exceptions=True
+        )
+        for (_, account), result in zip(warm, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Could not read balance for {account['account_id']}: {result}")
+    
+    async def _read_balance(self, user_id: str, account_id: str, semaphore: asyncio.Semaphore):
+        """Store the account's current balance for up-front lot sizing"""
+        async with semaphore:
+            credentials = self.account_manager.get_account_credentials(user_id, account_id)
             if not credentials:
-                logger.error(f"Could not get credentials for account {account['account_id']}")
-                return None
+                return
             
-            # Connect to this specific account
-            if not await self._connect_to_account(credentials, account['account_id']):
-                logger.error(f"Failed to connect to account {account['login']}")
+            async with self.workers.session(account_id, credentials) as terminal:
+                account_info = await terminal.call('account_info')
+            if account_info:
+                self.account_balances[account_id] = (account_info.balance, time.monotonic())
+    
+    async def _execute_with_deadline(self, user_id: str, account: Dict, signal: Dict,
+                                     semaphore: asyncio.Semaphore, submitted_at: float,
+                                     lot_size: Optional[float] = None) -> Optional[int]:
+        """Execute on one account under the concurrency cap"""
+        async with semaphore:
+            try:
+                ticket = await self._execute_on_account(user_id, account, signal, lot_size)
+            except asyncio.TimeoutError:
+                # A request already handed to the terminal may still fill; it is not tracked
+                self.deadline_misses += 1
+                raise TimeoutError(f"no fill within {self.config.EXECUTION_ACCOUNT_DEADLINE}s "
+                                   f"(an order already sent may still be filled - check the account)")
+        
+        if ticket:
+            self.fill_latency.record((time.perf_counter() - submitted_at) * 1000)
+        return ticket
+    
+    async def _execute_on_account(self, user_id: str, account: Dict, signal: Dict,
+                                  lot_size: Optional[float] = None) -> Optional[int]:
+        """
+        Execute trade on a specific user account
+        The order is abandoned after EXECUTION_ACCOUNT_DEADLINE, counted from when the account holds
+        its terminal - time spent queued for the shared gateway or a busy worker does not count.
+        """
+        # Get account credentials
+        credentials = self.account_manager.get_account_credentials(
+            user_id, 
+            account['account_id']
+        )
+        
+        if not credentials:
+            logger.error(f"Could not get credentials for account {account['account_id']}")
+            return None
+        
+        try:
+            async with self._account_session(account['account_id'], credentials) as terminal:
+                return await asyncio.wait_for(
+                    self._trade_on_account(terminal, account, signal, lot_size),
+                    timeout=self.config.EXECUTION_ACCOUNT_DEADLINE
+                )
+        except asyncio.TimeoutError:
+            raise
+        except Exception as e:
+            logger.error(f"Error executing on account {account['login']}: {e}", exc_info=True)
+            return None
+    
+    @asynccontextmanager
+    async def _account_session(self, account_id: str, credentials: Dict):
+        """A terminal logged into the account, for one sequence of calls"""
+        if self.workers is not None:
+            # The account's worker stays logged in between trades
+            async with self.workers.session(account_id, credentials) as terminal:
+                yield terminal
+            return
+        
+        # Login, calls and shutdown run as one sequence - no other terminal request may interleave
+        async with self.gateway.exclusive():
+            try:
+                # Connect to this specific account
+                if not await self._connect_to_account(credentials, account_id):
+                    raise ConnectionError(f"Failed to connect to account {credentials['login']}")
+                
+                yield self.gateway
+                
+            finally:
+                # Always shutdown MT5 connection afterwards
+                try:
+                    await self.gateway.call('shutdown')
+                except:
+                    pass
+    
+    async def reconcile_positions(self) -> List[Dict]:
+        """
+        Check every tracked ticket against its account's terminal state
+        One positions_get and one orders_get per account with live tickets (plus account_info,
+        which keeps the balances used for up-front lot sizing fresh), so the cost of a cycle
+        grows with accounts rather than tickets. Returns the fill/close/modify events.
+        Runs only on account workers: without them each account would need a login on the
+        bot's own market-data terminal.
+        """
+        accounts = self.reconciler.accounts()
+        if self.workers is None or not accounts:
+            return []
+        
+        semaphore = asyncio.Semaphore(max(1, self.config.EXECUTION_CONCURRENCY))
+        results = await asyncio.gather(
+            *(self._reconcile_account(account_id, semaphore) for account_id in accounts),
+            return_exceptions=True
+        )
+        
+        events = []
+        for account_id, result in zip(accounts, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error reconciling account {account_id}: {result}")
+            elif result:
+                events.extend(result)
+        
+        for event in events:
+            logger.info(f"Position {event['event']} for user {event['user_id']} on "
+                        f"{event['account_nickname']}: Ticket {event['ticket']}")
+        return events
+    
+    async def _reconcile_account(self, account_id: str, semaphore: asyncio.Semaphore) -> Optional[List[Dict]]:
+        """Reconcile one account's tickets in a single session"""
+        async with semaphore:
+            # Any tracked entry names the account's owner
+            user_id = next(iter(self.reconciler.tracked(account_id).values()))['user_id']
+            credentials = self.account_manager.get_account_credentials(user_id, account_id)
+            if not credentials:
+                logger.error(f"Could not get credentials for account {account_id}")
                 return None
             
+            async with self.workers.session(account_id, credentials) as terminal:
+                account_info = await terminal.call('account_info')
+                if account_info:
+                    self.account_balances[account_id] = (account_info.balance, time.monotonic())
+                
+                return await self.reconciler.reconcile(account_id, terminal)
+    
+    async def _trade_on_account(self, terminal, account: Dict, signal: Dict,
+                                lot_size: Optional[float] = None) -> Optional[int]:
+        """Place the signal's order on a terminal logged into the account, sizing it here if needed"""
+        if lot_size is None:
             # Get account balance
-            account_info = mt5.account_info()
+            account_info = await terminal.call('account_info')
             if not account_info:
                 logger.error(f"Could not get account info for {account['login']}")
                 return None
             
             balance = account_info.balance
+            self.account_balances[account['account_id']] = (balance, time.monotonic())
             
             # Calculate lot size based on this account's balance
             lot_size = await self._calculate_lot_size(
@@ -106,76 +329,71 @@ class MultiUserMT5Executor:
                 signal['sl_pips'],
                 balance
             )
-            
-            # Execute based on order type
-            entry_type = signal['entry_type']
-            direction = signal['direction']
-            
-            if entry_type == 'MARKET':
-                ticket = await self._place_market_order(
-                    signal['symbol'],
-                    direction,
-                    lot_size,
-                    signal['stop_loss'],
-                    signal['take_profit'],
-                    account['nickname']
-                )
-            elif entry_type in ['BUY_LIMIT', 'SELL_LIMIT']:
-                ticket = await self._place_limit_order(
-                    signal['symbol'],
-                    direction,
-                    signal['entry_price'],
-                    lot_size,
-                    signal['stop_loss'],
-                    signal['take_profit'],
-                    account['nickname']
-                )
-            elif entry_type in ['BUY_STOP', 'SELL_STOP']:
-                ticket = await self._place_stop_order(
-                    signal['symbol'],
-                    direction,
-                    signal['entry_price'],
-                    lot_size,
-                    signal['stop_loss'],
-                    signal['take_profit'],
-                    account['nickname']
-                )
-            else:
-                logger.error(f"Unknown order type: {entry_type}")
-                return None
-            
-            return ticket
-            
-        except Exception as e:
-            logger.error(f"Error executing on account: {e}", exc_info=True)
+        
+        # Execute based on order type
+        entry_type = signal['entry_type']
+        direction = signal['direction']
+        
+        if entry_type == 'MARKET':
+            ticket = await self._place_market_order(
+                terminal,
+                signal['symbol'],
+                direction,
+                lot_size,
+                signal['stop_loss'],
+                signal['take_profit'],
+                account['nickname']
+            )
+        elif entry_type in ['BUY_LIMIT', 'SELL_LIMIT']:
+            ticket = await self._place_limit_order(
+                terminal,
+                signal['symbol'],
+                direction,
+                signal['entry_price'],
+                lot_size,
+                signal['stop_loss'],
+                signal['take_profit'],
+                account['nickname']
+            )
+        elif entry_type in ['BUY_STOP', 'SELL_STOP']:
+            ticket = await self._place_stop_order(
+                terminal,
+                signal['symbol'],
+                direction,
+                signal['entry_price'],
+                lot_size,
+                signal['stop_loss'],
+                signal['take_profit'],
+                account['nickname']
+            )
+        else:
+            logger.error(f"Unknown order type: {entry_type}")
             return None
-        finally:
-            # Always shutdown MT5 connection after trade
-            try:
-                mt5.shutdown()
-            except:
-                pass
+        
+        return ticket
     
     async def _connect_to_account(self, credentials: Dict, account_id: str) -> bool:
         """Connect to a specific MT5 account"""
         try:
             # Initialize MT5
-            if not mt5.initialize():
+            if not await self.gateway.call('initialize', call_timeout=90):
                 logger.error(f"MT5 initialization failed for account {account_id}")
                 return False
             
             # Login to account
-            authorized = mt5.login(
+            authorized = await self.gateway.call(
+                'login',
                 login=credentials['login'],
                 password=credentials['password'],
                 server=credentials['server'],
-                timeout=60000
+                timeout=60000,
+                call_timeout=90
             )
             
             if not authorized:
-                error = mt5.last_error()
+                error = await self.gateway.call('last_error')
                 logger.error(f"MT5 login failed for {credentials['login']}: {error}")
-                mt5.shutdown()
+                await self.gateway.call('shutdown')
                 return False
             
             logger.info(f"Connected to MT5 account: {credentials['login']}")
@@ -189,7 +407,7 @@ class MultiUserMT5Executor:
                                    stop_loss_pips: float, account_balance: float) -> float:
         """Calculate lot size based on account balance and risk"""
         try:
-            symbol_info = mt5.symbol_info(symbol)
+            symbol_info = self.symbols.get(symbol) or await self.symbols.refresh(symbol)
             
             if not symbol_info:
                 logger.warning(f"Could not get symbol info for {symbol}, using default 0.01")
@@ -198,26 +416,12 @@ class MultiUserMT5Executor:
             # Risk amount
             risk_amount = account_balance * (risk_percent / 100)
             
-            # Get point value
-            point = symbol_info.point
-            contract_size = symbol_info.trade_contract_size
-            
-            # Calculate pip value
-            if 'JPY' in symbol:
-                pip_value = (point * 100) * contract_size
-            else:
-                pip_value = point * contract_size
-            
-            # Calculate lot size
-            lot_size = risk_amount / (stop_loss_pips * pip_value)
+            # Pip value from tick value/size, rounded to volume step and clamped to limits
+            lot_size = self.symbols.lot_size(symbol, risk_amount, stop_loss_pips)
             
-            # Round to volume step
-            volume_step = symbol_info.volume_step
-            lot_size = round(lot_size / volume_step) * volume_step
-            
-            # Ensure within limits
-            lot_size = max(symbol_info.volume_min, 
-                          min(lot_size, symbol_info.volume_max))
+            if lot_size is None:
+                logger.warning(f"No pip value for {symbol}, using default 0.01")
+                return 0.01
             
             logger.info(f"Calculated lot size: {lot_size} (Risk: {risk_percent}%, Balance: ${account_balance:.2f})")
             
@@ -227,16 +431,18 @@ class MultiUserMT5Executor:
             logger.error(f"Error calculating lot size: {e}")
             return 0.01
     
-    async def _place_market_order(self, symbol: str, direction: str, lot_size: float,
+    async def _place_market_order(self, terminal, symbol: str, direction: str, lot_size: float,
                                    sl: float, tp: float, account_name: str) -> Optional[int]:
         """Place market order"""
         try:
-            symbol_info = mt5.symbol_info(symbol)
-            if not symbol_info:
+            mt5 = terminal.backend
+            
+            tick = await terminal.call('symbol_info_tick', symbol)
+            if not tick:
                 return None
             
             order_type = mt5.ORDER_TYPE_BUY if direction == 'BUY' else mt5.ORDER_TYPE_SELL
-            price = symbol_info.ask if direction == 'BUY' else symbol_info.bid
+            price = tick.ask if direction == 'BUY' else tick.bid
             
             request = {
                 "action": mt5.TRADE_ACTION_DEAL,
@@ -253,7 +459,7 @@ class MultiUserMT5Executor:
                 "type_filling": mt5.ORDER_FILLING_IOC,
             }
             
-            result = mt5.order_send(request)
+            result = await terminal.call('order_send', request)
             
             if result.retcode != mt5.TRADE_RETCODE_DONE:
                 logger.error(f"Market order failed on {account_name}: {result.comment}")
@@ -265,12 +471,14 @@ class MultiUserMT5Executor:
             logger.error(f"Error placing market order: {e}")
             return None
     
-    async def _place_limit_order(self, symbol: str, direction: str, entry: float,
+    async def _place_limit_order(self, terminal, symbol: str, direction: str, entry: float,
                                   lot_size: float, sl: float, tp: float, 
                                   account_name: str) -> Optional[int]:
         """Place limit order"""
         try:
-            symbol_info = mt5.symbol_info(symbol)
+            mt5 = terminal.backend
+            
+            symbol_info = self.symbols.get(symbol) or await self.symbols.refresh(symbol)
             if not symbol_info:
                 return None
             
@@ -291,7 +499,7 @@ class MultiUserMT5Executor:
                 "type_filling": mt5.ORDER_FILLING_RETURN,
             }
             
-            result = mt5.order_send(request)
+            result = await terminal.call('order_send', request)
             
             if result.retcode != mt5.TRADE_RETCODE_DONE:
                 logger.error(f"Limit order failed on {account_name}: {result.comment}")
@@ -303,12 +511,14 @@ class MultiUserMT5Executor:
             logger.error(f"Error placing limit order: {e}")
             return None
     
-    async def _place_stop_order(self, symbol: str, direction: str, entry: float,
+    async def _place_stop_order(self, terminal, symbol: str, direction: str, entry: float,
                                  lot_size: float, sl: float, tp: float,
                                  account_name: str) -> Optional[int]:
         """Place stop order"""
         try:
-            symbol_info = mt5.symbol_info(symbol)
+            mt5 = terminal.backend
+            
+            symbol_info = self.symbols.get(symbol) or await self.symbols.refresh(symbol)
             if not symbol_info:
                 return None
             
@@ -329,7 +539,7 @@ class MultiUserMT5Executor:
                 "type_filling": mt5.ORDER_FILLING_RETURN,
             }
             
-            result = mt5.order_send(request)
+            result = await terminal.call('order_send', request)
             
             if result.retcode != mt5.TRADE_RETCODE_DONE:
                 logger.error(f"Stop order failed on {account_name}: {result.comment}")
@@ -341,6 +551,23 @@ class MultiUserMT5Executor:
             logger.error(f"Error placing stop order: {e}")
             return None
     
+    def get_execution_stats(self) -> Dict:
+        """Submit-to-fill latency distribution across all fan-outs"""
+        return {**self.fill_latency.to_dict(), 'deadline_misses': self.deadline_misses}
+    
+    def get_reconciler_stats(self) -> Dict:
+        """Reconciliation cycles and fill/close/modify counts"""
+        return self.reconciler.get_stats()
+    
+    def get_worker_stats(self) -> Optional[Dict]:
+        """Account worker pool state and login latencies (None when workers are disabled)"""
+        return self.workers.get_stats() if self.workers is not None else None
+    
+    def close(self):
+        """Stop the account worker processes"""
+        if self.workers is not None:
+            self.workers.close()
+    
     def get_user_positions(self, user_id: str, signal_id: str) -> List[Dict]:
         """Get positions for a user's signal"""
         if user_id not in self.user_positions:
@@ -0,0 +1,119 @@
+"""
+Position Reconciler - Tracked tickets checked against the terminal in bulk
+Pulls every open position and pending order of an account in one call each and diffs them against the tracked tickets
+"""
+
+from typing import Dict, Iterable, List, Optional
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Ticket states
+PENDING = 'pending'
+OPEN = 'open'
+CLOSED = 'closed'
+CANCELLED = 'cancelled'
+
+# Change events besides reaching CLOSED or CANCELLED
+FILLED = 'filled'
+MODIFIED = 'modified'
+
+
+def diff_tickets(tracked: Dict[int, Dict], positions: Iterable, orders: Iterable) -> List[Dict]:
+    """
+    Changes of tracked tickets against one account's open positions and pending orders
+    `tracked` maps ticket -> entry with a 'state' (PENDING or OPEN) and the last seen 'sl'/'tp'/'volume';
+    entries are updated in place and one event is returned per changed ticket.
+    Those values are seeded from the first cycle that sees the ticket, so MODIFIED compares the broker's
+    normalized prices with themselves rather than with the signal's unrounded levels.
+    A filled pending order keeps its ticket: MT5 identifies the resulting position by the order ticket.
+    An order that fills and closes between two cycles is only seen to disappear, so it reads as CANCELLED.
+    """
+    open_positions = {getattr(p, 'identifier', p.ticket): p for p in positions}
+    pending_orders = {o.ticket: o for o in orders}
+    events = []
+
+    for ticket, entry in tracked.items():
+        position = open_positions.get(ticket)
+        order = pending_orders.get(ticket)
+
+        if position is not None:
+            seen = {'sl': position.sl, 'tp': position.tp, 'volume': position.volume}
+            if entry['state'] == PENDING:
+                event = FILLED
+            elif any(entry.get(key) is not None and entry[key] != value for key, value in seen.items()):
+                event = MODIFIED
+            else:
+                event = None
+            entry.update(seen, state=OPEN, price_open=position.price_open, profit=position.profit)
+        elif order is not None:
+            seen = {'sl': order.sl, 'tp': order.tp, 'price_open': order.price_open}
+            changed = any(entry.get(key) is not None and entry[key] != value for key, value in seen.items())
+            event = MODIFIED if changed else None
+            entry.update(seen, state=PENDING, volume=order.volume_current)
+        else:
+            event = CLOSED if entry['state'] == OPEN else CANCELLED
+            entry['state'] = event
+
+        if event is not None:
+            events.append(dict(entry, ticket=ticket, event=event))
+
+    return events
+
+
+class PositionReconciler:
+    """
+    Ticket state per account, refreshed with one positions_get and one orders_get per account
+    Works with anything exposing the gateway calling convention (`await terminal.call(name)`),
+    such as an account worker.
+    """
+
+    def __init__(self):
+        self._tracked: Dict[str, Dict[int, Dict]] = {}  # {account_key: {ticket: entry}}
+        self.stats = {'cycles': 0, 'failed': 0, FILLED: 0, MODIFIED: 0, CLOSED: 0, CANCELLED: 0}
+
+    def track(self, account_key: str, entry: Dict):
+        """Follow entry['ticket'] on the account; the entry dict is updated in place on each cycle"""
+        entry.setdefault('state', OPEN)
+        self._tracked.setdefault(account_key, {})[entry['ticket']] = entry
+
+    def forget(self, account_key: str, ticket: int):
+        tickets = self._tracked.get(account_key)
+        if tickets is not None:
+            tickets.pop(ticket, None)
+            if not tickets:
+                del self._tracked[account_key]
+
+    def accounts(self) -> List[str]:
+        """Accounts with at least one live ticket"""
+        return list(self._tracked)
+
+    def tracked(self, account_key: str) -> Dict[int, Dict]:
+        return self._tracked.get(account_key, {})
+
+    async def reconcile(self, account_key: str, terminal) -> Optional[List[Dict]]:
+        """
+        Diff the account's tracked tickets against the terminal and drop closed/cancelled ones
+        Returns the change events, or None if the terminal could not be read
+        """
+        positions = await terminal.call('positions_get')
+        orders = await terminal.call('orders_get')
+        if positions is None or orders is None:
+            self.stats['failed'] += 1
+            logger.warning(f"Could not read positions/orders for {account_key}")
+            return None
+
+        self.stats['cycles'] += 1
+
+        tickets = self._tracked.get(account_key, {})
+        events = diff_tickets(tickets, positions, orders)
+
+        for event in events:
+            self.stats[event['event']] += 1
+            if event['event'] in (CLOSED, CANCELLED):
+                self.forget(account_key, event['ticket'])
+        return events
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, 'accounts': len(self._tracked),
+                'tickets': sum(len(tickets) for tickets in self._tracked.values())}
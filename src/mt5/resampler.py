@@ -0,0 +1,85 @@
+"""
+Bar Resampler - Higher timeframes built from one stored base timeframe
+Aggregates MT5 rate arrays into H1/H4/... bars aligned to broker server time, updating only the open bar
+"""
+
+from typing import Dict, Tuple
+import numpy as np
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+def resample_rates(base: np.ndarray, minutes: int) -> np.ndarray:
+    """
+    Aggregate MT5 rates into `minutes` bars
+    MT5 bar times are broker server time, so flooring them to the bar length gives the same
+    bar boundaries the terminal uses. Result has the dtype of `base`.
+    """
+    if len(base) == 0:
+        return base[:0]
+
+    seconds = minutes * 60
+    buckets = base['time'] // seconds * seconds
+    boundaries = np.flatnonzero(np.diff(buckets)) + 1
+    starts = np.concatenate(([0], boundaries))
+    ends = np.concatenate((boundaries, [len(base)])) - 1
+
+    bars = np.empty(len(starts), dtype=base.dtype)
+    bars['time'] = buckets[starts]
+    bars['open'] = base['open'][starts]
+    bars['high'] = np.maximum.reduceat(base['high'], starts)
+    bars['low'] = np.minimum.reduceat(base['low'], starts)
+    bars['close'] = base['close'][ends]
+
+    names = base.dtype.names
+    if 'tick_volume' in names:
+        bars['tick_volume'] = np.add.reduceat(base['tick_volume'], starts)
+    if 'real_volume' in names:
+        bars['real_volume'] = np.add.reduceat(base['real_volume'], starts)
+    if 'spread' in names:
+        bars['spread'] = np.minimum.reduceat(base['spread'], starts)
+
+    return bars
+
+
+class BarResampler:
+    """Resampled series per (symbol, minutes); each update re-aggregates only the newest bar"""
+
+    def __init__(self):
+        self._series: Dict[Tuple[str, int], np.ndarray] = {}
+        self.stats = {'full': 0, 'incremental': 0}
+
+    def update(self, symbol: str, minutes: int, base: np.ndarray) -> np.ndarray:
+        """Resampled bars for the whole base history; base must be sorted by time"""
+        key = (symbol, minutes)
+        cached = self._series.get(key)
+
+        if len(base) == 0:
+            return base[:0]
+
+        seconds = minutes * 60
+        if (cached is not None and len(cached) > 0 and cached.dtype == base.dtype
+                and base['time'][0] <= cached['time'][-1]):
+            # The last cached bar may still be forming - rebuild it and anything newer
+            tail = resample_rates(base[base['time'] >= cached['time'][-1]], minutes)
+            bars = np.concatenate([cached[:-1], tail])
+            self.stats['incremental'] += 1
+        else:
+            bars = resample_rates(base, minutes)
+            self.stats['full'] += 1
+
+        # Bars older than the base history are dropped, and so is a first bar that is
+        # only partly covered by it
+        first_complete = -(-base['time'][0] // seconds) * seconds
+        bars = bars[bars['time'] >= first_complete]
+
+        self._series[key] = bars
+        return bars
+
+    def clear(self, symbol: str = None):
+        for key in [k for k in self._series if symbol is None or k[0] == symbol]:
+            del self._series[key]
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, 'series': len(self._series)}
@@ -0,0 +1,711 @@
+"""
+Simulated MT5 Terminal - Offline stand-in for the MetaTrader5 module
+Serves bars, ticks, symbol specs, accounts and order fills from recorded or synthetic M1 data
+"""
+
+import glob
+import os
+import random
+import time
+import zlib
+from collections import namedtuple
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+import numpy as np
+from src.mt5.resampler import resample_rates
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# MetaTrader5 constants used by the bot (same values as the real module)
+TIMEFRAME_M1 = 1
+TIMEFRAME_M5 = 5
+TIMEFRAME_M15 = 15
+TIMEFRAME_M30 = 30
+TIMEFRAME_H1 = 16385
+TIMEFRAME_H4 = 16388
+TIMEFRAME_D1 = 16408
+
+ORDER_TYPE_BUY = 0
+ORDER_TYPE_SELL = 1
+ORDER_TYPE_BUY_LIMIT = 2
+ORDER_TYPE_SELL_LIMIT = 3
+ORDER_TYPE_BUY_STOP = 4
+ORDER_TYPE_SELL_STOP = 5
+
+TRADE_ACTION_DEAL = 1
+TRADE_ACTION_PENDING = 5
+TRADE_ACTION_SLTP = 6
+TRADE_ACTION_REMOVE = 8
+
+ORDER_TIME_GTC = 0
+ORDER_FILLING_FOK = 0
+ORDER_FILLING_IOC = 1
+ORDER_FILLING_RETURN = 2
+
+TRADE_RETCODE_REQUOTE = 10004
+TRADE_RETCODE_REJECT = 10006
+TRADE_RETCODE_DONE = 10009
+TRADE_RETCODE_INVALID = 10013
+TRADE_RETCODE_INVALID_VOLUME = 10014
+TRADE_RETCODE_INVALID_PRICE = 10015
+TRADE_RETCODE_INVALID_STOPS = 10016
+TRADE_RETCODE_POSITION_CLOSED = 10036
+
+# Minutes per timeframe constant
+TIMEFRAME_MINUTES = {
+    TIMEFRAME_M1: 1, TIMEFRAME_M5: 5, TIMEFRAME_M15: 15, TIMEFRAME_M30: 30,
+    TIMEFRAME_H1: 60, TIMEFRAME_H4: 240, TIMEFRAME_D1: 1440
+}
+
+# Rates layout returned by copy_rates_* (matches the MetaTrader5 module)
+RATES_DTYPE = np.dtype([
+    ('time', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'), ('close', '<f8'),
+    ('tick_volume', '<u8'), ('spread', '<i4'), ('real_volume', '<u8')
+])
+
+# Result records, shaped like the MetaTrader5 named tuples the bot reads
+Tick = namedtuple('Tick', 'time bid ask last volume time_msc flags volume_real')
+SymbolInfo = namedtuple('SymbolInfo', (
+    'name point digits trade_contract_size volume_min volume_max volume_step trade_tick_size '
+    'currency_profit spread bid ask trade_tick_value visible'
+))
+AccountInfo = namedtuple('AccountInfo', 'login balance equity margin margin_free profit currency server leverage')
+TradePosition = namedtuple('TradePosition', (
+    'ticket time type magic volume price_open sl tp price_current profit symbol comment'
+))
+TradeOrder = namedtuple('TradeOrder', (
+    'ticket time_setup type magic volume_initial volume_current price_open sl tp price_current symbol comment'
+))
+OrderSendResult = namedtuple('OrderSendResult', 'retcode deal order volume price bid ask comment request_id request')
+
+# Synthetic market defaults by symbol root: (start price, digits, contract size, per-minute volatility)
+SYNTHETIC_MARKETS = {
+    'EURUSD': (1.08, 5, 100000, 0.00012),
+    'GBPUSD': (1.27, 5, 100000, 0.00015),
+    'USDJPY': (150.0, 3, 100000, 0.00012),
+    'AUDUSD': (0.66, 5, 100000, 0.00015),
+    'USDCAD': (1.36, 5, 100000, 0.00012),
+    'XAUUSD': (2000.0, 2, 100, 0.0003),
+    'XAGUSD': (23.0, 3, 5000, 0.0005),
+}
+DEFAULT_MARKET = (1.0, 5, 100000, 0.00015)
+
+
+def _symbol_root(symbol: str) -> str:
+    """Broker symbol without its account-type suffix (EURUSDm -> EURUSD)"""
+    return symbol[:6].upper()
+
+
+class LatencyModel:
+    """Per-call delay: a base latency plus uniform jitter, optionally overridden per API function"""
+
+    def __init__(self, base_ms: float = 0.0, jitter_ms: float = 0.0,
+                 overrides: Optional[Dict[str, float]] = None, seed: Optional[int] = None):
+        self.base_ms = base_ms
+        self.jitter_ms = jitter_ms
+        self.overrides = overrides or {}  # {function name: base ms}
+        self._rng = random.Random(seed)
+
+    def sample(self, name: str) -> float:
+        """Delay in seconds for one call"""
+        base = self.overrides.get(name, self.base_ms)
+        if base <= 0 and self.jitter_ms <= 0:
+            return 0.0
+        return max(0.0, base + self._rng.uniform(0, self.jitter_ms)) / 1000
+
+
+class FillModel:
+    """Market-order fills: adverse slippage up to `slippage_points` and random rejections"""
+
+    def __init__(self, slippage_points: float = 0.0, reject_rate: float = 0.0, seed: Optional[int] = None):
+        self.slippage_points = slippage_points
+        self.reject_rate = reject_rate
+        self._rng = random.Random(seed)
+
+    def rejected(self) -> bool:
+        return self.reject_rate > 0 and self._rng.random() < self.reject_rate
+
+    def slippage(self, point: float) -> float:
+        """Price distance against the trader"""
+        if self.slippage_points <= 0:
+            return 0.0
+        return self._rng.uniform(0, self.slippage_points) * point
+
+
+class SimulatedTerminal:
+    """
+    Implements the subset of the MetaTrader5 API the bot uses
+    The clock starts at `start_time` (default: now) and runs at `speed` times wall-clock time.
+    Symbols with an M1 (or other) .npy bar file in `data_dir` replay it; every other symbol
+    gets a deterministic synthetic random walk that is extended as the clock advances.
+    """
+
+    # MetaTrader5 module constants, read by the bot as attributes of the backend
+    TIMEFRAME_M1 = TIMEFRAME_M1
+    TIMEFRAME_M5 = TIMEFRAME_M5
+    TIMEFRAME_M15 = TIMEFRAME_M15
+    TIMEFRAME_M30 = TIMEFRAME_M30
+    TIMEFRAME_H1 = TIMEFRAME_H1
+    TIMEFRAME_H4 = TIMEFRAME_H4
+    TIMEFRAME_D1 = TIMEFRAME_D1
+    ORDER_TYPE_BUY = ORDER_TYPE_BUY
+    ORDER_TYPE_SELL = ORDER_TYPE_SELL
+    ORDER_TYPE_BUY_LIMIT = ORDER_TYPE_BUY_LIMIT
+    ORDER_TYPE_SELL_LIMIT = ORDER_TYPE_SELL_LIMIT
+    ORDER_TYPE_BUY_STOP = ORDER_TYPE_BUY_STOP
+    ORDER_TYPE_SELL_STOP = ORDER_TYPE_SELL_STOP
+    TRADE_ACTION_DEAL = TRADE_ACTION_DEAL
+    TRADE_ACTION_PENDING = TRADE_ACTION_PENDING
+    TRADE_ACTION_SLTP = TRADE_ACTION_SLTP
+    TRADE_ACTION_REMOVE = TRADE_ACTION_REMOVE
+    ORDER_TIME_GTC = ORDER_TIME_GTC
+    ORDER_FILLING_FOK = ORDER_FILLING_FOK
+    ORDER_FILLING_IOC = ORDER_FILLING_IOC
+    ORDER_FILLING_RETURN = ORDER_FILLING_RETURN
+    TRADE_RETCODE_REQUOTE = TRADE_RETCODE_REQUOTE
+    TRADE_RETCODE_REJECT = TRADE_RETCODE_REJECT
+    TRADE_RETCODE_DONE = TRADE_RETCODE_DONE
+    TRADE_RETCODE_INVALID = TRADE_RETCODE_INVALID
+    TRADE_RETCODE_INVALID_VOLUME = TRADE_RETCODE_INVALID_VOLUME
+    TRADE_RETCODE_INVALID_PRICE = TRADE_RETCODE_INVALID_PRICE
+    TRADE_RETCODE_INVALID_STOPS = TRADE_RETCODE_INVALID_STOPS
+    TRADE_RETCODE_POSITION_CLOSED = TRADE_RETCODE_POSITION_CLOSED
+
+    def __init__(self, data_dir: Optional[str] = None, start_time: Optional[float] = None,
+                 speed: float = 1.0, balance: float = 10000.0, history_days: int = 45,
+                 latency: Optional[LatencyModel] = None, fills: Optional[FillModel] = None,
+                 seed: int = 0):
+        self.data_dir = data_dir
+        self.speed = speed
+        self.initial_balance = balance
+        self.history_days = history_days
+        self.latency = latency or LatencyModel()
+        self.fills = fills or FillModel()
+        self.seed = seed
+
+        self._wall_start = time.time()
+        self._clock_start = self._wall_start if start_time is None else start_time
+        self._clock_offset = 0.0
+
+        self._series: Dict[str, Tuple[int, np.ndarray]] = {}  # {symbol: (base minutes, bars)}
+        self._synthetic = set()
+        self._specs: Dict[str, Dict] = {}
+        self._accounts: Dict[int, Dict] = {}
+        self._login: Optional[int] = None
+        self._initialized = False
+        self._last_error = (1, 'Success')
+        self._next_ticket = 100000
+        self.calls: Dict[str, int] = {}
+
+    @classmethod
+    def from_config(cls, config) -> 'SimulatedTerminal':
+        """Terminal configured from the SIM_* settings"""
+        start = None
+        if config.SIM_START:
+            start = datetime.strptime(config.SIM_START, '%Y-%m-%d %H:%M').replace(tzinfo=timezone.utc).timestamp()
+
+        return cls(
+            data_dir=config.SIM_DATA_DIR,
+            start_time=start,
+            speed=config.SIM_SPEED,
+            balance=config.SIM_BALANCE,
+            latency=LatencyModel(config.SIM_LATENCY_MS, config.SIM_LATENCY_JITTER_MS,
+                                 {'login': config.SIM_LOGIN_LATENCY_MS}, config.SIM_SEED),
+            fills=FillModel(config.SIM_SLIPPAGE_POINTS, config.SIM_REJECT_RATE, config.SIM_SEED),
+            seed=config.SIM_SEED
+        )
+
+    # ==================== CLOCK AND PRICE SERIES ====================
+
+    def now(self) -> float:
+        """Simulated time (epoch seconds)"""
+        return self._clock_start + (time.time() - self._wall_start) * self.speed + self._clock_offset
+
+    def advance(self, seconds: float):
+        """Move the simulated clock forward, e.g. to fast-forward a benchmark"""
+        self._clock_offset += seconds
+
+    def _enter(self, name: str):
+        """Per-call bookkeeping: latency, call counts and order/position updates"""
+        self.calls[name] = self.calls.get(name, 0) + 1
+        delay = self.latency.sample(name)
+        if delay > 0:
+            time.sleep(delay)  # Runs on the gateway thread, like a real terminal round trip
+        if self._initialized:
+            self._process_market()
+
+    def _load_recorded(self, symbol: str) -> Optional[Tuple[int, np.ndarray]]:
+        """Lowest-timeframe bar file for a symbol ({symbol}_{minutes}.npy, the BarStore layout)"""
+        if not self.data_dir or not os.path.isdir(self.data_dir):
+            return None
+
+        candidates = []
+        for path in glob.glob(os.path.join(self.data_dir, f"{symbol}_*.npy")):
+            suffix = os.path.basename(path)[len(symbol) + 1:-4]
+            if suffix.isdigit():
+                candidates.append((int(suffix), path))
+
+        for minutes, path in sorted(candidates):
+            try:
+                bars = np.load(path, allow_pickle=False)
+                if len(bars) > 0:
+                    logger.info(f"Simulator replaying {len(bars)} M{minutes} bars for {symbol}")
+                    return minutes, bars
+            except Exception as e:
+                logger.warning(f"Simulator could not read {path}: {e}")
+        return None
+
+    def _synthetic_bars(self, symbol: str, start: float, count: int, price: float) -> np.ndarray:
+        """Deterministic M1 random walk starting at `price`"""
+        _, digits, _, volatility = SYNTHETIC_MARKETS.get(_symbol_root(symbol), DEFAULT_MARKET)
+        rng = np.random.default_rng((zlib.crc32(symbol.encode()), self.seed, int(start)))
+
+        returns = rng.normal(0, volatility, count)
+        closes = price * np.exp(np.cumsum(returns))
+        opens = np.concatenate(([price], closes[:-1]))
+        wick = np.abs(rng.normal(0, volatility, (2, count))) * closes
+
+        bars = np.zeros(count, dtype=RATES_DTYPE)
+        bars['time'] = int(start) // 60 * 60 + np.arange(count) * 60
+        bars['open'] = np.round(opens, digits)
+        bars['close'] = np.round(closes, digits)
+        bars['high'] = np.round(np.maximum(opens, closes) + wick[0], digits)
+        bars['low'] = np.round(np.minimum(opens, closes) - wick[1], digits)
+        bars['tick_volume'] = rng.integers(20, 400, count)
+        bars['spread'] = 10 if digits in (3, 5) else 20
+        return bars
+
+    def _base(self, symbol: str) -> Tuple[int, np.ndarray]:
+        """
+        (minutes, bars) of the symbol's base series, extending synthetic data up to the clock
+        A clock before the first recorded bar is moved to that bar, so no later price is served early.
+        """
+        if symbol not in self._series:
+            recorded = self._load_recorded(symbol)
+            if recorded is None:
+                price = SYNTHETIC_MARKETS.get(_symbol_root(symbol), DEFAULT_MARKET)[0]
+                start = self.now() - self.history_days * 86400
+                recorded = (1, self._synthetic_bars(symbol, start, self.history_days * 1440 + 1440, price))
+                self._synthetic.add(symbol)
+            elif recorded[1]['time'][0] > self.now():
+                first = int(recorded[1]['time'][0])
+                logger.warning(f"Simulator clock is before the recorded {symbol} bars; moving it to "
+                               f"{datetime.fromtimestamp(first, timezone.utc):%Y-%m-%d %H:%M}")
+                self.advance(first - self.now())
+            self._series[symbol] = recorded
+
+        minutes, bars = self._series[symbol]
+        now = self.now()
+        if symbol in self._synthetic and bars['time'][-1] <= now:
+            # One day per block, so the series is the same however far the clock jumps at once
+            blocks = [bars]
+            while blocks[-1]['time'][-1] <= now:
+                last = blocks[-1]
+                blocks.append(self._synthetic_bars(symbol, last['time'][-1] + 60, 1440, float(last['close'][-1])))
+            bars = np.concatenate(blocks)
+            self._series[symbol] = (minutes, bars)
+        return minutes, bars
+
+    @staticmethod
+    def _intrabar_path(bar) -> Tuple[float, float, float, float]:
+        """Price path through a bar: open, the nearer extreme, the other extreme, close"""
+        if bar['close'] >= bar['open']:
+            return bar['open'], bar['low'], bar['high'], bar['close']
+        return bar['open'], bar['high'], bar['low'], bar['close']
+
+    def _cursor(self, symbol: str) -> Tuple[int, np.ndarray, int, np.ndarray]:
+        """
+        (base minutes, base bars, number of bars opened by the clock, current bar)
+        The current bar is a one-element copy cut at the intrabar price reached by the clock
+        """
+        minutes, bars = self._base(symbol)
+        now = self.now()
+        n = max(int(np.searchsorted(bars['time'], now, side='right')), 1)
+
+        current = bars[n - 1:n].copy()
+        elapsed = (now - current['time'][0]) / (minutes * 60)
+        if 0 <= elapsed < 1:
+            digits = self._spec(symbol)['digits']
+            price, high, low = (round(value, digits) for value in self._path_price(bars[n - 1], elapsed))
+            current['close'] = price
+            current['high'] = high
+            current['low'] = low
+            current['tick_volume'] = max(1, int(bars['tick_volume'][n - 1] * elapsed))
+        return minutes, bars, n, current
+
+    def _visible(self, symbol: str, count: Optional[int] = None) -> Tuple[int, np.ndarray]:
+        """Newest `count` base bars up to the clock (all when None), ending with the current bar"""
+        minutes, bars, n, current = self._cursor(symbol)
+        start = 0 if count is None else max(0, n - count)
+        return minutes, np.concatenate([bars[start:n - 1], current])
+
+    def _path_price(self, bar, fraction: float) -> Tuple[float, float, float]:
+        """(price, high so far, low so far) after `fraction` of a bar"""
+        path = self._intrabar_path(bar)
+        position = fraction * 3
+        segment = min(int(position), 2)
+        start, end = path[segment], path[segment + 1]
+        price = start + (end - start) * (position - segment)
+        seen = path[:segment + 1] + (price,)
+        return float(price), float(max(seen)), float(min(seen))
+
+    def _spec(self, symbol: str) -> Dict:
+        if symbol not in self._specs:
+            _, digits, contract_size, _ = SYNTHETIC_MARKETS.get(_symbol_root(symbol), DEFAULT_MARKET)
+            point = 10 ** -digits
+            self._specs[symbol] = {
+                'name': symbol,
+                'point': point,
+                'digits': digits,
+                'trade_contract_size': contract_size,
+                'volume_min': 0.01,
+                'volume_max': 100.0,
+                'volume_step': 0.01,
+                'trade_tick_size': point,
+                'currency_profit': _symbol_root(symbol)[3:6]
+            }
+        return self._specs[symbol]
+
+    def _quote(self, symbol: str) -> Tuple[float, float, int]:
+        """(bid, ask, tick time) at the clock"""
+        minutes, _, _, current = self._cursor(symbol)
+        spec = self._spec(symbol)
+        bid = float(current['close'][0])
+        ask = round(bid + int(current['spread'][0]) * spec['point'], spec['digits'])
+        return bid, ask, int(min(self.now(), current['time'][0] + minutes * 60 - 1))
+
+    def _tick_value(self, symbol: str, bid: float) -> float:
+        """Account-currency (USD) value of one tick for one lot"""
+        spec = self._spec(symbol)
+        value = spec['trade_contract_size'] * spec['trade_tick_size']
+        return value if spec['currency_profit'] == 'USD' else value / bid
+
+    # ==================== SESSION ====================
+
+    def initialize(self, path: Optional[str] = None, login: Optional[int] = None,
+                   password: Optional[str] = None, server: Optional[str] = None, timeout: int = 60000,
+                   portable: bool = False) -> bool:
+        self._enter('initialize')
+        self._initialized = True
+        if login:
+            return self.login(login, password=password, server=server, timeout=timeout)
+        return True
+
+    def login(self, login: int, password: Optional[str] = None, server: Optional[str] = None,
+              timeout: int = 60000) -> bool:
+        self._enter('login')
+        if not self._initialized:
+            self._last_error = (-10004, 'No IPC connection')
+            return False
+
+        login = int(login)
+        if login not in self._accounts:
+            self._accounts[login] = {
+                'balance': self.initial_balance, 'server': server or 'Simulator',
+                'positions': {}, 'orders': {}
+            }
+        self._login = login
+        return True
+
+    def shutdown(self) -> bool:
+        self._enter('shutdown')
+        self._initialized = False
+        self._login = None
+        return True
+
+    def last_error(self) -> Tuple[int, str]:
+        return self._last_error
+
+    def account_info(self) -> Optional[AccountInfo]:
+        self._enter('account_info')
+        account = self._account()
+        if account is None:
+            return None
+
+        profit = sum(self._position_profit(p) for p in account['positions'].values())
+        equity = account['balance'] + profit
+        return AccountInfo(self._login, account['balance'], equity, 0.0, equity, profit,
+                           'USD', account['server'], 100)
+
+    def _account(self) -> Optional[Dict]:
+        if not self._initialized or self._login is None:
+            self._last_error = (-10004, 'Not logged in')
+            return None
+        return self._accounts[self._login]
+
+    # ==================== MARKET DATA ====================
+
+    def copy_rates_from_pos(self, symbol: str, timeframe: int, start_pos: int, count: int) -> Optional[np.ndarray]:
+        self._enter('copy_rates_from_pos')
+        rates = self._rates(symbol, timeframe, (start_pos + count + 1))
+        if rates is None:
+            return None
+        end = len(rates) - start_pos
+        return rates[max(0, end - count):end].copy()
+
+    def copy_rates_range(self, symbol: str, timeframe: int, date_from, date_to) -> Optional[np.ndarray]:
+        self._enter('copy_rates_range')
+        start, end = (d.timestamp() if isinstance(d, datetime) else float(d) for d in (date_from, date_to))
+        rates = self._rates(symbol, timeframe, None)
+        if rates is None:
+            return None
+        return rates[(rates['time'] >= start) & (rates['time'] <= end)].copy()
+
+    def _rates(self, symbol: str, timeframe: int, count: Optional[int]) -> Optional[np.ndarray]:
+        """Newest `count` bars of a timeframe (all when None), resampled from the base series"""
+        minutes = TIMEFRAME_MINUTES.get(timeframe)
+        base_minutes = self._base(symbol)[0]
+        if minutes is None or minutes < base_minutes or minutes % base_minutes != 0:
+            self._last_error = (-2, f'Unsupported timeframe {timeframe} for {symbol}')
+            return None
+
+        if minutes == base_minutes:
+            return self._visible(symbol, count)[1]
+
+        ratio = minutes // base_minutes
+        window = self._visible(symbol, None if count is None else (count + 1) * ratio)[1]
+        return resample_rates(window, minutes)
+
+    def symbol_info(self, symbol: str) -> Optional[SymbolInfo]:
+        self._enter('symbol_info')
+        spec = self._spec(symbol)
+        bid, ask, _ = self._quote(symbol)
+        spread = int(round((ask - bid) / spec['point']))
+        return SymbolInfo(spread=spread, bid=bid, ask=ask, trade_tick_value=self._tick_value(symbol, bid),
+                          visible=True, **spec)
+
+    def symbol_info_tick(self, symbol: str) -> Optional[Tick]:
+        self._enter('symbol_info_tick')
+        bid, ask, tick_time = self._quote(symbol)
+        return Tick(tick_time, bid, ask, 0.0, 0, tick_time * 1000, 6, 0.0)
+
+    # ==================== TRADING ====================
+
+    def positions_get(self, symbol: Optional[str] = None, group: Optional[str] = None,
+                      ticket: Optional[int] = None) -> Optional[tuple]:
+        self._enter('positions_get')
+        account = self._account()
+        if account is None:
+            return None
+
+        positions = []
+        for position in account['positions'].values():
+            if (symbol and position['symbol'] != symbol) or (ticket and position['ticket'] != ticket):
+                continue
+            positions.append(TradePosition(
+                position['ticket'], int(position['time']), position['type'], position['magic'],
+                position['volume'], position['price_open'], position['sl'], position['tp'],
+                self._close_price(position), self._position_profit(position),
+                position['symbol'], position['comment']
+            ))
+        return tuple(positions)
+
+    def orders_get(self, symbol: Optional[str] = None, group: Optional[str] = None,
+                   ticket: Optional[int] = None) -> Optional[tuple]:
+        self._enter('orders_get')
+        account = self._account()
+        if account is None:
+            return None
+
+        orders = []
+        for order in account['orders'].values():
+            if (symbol and order['symbol'] != symbol) or (ticket and order['ticket'] != ticket):
+                continue
+            bid, ask, _ = self._quote(order['symbol'])
+            current = ask if order['type'] in (ORDER_TYPE_BUY_LIMIT, ORDER_TYPE_BUY_STOP) else bid
+            orders.append(TradeOrder(
+                order['ticket'], int(order['time']), order['type'], order['magic'], order['volume'],
+                order['volume'], order['price_open'], order['sl'], order['tp'], current,
+                order['symbol'], order['comment']
+            ))
+        return tuple(orders)
+
+    def order_send(self, request: Dict) -> Optional[OrderSendResult]:
+        self._enter('order_send')
+        account = self._account()
+        if account is None:
+            return None
+
+        action = request.get('action')
+        if action == TRADE_ACTION_DEAL:
+            return self._deal(account, request)
+        if action == TRADE_ACTION_PENDING:
+            return self._place_pending(account, request)
+        if action == TRADE_ACTION_SLTP:
+            position = account['positions'].get(request.get('position'))
+            if position is None:
+                return self._result(TRADE_RETCODE_POSITION_CLOSED, request, comment='Position not found')
+            position['sl'] = request.get('sl', position['sl'])
+            position['tp'] = request.get('tp', position['tp'])
+            return self._result(TRADE_RETCODE_DONE, request, order=position['ticket'])
+        if action == TRADE_ACTION_REMOVE:
+            if account['orders'].pop(request.get('order'), None) is None:
+                return self._result(TRADE_RETCODE_INVALID, request, comment='Order not found')
+            return self._result(TRADE_RETCODE_DONE, request, order=request.get('order'))
+
+        return self._result(TRADE_RETCODE_INVALID, request, comment='Unsupported action')
+
+    def _result(self, retcode: int, request: Dict, order: int = 0, deal: int = 0,
+                price: float = 0.0, comment: str = '') -> OrderSendResult:
+        bid, ask = 0.0, 0.0
+        if request.get('symbol'):
+            bid, ask, _ = self._quote(request['symbol'])
+        if not comment:
+            comment = 'Request executed' if retcode == TRADE_RETCODE_DONE else 'Request rejected'
+        return OrderSendResult(retcode, deal, order, request.get('volume', 0.0), price, bid, ask,
+                               comment, 0, request)
+
+    def _ticket(self) -> int:
+        self._next_ticket += 1
+        return self._next_ticket
+
+    def _valid_volume(self, symbol: str, volume: float) -> bool:
+        spec = self._spec(symbol)
+        steps = volume / spec['volume_step']
+        return (spec['volume_min'] <= volume <= spec['volume_max']
+                and abs(steps - round(steps)) < 1e-6)
+
+    def _deal(self, account: Dict, request: Dict) -> OrderSendResult:
+        """Market order: opens a position, or closes the one given in request['position']"""
+        symbol = request['symbol']
+        volume = request.get('volume', 0.0)
+        if not self._valid_volume(symbol, volume):
+            return self._result(TRADE_RETCODE_INVALID_VOLUME, request, comment='Invalid volume')
+        if self.fills.rejected():
+            return self._result(TRADE_RETCODE_REJECT, request)
+
+        spec = self._spec(symbol)
+        bid, ask, _ = self._quote(symbol)
+        buy = request['type'] == ORDER_TYPE_BUY
+        price = round((ask if buy else bid) + (1 if buy else -1) * self.fills.slippage(spec['point']),
+                      spec['digits'])
+
+        requested = request.get('price')
+        deviation = request.get('deviation')
+        if requested and deviation is not None and abs(price - requested) > deviation * spec['point']:
+            return self._result(TRADE_RETCODE_REQUOTE, request, comment='Requote')
+
+        if request.get('position'):
+            position = account['positions'].get(request['position'])
+            if position is None:
+                return self._result(TRADE_RETCODE_POSITION_CLOSED, request, comment='Position not found')
+            self._close_position(account, position, price, 'client')
+            return self._result(TRADE_RETCODE_DONE, request, order=self._ticket(), deal=self._ticket(), price=price)
+
+        ticket = self._ticket()
+        account['positions'][ticket] = {
+            'ticket': ticket, 'time': self.now(), 'symbol': symbol, 'type': request['type'],
+            'volume': volume, 'price_open': price, 'sl': request.get('sl', 0.0), 'tp': request.get('tp', 0.0),
+            'magic': request.get('magic', 0), 'comment': request.get('comment', '')
+        }
+        return self._result(TRADE_RETCODE_DONE, request, order=ticket, deal=self._ticket(), price=price)
+
+    def _place_pending(self, account: Dict, request: Dict) -> OrderSendResult:
+        symbol = request['symbol']
+        if not self._valid_volume(symbol, request.get('volume', 0.0)):
+            return self._result(TRADE_RETCODE_INVALID_VOLUME, request, comment='Invalid volume')
+        if self.fills.rejected():
+            return self._result(TRADE_RETCODE_REJECT, request)
+
+        bid, ask, _ = self._quote(symbol)
+        price = request['price']
+        order_type = request['type']
+        valid = {
+            ORDER_TYPE_BUY_LIMIT: price < ask,
+            ORDER_TYPE_SELL_LIMIT: price > bid,
+            ORDER_TYPE_BUY_STOP: price > ask,
+            ORDER_TYPE_SELL_STOP: price < bid
+        }.get(order_type)
+        if not valid:
+            return self._result(TRADE_RETCODE_INVALID_PRICE, request, comment='Invalid price')
+
+        ticket = self._ticket()
+        account['orders'][ticket] = {
+            'ticket': ticket, 'time': self.now(), 'symbol': symbol, 'type': order_type,
+            'volume': request['volume'], 'price_open': price, 'sl': request.get('sl', 0.0),
+            'tp': request.get('tp', 0.0), 'magic': request.get('magic', 0),
+            'comment': request.get('comment', '')
+        }
+        return self._result(TRADE_RETCODE_DONE, request, order=ticket, price=price)
+
+    # ==================== ORDER AND POSITION LIFECYCLE ====================
+
+    def _close_price(self, position: Dict) -> float:
+        bid, ask, _ = self._quote(position['symbol'])
+        return bid if position['type'] == ORDER_TYPE_BUY else ask
+
+    def _position_profit(self, position: Dict, close_price: Optional[float] = None) -> float:
+        symbol = position['symbol']
+        spec = self._spec(symbol)
+        price = self._close_price(position) if close_price is None else close_price
+        move = price - position['price_open']
+        if position['type'] != ORDER_TYPE_BUY:
+            move = -move
+        bid, _, _ = self._quote(symbol)
+        return round(move / spec['trade_tick_size'] * self._tick_value(symbol, bid) * position['volume'], 2)
+
+    def _close_position(self, account: Dict, position: Dict, price: float, reason: str):
+        account['balance'] = round(account['balance'] + self._position_profit(position, price), 2)
+        del account['positions'][position['ticket']]
+        logger.debug(f"Simulator closed position {position['ticket']} ({reason}) @ {price}")
+
+    def _range_since(self, symbol: str, since: float) -> Tuple[float, float]:
+        """Bid (low, high) traded after `since`: whole bars that opened later, plus the current price"""
+        minutes, bars, n, current = self._cursor(symbol)
+        bid = float(current['close'][0])
+        start = int(np.searchsorted(bars['time'], since // (minutes * 60) * (minutes * 60), side='right'))
+        closed = bars[start:n - 1]
+        if len(closed) == 0:
+            return bid, bid
+        return min(float(closed['low'].min()), bid), max(float(closed['high'].max()), bid)
+
+    def _process_market(self):
+        """Fill triggered pending orders and close positions whose SL or TP traded"""
+        for account in self._accounts.values():
+            for order in list(account['orders'].values()):
+                symbol = order['symbol']
+                bid, ask, _ = self._quote(symbol)
+                spread = ask - bid
+                low, high = self._range_since(symbol, order['time'])
+                buy = order['type'] in (ORDER_TYPE_BUY_LIMIT, ORDER_TYPE_BUY_STOP)
+                if buy:
+                    low, high = low + spread, high + spread
+                triggered = {
+                    ORDER_TYPE_BUY_LIMIT: low <= order['price_open'],
+                    ORDER_TYPE_SELL_LIMIT: high >= order['price_open'],
+                    ORDER_TYPE_BUY_STOP: high >= order['price_open'],
+                    ORDER_TYPE_SELL_STOP: low <= order['price_open']
+                }[order['type']]
+                if triggered:
+                    del account['orders'][order['ticket']]
+                    account['positions'][order['ticket']] = {
+                        **order, 'type': ORDER_TYPE_BUY if buy else ORDER_TYPE_SELL, 'time': self.now()
+                    }
+
+            for position in list(account['positions'].values()):
+                if not position['sl'] and not position['tp']:
+                    continue
+                symbol = position['symbol']
+                bid, ask, _ = self._quote(symbol)
+                low, high = self._range_since(symbol, position['time'])
+                buy = position['type'] == ORDER_TYPE_BUY
+                if not buy:
+                    low, high = low + (ask - bid), high + (ask - bid)  # Sells close on the ask
+
+                # SL first when both levels traded within the range
+                if position['sl'] and (low <= position['sl'] if buy else high >= position['sl']):
+                    self._close_position(account, position, position['sl'], 'sl')
+                elif position['tp'] and (high >= position['tp'] if buy else low <= position['tp']):
+                    self._close_position(account, position, position['tp'], 'tp')
+
+    def get_stats(self) -> Dict:
+        """Call counts, simulated time and per-account balances"""
+        return {
+            'calls': dict(self.calls),
+            'clock': datetime.fromtimestamp(self.now(), timezone.utc).isoformat(),
+            'accounts': {
+                login: {'balance': a['balance'], 'positions': len(a['positions']), 'orders': len(a['orders'])}
+                for login, a in self._accounts.items()
+            }
+        }
@@ -0,0 +1,189 @@
+"""
+Symbol Registry - Contract metadata for the trading universe
+Loads static symbol specs from the terminal once, persists them, and refreshes only quotes
+"""
+
+import json
+import os
+import time
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Contract fields that do not change during a session
+STATIC_FIELDS = (
+    'name', 'point', 'digits', 'trade_contract_size', 'volume_min', 'volume_max',
+    'volume_step', 'trade_tick_size', 'currency_profit'
+)
+
+# Fields refreshed from the terminal on every get_symbol_info
+VOLATILE_FIELDS = ('spread', 'bid', 'ask', 'trade_tick_value')
+
+# Persisted specs older than this are reloaded from the terminal
+SPEC_MAX_AGE = 7 * 24 * 3600
+
+
+def pip_size_from_digits(point: float, digits: int) -> float:
+    """Pip size for a quote precision: fractional-pip quotes (3 or 5 digits) are 10 points"""
+    return point * 10 if digits in (3, 5) else point
+
+
+class SymbolRegistry:
+    """Static contract specs per symbol plus the latest quote fields"""
+
+    def __init__(self, gateway, path: str = 'data/symbol_specs.json'):
+        self.gateway = gateway
+        self.path = path
+        self._specs: Dict[str, Dict] = {}
+        self._read_file()
+
+    def _read_file(self):
+        """Load persisted specs, skipping ones that are too old"""
+        if not os.path.exists(self.path):
+            return
+
+        try:
+            with open(self.path, 'r') as f:
+                stored = json.load(f)
+
+            now = time.time()
+            self._specs = {
+                symbol: spec for symbol, spec in stored.items()
+                if now - spec.get('loaded_at', 0) <= SPEC_MAX_AGE
+            }
+            logger.info(f"Loaded {len(self._specs)} symbol specs from {self.path}")
+
+        except Exception as e:
+            logger.warning(f"Could not read symbol specs from {self.path}: {e}")
+            self._specs = {}
+
+    def _write_file(self):
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(self._specs, f, indent=2)
+            os.replace(tmp_path, self.path)
+
+        except Exception as e:
+            logger.error(f"Error saving symbol specs to {self.path}: {e}")
+
+    @staticmethod
+    def _build_spec(info) -> Dict:
+        """Spec dict from an mt5 SymbolInfo record"""
+        spec = {field: getattr(info, field) for field in STATIC_FIELDS + VOLATILE_FIELDS}
+        spec['pip_size'] = pip_size_from_digits(spec['point'], spec['digits'])
+        spec['loaded_at'] = time.time()
+        return spec
+
+    async def load(self, symbols: List[str], force: bool = False) -> int:
+        """
+        Make sure every symbol has a spec, querying the terminal only for missing ones
+        Returns the number of symbols fetched from the terminal
+        """
+        fetched = 0
+
+        for symbol in symbols:
+            if symbol in self._specs and not force:
+                continue
+
+            try:
+                info = await self.gateway.call('symbol_info', symbol)
+                if info is None:
+                    logger.warning(f"No symbol info for {symbol}")
+                    continue
+
+                self._specs[symbol] = self._build_spec(info)
+                fetched += 1
+
+            except Exception as e:
+                logger.error(f"Error loading spec for {symbol}: {e}")
+
+        if fetched:
+            self._write_file()
+            logger.info(f"Loaded {fetched} symbol specs from the terminal")
+
+        return fetched
+
+    async def refresh(self, symbol: str) -> Optional[Dict]:
+        """Update the quote fields of a symbol and return its full spec"""
+        info = await self.gateway.call('symbol_info', symbol)
+        if info is None:
+            return None
+
+        spec = self._specs.get(symbol)
+        if spec is None:
+            spec = self._specs[symbol] = self._build_spec(info)
+            self._write_file()
+        else:
+            for field in VOLATILE_FIELDS:
+                spec[field] = getattr(info, field)
+
+        return spec
+
+    def get(self, symbol: str) -> Optional[Dict]:
+        """Stored spec for a symbol (quote fields as of the last refresh)"""
+        return self._specs.get(symbol)
+
+    def pip_size(self, symbol: str) -> float:
+        """Price distance of one pip"""
+        spec = self._specs.get(symbol)
+        if spec is not None:
+            return spec['pip_size']
+
+        # Terminal specs unavailable - fall back to the static table
+        from src.config.settings import Config
+        return Config.get_symbol_info(symbol)['point_value']
+
+    def pip_value(self, symbol: str) -> Optional[float]:
+        """Value of one pip for one lot in account currency"""
+        spec = self._specs.get(symbol)
+        if spec is None or not spec.get('trade_tick_size'):
+            return None
+        return spec['trade_tick_value'] * spec['pip_size'] / spec['trade_tick_size']
+
+    def normalize_volumes(self, symbol: str, volumes: Sequence[float]) -> np.ndarray:
+        """Round to the volume step and clamp to the symbol's volume limits"""
+        spec = self._specs[symbol]
+        step = spec['volume_step']
+        volumes = np.round(np.round(np.asarray(volumes, dtype=float) / step) * step, 8)
+        return np.clip(volumes, spec['volume_min'], spec['volume_max'])
+
+    def normalize_volume(self, symbol: str, volume: float) -> float:
+        return float(self.normalize_volumes(symbol, [volume])[0])
+
+    def lot_sizes(self, symbol: str, risk_amounts: Sequence[float], stop_loss_pips: float) -> Optional[np.ndarray]:
+        """Lot sizes risking each of `risk_amounts` (account currency) over `stop_loss_pips`"""
+        pip_value = self.pip_value(symbol)
+        if not pip_value or stop_loss_pips <= 0:
+            return None
+        return self.normalize_volumes(symbol, np.asarray(risk_amounts, dtype=float) / (stop_loss_pips * pip_value))
+
+    def lot_size(self, symbol: str, risk_amount: float, stop_loss_pips: float) -> Optional[float]:
+        """Lot size risking `risk_amount` (account currency) over `stop_loss_pips`"""
+        lots = self.lot_sizes(symbol, [risk_amount], stop_loss_pips)
+        return None if lots is None else float(lots[0])
+
+
+_default_registry: Optional[SymbolRegistry] = None
+
+
+def get_symbol_registry() -> SymbolRegistry:
+    """Process-wide registry shared by every module doing pip or lot math"""
+    global _default_registry
+    if _default_registry is None:
+        from src.config.settings import Config
+        from src.mt5.gateway import get_gateway
+        _default_registry = SymbolRegistry(get_gateway(), Config.SYMBOL_SPECS_FILE)
+    return _default_registry
+
+
+def set_symbol_registry(registry: SymbolRegistry):
+    """Replace the shared registry"""
+    global _default_registry
+    _default_registry = registry
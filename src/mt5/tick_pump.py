@@ -0,0 +1,156 @@
+"""
+Tick Pump - Price-change events for watched symbols
+Polls the latest tick only for symbols something is watching, at a rate that adapts to activity
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Poll interval multiplier applied each time a symbol's quote is unchanged
+BACKOFF_FACTOR = 2.0
+
+
+class TickPump:
+    """
+    Publishes a (symbol, tick) event to every subscriber whenever a watched symbol's quote changes
+    Symbols whose quote keeps moving are polled every `min_interval` seconds; quiet ones back off
+    to `max_interval`. Symbols nobody watches are never polled.
+    """
+
+    def __init__(self, mt5_connection, min_interval: float = 0.5, max_interval: float = 5.0):
+        self.mt5 = mt5_connection
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._sources: Dict[str, Callable[[], Iterable[str]]] = {}
+        self._subscribers: List[Callable[[str, Dict], Awaitable]] = []
+        self._intervals: Dict[str, float] = {}  # Current poll interval per watched symbol
+        self._next_poll: Dict[str, float] = {}  # Monotonic due time per watched symbol
+        self._last_quotes: Dict[str, tuple] = {}  # (time, bid, ask) of the last published tick
+        self._wakeup = asyncio.Event()
+        self._stopped = asyncio.Event()
+        self.stats = {'cycles': 0, 'polls': 0, 'events': 0, 'subscriber_errors': 0}
+
+    def add_watch_source(self, name: str, source: Callable[[], Iterable[str]]):
+        """Register a callable returning the symbols one component needs prices for"""
+        self._sources[name] = source
+        self.wake()
+
+    def remove_watch_source(self, name: str):
+        self._sources.pop(name, None)
+
+    def subscribe(self, callback: Callable[[str, Dict], Awaitable]):
+        """Call `await callback(symbol, tick)` on every price change of a watched symbol"""
+        self._subscribers.append(callback)
+
+    def wake(self):
+        """Re-read the watch sources now, e.g. after a new signal was added"""
+        self._wakeup.set()
+
+    def watched_symbols(self) -> List[str]:
+        """Union of all watch sources, in first-seen order"""
+        symbols = {}
+        for name, source in list(self._sources.items()):
+            try:
+                symbols.update(dict.fromkeys(source()))
+            except Exception as e:
+                logger.error(f"Tick pump watch source '{name}' failed: {e}")
+        return list(symbols)
+
+    def _sync_watchlist(self) -> List[str]:
+        """Start polling newly watched symbols immediately and forget unwatched ones"""
+        symbols = self.watched_symbols()
+        now = time.monotonic()
+
+        for symbol in symbols:
+            if symbol not in self._next_poll:
+                self._intervals[symbol] = self.min_interval
+                self._next_poll[symbol] = now
+
+        for symbol in [s for s in self._next_poll if s not in symbols]:
+            del self._next_poll[symbol]
+            self._intervals.pop(symbol, None)
+            self._last_quotes.pop(symbol, None)
+
+        return symbols
+
+    async def _poll(self, symbols: List[str]):
+        """Fetch due ticks together, then publish the changed ones"""
+        ticks = await asyncio.gather(
+            *(self.mt5.get_tick(symbol) for symbol in symbols),
+            return_exceptions=True
+        )
+        self.stats['polls'] += len(symbols)
+        now = time.monotonic()
+
+        for symbol, tick in zip(symbols, ticks):
+            if symbol not in self._next_poll:
+                continue  # Unwatched while the poll was in flight
+
+            quote = None
+            if tick and not isinstance(tick, Exception):
+                quote = (tick['time'], tick['bid'], tick['ask'])
+
+            if quote is not None and quote != self._last_quotes.get(symbol):
+                self._last_quotes[symbol] = quote
+                self._intervals[symbol] = self.min_interval
+                await self._publish(symbol, tick)
+            else:
+                self._intervals[symbol] = min(self._intervals[symbol] * BACKOFF_FACTOR, self.max_interval)
+
+            self._next_poll[symbol] = now + self._intervals[symbol]
+
+    async def _publish(self, symbol: str, tick: Dict):
+        self.stats['events'] += 1
+        for callback in list(self._subscribers):
+            try:
+                await callback(symbol, tick)
+            except Exception as e:
+                self.stats['subscriber_errors'] += 1
+                logger.error(f"Tick subscriber failed for {symbol}: {e}", exc_info=True)
+
+    async def run(self):
+        """Poll and publish until stop() is called"""
+        self._stopped.clear()
+        logger.info(f"Tick pump started ({self.min_interval}s-{self.max_interval}s adaptive polling)")
+
+        while not self._stopped.is_set():
+            try:
+                self._wakeup.clear()
+                self._sync_watchlist()
+
+                now = time.monotonic()
+                due = [symbol for symbol, at in self._next_poll.items() if at <= now]
+                if due:
+                    self.stats['cycles'] += 1
+                    await self._poll(due)
+
+                if self._next_poll:
+                    delay = max(0.0, min(self._next_poll.values()) - time.monotonic())
+                else:
+                    delay = self.max_interval
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Tick pump cycle failed: {e}", exc_info=True)
+                delay = self.max_interval
+
+            # A wake() or stop() cuts the wait short
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+        logger.info("Tick pump stopped")
+
+    def stop(self):
+        self._stopped.set()
+        self._wakeup.set()
+
+    def get_stats(self) -> Dict:
+        """Counters plus the current poll interval of every watched symbol"""
+        return {**self.stats, 'intervals': dict(self._intervals)}
@@ -970,6 +970,17 @@ Duration: {notif['duration']}
             logger.error(f"Error executing for users: {e}")
             return {}
     
+    async def reconcile_user_positions(self) -> List[Dict]:
+        """Reconcile tracked user tickets with their accounts"""
+        try:
+            if not hasattr(self, 'multi_user_executor'):
+                return []
+            
+            return await self.multi_user_executor.reconcile_positions()
+        except Exception as e:
+            logger.error(f"Error reconciling user positions: {e}")
+            return []
+    
     async def send_execution_confirmations(self, signal: Dict, results: Dict):
         """Send execution confirmations"""
         try:
@@ -1017,6 +1028,9 @@ TP: {signal['take_profit']:.5f} ({signal['tp_pips']:.1f} pips)
     async def shutdown(self):
         """Shutdown bot"""
         try:
+            if hasattr(self, 'multi_user_executor'):
+                self.multi_user_executor.close()
+            
             if self.app:
                 await self.app.updater.stop()
                 await self.app.stop()
@@ -1,5 +1,6 @@
 """Utility modules"""
 from .logger import setup_logger
 from .database import Database
+from .scheduler import JobScheduler
 
-__all__ = ['setup_logger', 'Database']
\ No newline at end of file
+__all__ = ['setup_logger', 'Database', 'JobScheduler']
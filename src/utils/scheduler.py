@@ -0,0 +1,164 @@
+"""
+Async Job Scheduler
+Runs each periodic bot job on its own cadence with jitter, overlap protection and timing metrics
+"""
+
+import asyncio
+import random
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Optional
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class ScheduledJob:
+    """A coroutine job with its own interval or bar-close trigger"""
+
+    def __init__(self, name: str, func: Callable[[], Awaitable], interval: float,
+                 jitter: float = 0.0, align: bool = False, offset: float = 0.0,
+                 run_immediately: bool = True):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.jitter = jitter
+        self.align = align  # Fire on wall-clock multiples of interval (bar closes)
+        self.offset = offset  # Delay after the aligned boundary
+        self.run_immediately = run_immediately
+
+        self.running = False
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+        self.last_started: Optional[datetime] = None
+        self.last_duration = 0.0
+        self.max_duration = 0.0
+        self.total_duration = 0.0
+
+    def next_delay(self) -> float:
+        """Seconds until the next trigger"""
+        if self.align:
+            now = time.time()
+            next_boundary = (now // self.interval + 1) * self.interval + self.offset
+            delay = next_boundary - now
+            if delay > self.interval:
+                delay -= self.interval
+        else:
+            delay = self.interval
+
+        if self.jitter > 0:
+            delay += random.uniform(0, self.jitter)
+
+        return max(0.0, delay)
+
+    def get_metrics(self) -> Dict:
+        """Run counts and durations"""
+        return {
+            'runs': self.runs,
+            'failures': self.failures,
+            'skipped_overlaps': self.skipped,
+            'running': self.running,
+            'last_started': self.last_started,
+            'last_duration': self.last_duration,
+            'max_duration': self.max_duration,
+            'avg_duration': self.total_duration / self.runs if self.runs > 0 else 0.0
+        }
+
+
+class JobScheduler:
+    """Schedules independent periodic jobs on the running event loop"""
+
+    def __init__(self):
+        self.jobs: Dict[str, ScheduledJob] = {}
+        self._loops = []
+        self._active = set()  # In-flight job runs
+        self._stopped = asyncio.Event()
+
+    def add_job(self, name: str, func: Callable[[], Awaitable], interval: float,
+                jitter: float = 0.0, align: bool = False, offset: float = 0.0,
+                run_immediately: bool = True) -> ScheduledJob:
+        """Register a job; takes effect on the next run()"""
+        job = ScheduledJob(name, func, interval, jitter, align, offset, run_immediately)
+        self.jobs[name] = job
+        return job
+
+    async def _execute(self, job: ScheduledJob):
+        """Run one job invocation and record its duration"""
+        job.last_started = datetime.now()
+        started = time.perf_counter()
+
+        try:
+            await job.func()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            job.failures += 1
+            logger.error(f"Scheduled job '{job.name}' failed: {e}", exc_info=True)
+        finally:
+            duration = time.perf_counter() - started
+            job.running = False
+            job.runs += 1
+            job.last_duration = duration
+            job.total_duration += duration
+            job.max_duration = max(job.max_duration, duration)
+            logger.debug(f"Job '{job.name}' finished in {duration:.2f}s "
+                         f"(avg {job.total_duration / job.runs:.2f}s, max {job.max_duration:.2f}s)")
+
+            if not job.align and duration > job.interval:
+                logger.warning(f"Job '{job.name}' overran its interval: "
+                               f"{duration:.1f}s > {job.interval:.0f}s")
+
+    def _trigger(self, job: ScheduledJob):
+        """Start a run in its own task unless the previous run is still going"""
+        if job.running:
+            job.skipped += 1
+            logger.warning(f"Job '{job.name}' still running - skipping this trigger")
+            return
+
+        job.running = True
+        task = asyncio.create_task(self._execute(job), name=f"job:{job.name}")
+        self._active.add(task)
+        task.add_done_callback(self._active.discard)
+
+    async def _job_loop(self, job: ScheduledJob):
+        """Trigger a job on its cadence until stopped"""
+        if job.run_immediately:
+            self._trigger(job)
+
+        while not self._stopped.is_set():
+            try:
+                await asyncio.wait_for(self._stopped.wait(), timeout=job.next_delay())
+            except asyncio.TimeoutError:
+                self._trigger(job)
+
+    async def run(self):
+        """Run all registered jobs until stop() is called"""
+        self._stopped.clear()
+        self._loops = [
+            asyncio.create_task(self._job_loop(job), name=f"schedule:{job.name}")
+            for job in self.jobs.values()
+        ]
+
+        for job in self.jobs.values():
+            mode = f"bar close every {job.interval:.0f}s" if job.align else f"every {job.interval:.0f}s"
+            logger.info(f"Scheduled job '{job.name}' ({mode})")
+
+        try:
+            await self._stopped.wait()
+        finally:
+            for task in self._loops:
+                task.cancel()
+            await asyncio.gather(*self._loops, return_exceptions=True)
+
+            # Let in-flight runs finish before handing control back
+            if self._active:
+                await asyncio.gather(*self._active, return_exceptions=True)
+
+    def stop(self):
+        """Stop triggering new runs"""
+        self._stopped.set()
+
+    def get_metrics(self) -> Dict[str, Dict]:
+        """Metrics for every registered job"""
+        return {name: job.get_metrics() for name, job in self.jobs.items()}